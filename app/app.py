@@ -1,8 +1,10 @@
 from . import application
-from .routes import api, web
+from .routes import api, debug, metrics, web
 
 app = application.get_app(debug_mod=application.settings.DEBUG_MOD)
 
 # Register routers
 app.include_router(web.web_router)
 app.include_router(api.api_routes)
+app.include_router(debug.debug_router)
+app.include_router(metrics.metrics_router)
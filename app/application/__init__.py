@@ -2,15 +2,44 @@ from fastapi import FastAPI, Request
 from fastapi.responses import JSONResponse
 from fastapi.staticfiles import StaticFiles
 
-from ..logger.logger import logger_app
+from ..logger.logger import configure_logging, logger_app
+from .compression import CompressionMiddleware
 from .custom_exp import CustomException
-from .lifespan import lifespan, sql_manager
+from .lifespan import (
+    idempotency_store,
+    invalidation_bus,
+    job_queue,
+    lifespan,
+    loop_monitor,
+    shared_metrics,
+    sql_manager,
+    storage,
+    tweet_cache,
+)
+from .metrics import MetricsMiddleware
+from .profiling import ProfilingMiddleware
 from .settings import settings
+from .sql_stats import SQLStatsMiddleware
 
+configure_logging(settings)
 logger = logger_app
 
 # Database Manager
 SQL_MANAGER = sql_manager
+# Cache invalidation bus
+INVALIDATION_BUS = invalidation_bus
+# In-process tweet cache
+TWEET_CACHE = tweet_cache
+# Idempotency-Key responses store
+IDEMPOTENCY_STORE = idempotency_store
+# Background jobs queue
+JOB_QUEUE = job_queue
+# Event loop lag and blocking callbacks
+LOOP_MONITOR = loop_monitor
+# Metrics of all worker processes
+SHARED_METRICS = shared_metrics
+# Attachments files storage
+STORAGE = storage
 
 # DIRECTORY WEB FILE SETTINGS
 DIRECTORY_MEDIA = settings.DIRECTORY_MEDIA
@@ -24,10 +53,31 @@ def get_app(debug_mod: bool = False):
     # Statics Files
     app.mount("/css", StaticFiles(directory=f"{DIRECTORY_MEDIA}/css"), name="static")
     app.mount("/js", StaticFiles(directory=f"{DIRECTORY_MEDIA}/js"), name="static")
-    app.mount(
-        "/images", StaticFiles(directory=f"{DIRECTORY_MEDIA}/images"), name="static"
-    )
-    app
+    # /images отдаёт хранилище файлов вложений, см. routes/web.py
+    # Middlewares
+    if settings.PROFILING_ENABLED:
+        app.add_middleware(
+            ProfilingMiddleware,
+            directory=settings.PROFILING_DIRECTORY,
+            token=settings.PROFILING_TOKEN,
+            sample_rate=settings.PROFILING_SAMPLE_RATE,
+            paths=settings.PROFILING_PATHS,
+        )
+    if settings.SQL_STATS_ENABLED:
+        app.add_middleware(
+            SQLStatsMiddleware,
+            n_plus_one_threshold=settings.SQL_N_PLUS_ONE_THRESHOLD,
+        )
+    if settings.COMPRESSION_ENABLED:
+        app.add_middleware(
+            CompressionMiddleware,
+            levels=settings.COMPRESSION_LEVELS,
+            min_size=settings.COMPRESSION_MIN_SIZE,
+            thread_min_size=settings.COMPRESSION_THREAD_MIN_SIZE,
+            exclude_paths=settings.COMPRESSION_EXCLUDE_PATHS,
+        )
+    if settings.METRICS_ENABLED:
+        app.add_middleware(MetricsMiddleware)
 
     # Custom exp
     @app.exception_handler(CustomException)
@@ -0,0 +1,201 @@
+"""Сжатие HTTP ответов по заголовку Accept-Encoding.
+
+Поддерживаются gzip и, если установлены пакеты brotli и zstandard
+(есть в requirements.txt), br и zstd. Ответ сжимается, если он не меньше
+min_size байт и его тип не является уже сжатым (изображения, архивы).
+Если сжатый ответ не меньше исходного, отправляется исходный. Большие ответы сжимаются
+в пуле потоков, чтобы не блокировать цикл событий. Ответы, передаваемые
+частями (StreamingResponse, статические файлы), передаются без сжатия.
+"""
+
+import asyncio
+import gzip
+from typing import Callable, Sequence
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from . import metrics
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - необязательная зависимость
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - необязательная зависимость
+    zstandard = None
+
+COMPRESSION_BYTES = metrics.registry.counter(
+    "http_compression_bytes_total",
+    "Response bytes before (in) and after (out) compression",
+    ("encoding", "direction"),
+)
+
+# Типы содержимого, которые уже сжаты
+SKIP_CONTENT_TYPES = (
+    "image/",
+    "video/",
+    "audio/",
+    "application/zip",
+    "application/gzip",
+    "application/octet-stream",
+)
+
+
+def _gzip(data: bytes, level: int) -> bytes:
+    return gzip.compress(data, compresslevel=level, mtime=0)
+
+
+def _brotli(data: bytes, level: int) -> bytes:
+    return brotli.compress(data, quality=level)
+
+
+def _zstd(data: bytes, level: int) -> bytes:
+    return zstandard.ZstdCompressor(level=level).compress(data)
+
+
+def available_encoders() -> dict[str, Callable[[bytes, int], bytes]]:
+    """Кодировки, для которых установлены библиотеки сжатия
+
+    Returns:
+        dict[str, Callable[[bytes, int], bytes]]: имя кодировки и функция сжатия
+    """
+    encoders = {"gzip": _gzip}
+    if brotli is not None:
+        encoders["br"] = _brotli
+    if zstandard is not None:
+        encoders["zstd"] = _zstd
+    return encoders
+
+
+def choose_encoding(accept_encoding: str, encodings: Sequence[str]) -> str | None:
+    """Выбирает кодировку по заголовку Accept-Encoding.
+    При одинаковом весе q выбирается кодировка, стоящая раньше в encodings
+
+    Args:
+        accept_encoding (str): значение заголовка Accept-Encoding
+        encodings (Sequence[str]): кодировки сервера в порядке предпочтения
+
+    Returns:
+        str | None: кодировка или None, если клиент не принимает ни одну
+    """
+    weights: dict[str, float] = {}
+    for item in accept_encoding.split(","):
+        name, _, params = item.strip().partition(";")
+        if not name:
+            continue
+        weight = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                weight = float(params[2:])
+            except ValueError:
+                weight = 0.0
+        weights[name.strip().lower()] = weight
+    best, best_weight = None, 0.0
+    for encoding in encodings:
+        weight = weights.get(encoding, weights.get("*", 0.0))
+        if weight > best_weight:
+            best, best_weight = encoding, weight
+    return best
+
+
+class CompressionMiddleware:
+    """ASGI middleware: сжатие ответов gzip, br или zstd
+
+    Args:
+        app (ASGIApp): приложение
+        levels (dict[str, int]): кодировки в порядке предпочтения и уровень
+            сжатия каждой, кодировки без установленной библиотеки пропускаются
+        min_size (int): минимальный размер ответа для сжатия, байты
+        thread_min_size (int): ответы от этого размера сжимаются в пуле потоков
+        exclude_paths (Sequence[str]): пути, ответы которых и ответы вложенных
+            путей не сжимаются, например /images и /images/1_image.png
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        levels: dict[str, int],
+        min_size: int = 1024,
+        thread_min_size: int = 256 * 1024,
+        exclude_paths: Sequence[str] = (),
+    ) -> None:
+        self.app = app
+        encoders = available_encoders()
+        self.encoders = {
+            name: (encoders[name], level)
+            for name, level in levels.items()
+            if name in encoders
+        }
+        self.min_size = min_size
+        self.thread_min_size = thread_min_size
+        self.exclude_paths = tuple(path.rstrip("/") for path in exclude_paths)
+
+    def _excluded(self, path: str) -> bool:
+        return any(
+            path == excluded or path.startswith(excluded + "/")
+            for excluded in self.exclude_paths
+        )
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or self._excluded(scope["path"]):
+            await self.app(scope, receive, send)
+            return
+        encoding = choose_encoding(
+            Headers(scope=scope).get("accept-encoding", ""), list(self.encoders)
+        )
+        start_message: Message | None = None
+        passthrough = False
+
+        async def send_compressed(message: Message) -> None:
+            nonlocal start_message, passthrough
+            if passthrough:
+                await send(message)
+                return
+            if message["type"] == "http.response.start":
+                headers = Headers(raw=message["headers"])
+                content_type = headers.get("content-type", "")
+                if "content-encoding" in headers or content_type.startswith(
+                    SKIP_CONTENT_TYPES
+                ):
+                    passthrough = True
+                    await send(message)
+                    return
+                MutableHeaders(scope=message).add_vary_header("Accept-Encoding")
+                start_message = message
+                return
+            if message["type"] != "http.response.body":
+                passthrough = True
+                await send(start_message)
+                await send(message)
+                return
+            body = message.get("body", b"")
+            if message.get("more_body", False) or encoding is None:
+                passthrough = True
+            elif len(body) >= self.min_size:
+                message = await self._compress(start_message, body, encoding)
+            await send(start_message)
+            await send(message)
+
+        await self.app(scope, receive, send_compressed)
+
+    async def _compress(
+        self, start_message: Message, body: bytes, encoding: str
+    ) -> Message:
+        encoder, level = self.encoders[encoding]
+        if len(body) >= self.thread_min_size:
+            loop = asyncio.get_running_loop()
+            compressed = await loop.run_in_executor(None, encoder, body, level)
+        else:
+            compressed = encoder(body, level)
+        if len(compressed) >= len(body):
+            return {"type": "http.response.body", "body": body, "more_body": False}
+        COMPRESSION_BYTES.inc(len(body), (encoding, "in"))
+        COMPRESSION_BYTES.inc(len(compressed), (encoding, "out"))
+        headers = MutableHeaders(scope=start_message)
+        headers["Content-Encoding"] = encoding
+        headers["Content-Length"] = str(len(compressed))
+        return {"type": "http.response.body", "body": compressed, "more_body": False}
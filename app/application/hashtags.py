@@ -0,0 +1,56 @@
+"""Извлечение хэштегов и упоминаний из текста твита.
+
+Хэштег - слово после #, приводится к нижнему регистру.
+Упоминание - слово после @, пользователь ищется по точному совпадению
+имени, поэтому упомянуть можно пользователя с именем из одного слова.
+"""
+
+import re
+from datetime import datetime, timezone
+
+# Максимальная длина хэштега и имени, как у колонок String(100)
+MAX_LENGTH = 100
+
+_HASHTAG = re.compile(r"(?<![\w#])#(\w+)")
+_MENTION = re.compile(r"(?<![\w@])@(\w+)")
+
+
+def _unique(words: list[str]) -> list[str]:
+    return [word for word in dict.fromkeys(words) if len(word) <= MAX_LENGTH]
+
+
+def extract_hashtags(text: str) -> list[str]:
+    """Возвращает хэштеги текста без повторов в порядке появления
+
+    Args:
+        text (str): текст твита
+
+    Returns:
+        list[str]: хэштеги без # в нижнем регистре
+    """
+    return _unique([tag.lower() for tag in _HASHTAG.findall(text)])
+
+
+def extract_mentions(text: str) -> list[str]:
+    """Возвращает упомянутые имена без повторов в порядке появления
+
+    Args:
+        text (str): текст твита
+
+    Returns:
+        list[str]: имена без @
+    """
+    return _unique(_MENTION.findall(text))
+
+
+def hour_bucket(moment: datetime | None = None) -> datetime:
+    """Начало часа, к которому относится момент времени
+
+    Args:
+        moment (datetime | None): момент времени, по умолчанию текущий
+
+    Returns:
+        datetime: начало часа в UTC
+    """
+    moment = moment or datetime.now(timezone.utc)
+    return moment.replace(minute=0, second=0, microsecond=0)
@@ -0,0 +1,212 @@
+"""Идемпотентные POST запросы по заголовку Idempotency-Key.
+
+Первый запрос с ключом резервирует его в таблице idempotency_keys,
+после выполнения сохраняет ответ. Повтор запроса с тем же ключом
+возвращает сохранённый ответ за один SELECT, не выполняя запись снова.
+Резервирование действует lease секунд: если процесс упал, не сохранив
+ответ, повтор после этого срока выполняет запрос заново.
+"""
+
+import hashlib
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import delete, select, update
+from sqlalchemy.dialects.postgresql import insert
+from starlette.datastructures import UploadFile
+from starlette.requests import Request
+
+from .custom_exp import CustomException
+from .models.core import SQLManager
+from .models.models import IdempotencyKeys
+
+
+async def request_hash(request: Request) -> str:
+    """sha256 тела запроса. Для multipart/form-data тело уже разобрано,
+    поэтому хэшируются поля формы и содержимое файлов
+
+    Args:
+        request (Request): объект запроса
+
+    Returns:
+        str: hex хэша
+    """
+    digest = hashlib.sha256()
+    if request.headers.get("content-type", "").startswith("multipart/form-data"):
+        for name, value in (await request.form()).multi_items():
+            digest.update(name.encode() + b"\0")
+            if isinstance(value, UploadFile):
+                digest.update((value.filename or "").encode() + b"\0")
+                digest.update(await value.read())
+                await value.seek(0)
+            else:
+                digest.update(value.encode())
+            digest.update(b"\0")
+    else:
+        digest.update(await request.body())
+    return digest.hexdigest()
+
+
+class Idempotency:
+    """Состояние ключа идемпотентности для одного запроса.
+    Если response не None, запрос уже выполнялся и нужно вернуть response
+    """
+
+    def __init__(
+        self,
+        store: "IdempotencyStore",
+        user_id: int,
+        key: str | None,
+        response: dict | None = None,
+    ) -> None:
+        self.store = store
+        self.user_id = user_id
+        self.key = key
+        self.response = response
+
+    async def save(self, response: dict) -> dict:
+        """Сохраняет ответ для повторов и возвращает его
+
+        Args:
+            response (dict): ответ эндпоинта
+
+        Returns:
+            dict: тот же ответ
+        """
+        if self.key is not None:
+            await self.store.save(self.user_id, self.key, response)
+        return response
+
+    async def release(self) -> None:
+        """Снимает резервирование ключа, если запрос завершился ошибкой"""
+        if self.key is not None and self.response is None:
+            await self.store.release(self.user_id, self.key)
+
+
+class IdempotencyStore:
+    """Хранилище ответов по ключам идемпотентности в базе данных
+
+    Args:
+        sql_manager (SQLManager): менеджер SQL запросов
+        ttl (int): время хранения ответа, секунды
+        lease (int): через сколько секунд незавершённый запрос считается
+            брошенным и ключ можно занять повтором
+    """
+
+    def __init__(
+        self, sql_manager: SQLManager, ttl: int = 86400, lease: int = 60
+    ) -> None:
+        self.sql_manager = sql_manager
+        self.ttl = ttl
+        self.lease = lease
+
+    def _cutoff(self) -> datetime:
+        return datetime.now(timezone.utc) - timedelta(seconds=self.ttl)
+
+    async def begin(
+        self, user_id: int, key: str | None, path: str, request_hash: str | None = None
+    ) -> Idempotency:
+        """Находит сохранённый ответ по ключу или резервирует ключ
+
+        Args:
+            user_id (int): id пользователя
+            key (str | None): значение заголовка Idempotency-Key
+            path (str): путь запроса
+            request_hash (str | None): хэш тела запроса
+
+        Raises:
+            CustomException: Ошибка 422 если ключ использован для другого пути
+                или другого тела запроса
+            CustomException: Ошибка 409 если запрос с этим ключом ещё выполняется
+
+        Returns:
+            Idempotency: состояние ключа
+        """
+        if key is None:
+            return Idempotency(self, user_id, None)
+        stored: IdempotencyKeys | None = (
+            await self.sql_manager.select_scalars_one_or_none(
+                select(IdempotencyKeys).where(
+                    IdempotencyKeys.user_id == user_id,
+                    IdempotencyKeys.key == key,
+                    IdempotencyKeys.created_at >= self._cutoff(),
+                )
+            )
+        )
+        now = datetime.now(timezone.utc)
+        if stored is None:
+            # Просроченный ключ перезаписывается, действующий не трогается
+            stmt = (
+                insert(IdempotencyKeys)
+                .values(user_id=user_id, key=key, path=path, request_hash=request_hash)
+                .on_conflict_do_update(
+                    index_elements=[IdempotencyKeys.user_id, IdempotencyKeys.key],
+                    set_={
+                        "path": path,
+                        "request_hash": request_hash,
+                        "response": None,
+                        "created_at": now,
+                        "started_at": now,
+                    },
+                    where=IdempotencyKeys.created_at < self._cutoff(),
+                )
+            )
+            if await self.sql_manager.execute(stmt):
+                return Idempotency(self, user_id, key)
+        elif stored.path != path or stored.request_hash != request_hash:
+            raise CustomException(
+                status_code=422,
+                error_type="Unprocessable Entity",
+                error_message="Idempotency-Key is already used for another request",
+            )
+        elif stored.response is not None:
+            return Idempotency(self, user_id, key, stored.response)
+        elif await self._reclaim(user_id, key, now):
+            return Idempotency(self, user_id, key)
+        raise CustomException(
+            status_code=409,
+            error_type="Conflict",
+            error_message="Request with this Idempotency-Key is in progress",
+        )
+
+    async def _reclaim(self, user_id: int, key: str, now: datetime) -> bool:
+        """Занимает ключ, резервирование которого старше lease секунд.
+        Из нескольких одновременных повторов ключ получит один
+        """
+        return bool(
+            await self.sql_manager.execute(
+                update(IdempotencyKeys)
+                .where(
+                    IdempotencyKeys.user_id == user_id,
+                    IdempotencyKeys.key == key,
+                    IdempotencyKeys.response.is_(None),
+                    IdempotencyKeys.started_at < now - timedelta(seconds=self.lease),
+                )
+                .values(started_at=now)
+            )
+        )
+
+    async def save(self, user_id: int, key: str, response: dict) -> None:
+        await self.sql_manager.execute(
+            update(IdempotencyKeys)
+            .where(IdempotencyKeys.user_id == user_id, IdempotencyKeys.key == key)
+            .values(response=response)
+        )
+
+    async def release(self, user_id: int, key: str) -> None:
+        await self.sql_manager.execute(
+            delete(IdempotencyKeys).where(
+                IdempotencyKeys.user_id == user_id,
+                IdempotencyKeys.key == key,
+                IdempotencyKeys.response.is_(None),
+            )
+        )
+
+    async def delete_expired(self) -> int:
+        """Удаляет просроченные ключи
+
+        Returns:
+            int: количество удалённых ключей
+        """
+        return await self.sql_manager.execute(
+            delete(IdempotencyKeys).where(IdempotencyKeys.created_at < self._cutoff())
+        )
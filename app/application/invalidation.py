@@ -0,0 +1,214 @@
+"""Шина инвалидации кэшей между процессами на Postgres LISTEN/NOTIFY.
+
+Каждый процесс хранит локальные версии ключей кэша в таблице
+фиксированного размера: ключ попадает в ячейку по хэшу, ключи одной
+ячейки делят версию. Запись кэша сохраняется вместе с версией ключа
+на момент чтения из базы и считается устаревшей, если версия с тех пор
+изменилась. Эндпоинты записи публикуют изменённые ключи: версия
+увеличивается сразу в своём процессе и через NOTIFY во всех остальных.
+Публикуются только ключи, на которые подписан кэш (сейчас tweet:<id>
+у TweetCache), каждое уведомление - отдельный запрос к базе.
+Уведомление может потеряться, поэтому записи кэша дополнительно
+ограничены по времени жизни (см. TweetCache).
+"""
+
+import asyncio
+import os
+import uuid
+import zlib
+from typing import Callable
+
+import asyncpg
+from sqlalchemy import text
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from ..logger.logger import logger_app
+from . import metrics
+
+logger = logger_app
+
+CHANNEL = "cache_invalidation"
+# Ключ, передаваемый подписчикам при сбросе всех версий
+ALL_KEYS = "*"
+# Предел размера payload pg_notify 8000 байт, с запасом
+NOTIFY_PAYLOAD_MAX = 7900
+
+INVALIDATIONS = metrics.registry.counter(
+    "cache_invalidations_total", "Cache keys invalidated", ("source",)
+)
+
+
+def tweet_key(tweet_id: int) -> str:
+    return "tweet:{}".format(tweet_id)
+
+
+class InvalidationBus:
+    """Шина инвалидации ключей кэша
+
+    Args:
+        engine (AsyncEngine): движок базы данных, через него отправляется NOTIFY
+        enabled (bool): если False, инвалидация только внутри процесса
+        channel (str): канал LISTEN/NOTIFY
+        stripes (int): количество ячеек таблицы версий
+    """
+
+    RECONNECT_DELAY = 0.5
+    RECONNECT_DELAY_MAX = 30.0
+
+    def __init__(
+        self,
+        engine: AsyncEngine,
+        enabled: bool = True,
+        channel: str = CHANNEL,
+        stripes: int = 4096,
+    ) -> None:
+        self.engine = engine
+        self.enabled = enabled
+        self.channel = channel
+        self.worker_id = "{}-{}".format(os.getpid(), uuid.uuid4().hex[:8])
+        self._epoch = 0
+        self._versions = [0] * stripes
+        self._subscribers: list[tuple[str, Callable[[str], None]]] = []
+        self._connected = asyncio.Event()
+        self._task: asyncio.Task | None = None
+
+    def version(self, key: str) -> tuple[int, int]:
+        """Текущая версия ключа в этом процессе
+
+        Args:
+            key (str): ключ кэша
+
+        Returns:
+            tuple[int, int]: эпоха шины и версия ключа
+        """
+        return self._epoch, self._versions[self._stripe(key)]
+
+    def _stripe(self, key: str) -> int:
+        return zlib.crc32(key.encode()) % len(self._versions)
+
+    def subscribe(self, prefix: str, callback: Callable[[str], None]) -> None:
+        """Подписывает callback на ключи, начинающиеся с prefix.
+        При сбросе всех версий callback вызывается с ключом ALL_KEYS
+
+        Args:
+            prefix (str): префикс ключей
+            callback (Callable[[str], None]): функция, принимающая ключ
+        """
+        self._subscribers.append((prefix, callback))
+
+    def invalidate_local(self, key: str) -> None:
+        self._versions[self._stripe(key)] += 1
+        for prefix, callback in self._subscribers:
+            if key.startswith(prefix):
+                callback(key)
+
+    def reset_local(self) -> None:
+        """Сбрасывает все версии, например после потери соединения,
+        когда уведомления могли быть пропущены
+        """
+        self._epoch += 1
+        self._versions = [0] * len(self._versions)
+        for _, callback in self._subscribers:
+            callback(ALL_KEYS)
+
+    async def publish(self, *keys: str) -> None:
+        """Инвалидирует ключи в этом процессе и отправляет их остальным.
+        Ошибка отправки только логируется: данные уже записаны, а записи
+        кэша других процессов устареют по времени жизни.
+        Длинный список ключей отправляется несколькими уведомлениями
+
+        Args:
+            keys (str): ключи кэша
+        """
+        for key in keys:
+            self.invalidate_local(key)
+        INVALIDATIONS.inc(len(keys), ("local",))
+        if not self.enabled or not keys:
+            return
+        try:
+            async with self.engine.begin() as connection:
+                for payload in self._payloads(keys):
+                    await connection.execute(
+                        text("SELECT pg_notify(:channel, :payload)"),
+                        {"channel": self.channel, "payload": payload},
+                    )
+        except (OSError, SQLAlchemyError) as exc:
+            logger.error("Invalidation notify failed for %d keys: %s", len(keys), exc)
+
+    def _payloads(self, keys: tuple[str, ...]) -> list[str]:
+        """Делит ключи на payload уведомлений не длиннее NOTIFY_PAYLOAD_MAX"""
+        prefix = "{}|".format(self.worker_id)
+        payloads: list[str] = []
+        chunk: list[str] = []
+        size = len(prefix)
+        for key in keys:
+            if chunk and size + 1 + len(key) > NOTIFY_PAYLOAD_MAX:
+                payloads.append(prefix + ",".join(chunk))
+                chunk, size = [], len(prefix)
+            chunk.append(key)
+            size += len(key) + 1
+        payloads.append(prefix + ",".join(chunk))
+        return payloads
+
+    def _on_notify(self, connection, pid, channel: str, payload: str) -> None:
+        worker_id, _, keys = payload.partition("|")
+        if worker_id == self.worker_id:
+            return
+        keys_list = keys.split(",")
+        for key in keys_list:
+            self.invalidate_local(key)
+        INVALIDATIONS.inc(len(keys_list), ("remote",))
+
+    def _dsn(self) -> str:
+        return self.engine.url.set(drivername="postgresql").render_as_string(
+            hide_password=False
+        )
+
+    async def _listen(self) -> None:
+        delay = self.RECONNECT_DELAY
+        while True:
+            connection = None
+            try:
+                connection = await asyncpg.connect(self._dsn())
+                closed = asyncio.Event()
+                connection.add_termination_listener(lambda _: closed.set())
+                await connection.add_listener(self.channel, self._on_notify)
+                # Пока соединения не было, уведомления могли потеряться
+                self.reset_local()
+                self._connected.set()
+                logger.info("Invalidation bus listen %s", self.channel)
+                delay = self.RECONNECT_DELAY
+                await closed.wait()
+                logger.warning("Invalidation bus connection lost")
+            except (OSError, asyncpg.PostgresError) as exc:
+                logger.warning("Invalidation bus connect error: %s", exc)
+            except Exception:
+                # Любая другая ошибка не должна останавливать слушателя,
+                # иначе кэши процесса перестанут инвалидироваться
+                logger.exception("Invalidation bus listen error")
+            finally:
+                self._connected.clear()
+                if connection is not None and not connection.is_closed():
+                    connection.terminate()
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, self.RECONNECT_DELAY_MAX)
+
+    async def start(self) -> None:
+        if not self.enabled or self._task is not None:
+            return
+        self._task = asyncio.create_task(self._listen())
+
+    async def wait_ready(self, timeout: float = 5.0) -> None:
+        """Ожидает подключения слушателя к каналу"""
+        await asyncio.wait_for(self._connected.wait(), timeout)
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
@@ -0,0 +1,420 @@
+"""Очередь фоновых задач внутри процесса.
+
+Задачи регистрируются по имени декоратором JobQueue.task и ставятся
+в очередь через enqueue. Асинхронные задачи выполняются воркерами
+в цикле событий, блокирующие (blocking=True) - в пуле потоков,
+CPU-ёмкие (process=True) - в пуле процессов. Неудачная задача
+повторяется с экспоненциальной задержкой.
+
+Задача с durable=True сохраняется в таблице jobs до выполнения.
+Если процесс остановился, задачу через JOBS_STALE_AFTER секунд
+забирает и выполняет любой процесс приложения. Строку задачи можно
+записать в транзакции изменения данных (durable_row), а после фиксации
+поставить в очередь (submit), тогда задача не потеряется между ними.
+
+Задачи обслуживания (очистка устаревших строк) ставятся в очередь
+периодически через JobQueue.schedule.
+"""
+
+import asyncio
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable
+
+from sqlalchemy import delete, select, update
+
+from ..logger.logger import logger_app
+from . import metrics
+from .models.core import SQLManager
+from .models.models import Jobs
+
+logger = logger_app
+
+JOB_WAIT = metrics.registry.histogram(
+    "job_wait_seconds", "Time from enqueue to job start", ("job",)
+)
+JOB_DURATION = metrics.registry.histogram(
+    "job_duration_seconds", "Job run time", ("job",)
+)
+JOBS_TOTAL = metrics.registry.counter(
+    "jobs_total", "Finished job attempts", ("job", "status")
+)
+
+
+class Task:
+    """Зарегистрированный обработчик задачи"""
+
+    __slots__ = ("name", "func", "blocking", "process", "retries")
+
+    def __init__(
+        self, name: str, func: Callable, blocking: bool, process: bool, retries: int
+    ) -> None:
+        self.name = name
+        self.func = func
+        self.blocking = blocking
+        self.process = process
+        self.retries = retries
+
+
+class Job:
+    """Задача в очереди"""
+
+    __slots__ = ("id", "name", "args", "kwargs", "attempts", "enqueued_at")
+
+    def __init__(
+        self,
+        name: str,
+        args: tuple | list,
+        kwargs: dict,
+        id: int | None = None,
+        attempts: int = 0,
+    ) -> None:
+        self.id = id
+        self.name = name
+        self.args = args
+        self.kwargs = kwargs
+        self.attempts = attempts
+        self.enqueued_at = time.perf_counter()
+
+
+class JobQueue:
+    """Очередь фоновых задач
+
+    Args:
+        sql_manager (SQLManager): менеджер SQL запросов, хранит durable задачи
+        workers (int): количество асинхронных воркеров
+        threads (int): размер пула потоков для блокирующих задач
+        processes (int): размер пула процессов, 0 - без пула процессов
+        max_retries (int): количество повторов неудачной задачи по умолчанию
+        retry_delay (float): задержка перед первым повтором, секунды
+        stale_after (int): через сколько секунд незавершённая durable задача
+            другого процесса считается брошенной
+    """
+
+    RECOVERY_BATCH = 100
+
+    def __init__(
+        self,
+        sql_manager: SQLManager,
+        workers: int = 4,
+        threads: int = 4,
+        processes: int = 0,
+        max_retries: int = 3,
+        retry_delay: float = 0.5,
+        stale_after: int = 300,
+    ) -> None:
+        self.sql_manager = sql_manager
+        self.workers = workers
+        self.threads = threads
+        self.processes = processes
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self.stale_after = stale_after
+        self.tasks: dict[str, Task] = {}
+        self._queue: asyncio.Queue[Job] = asyncio.Queue()
+        self._workers: list[asyncio.Task] = []
+        self._recovery: asyncio.Task | None = None
+        self._schedules: list[asyncio.Task] = []
+        self._thread_pool: ThreadPoolExecutor | None = None
+        self._process_pool: ProcessPoolExecutor | None = None
+        # Задачи в очереди, в работе и ожидающие повтора
+        self._pending = 0
+        self._idle = asyncio.Event()
+        self._idle.set()
+
+    @property
+    def depth(self) -> int:
+        return self._queue.qsize()
+
+    @property
+    def pending(self) -> int:
+        return self._pending
+
+    def task(
+        self,
+        name: str | None = None,
+        blocking: bool = False,
+        process: bool = False,
+        retries: int | None = None,
+    ) -> Callable[[Callable], Callable]:
+        """Декоратор регистрации обработчика задачи
+
+        Args:
+            name (str | None): имя задачи, по умолчанию имя функции
+            blocking (bool): выполнять в пуле потоков
+            process (bool): выполнять в пуле процессов
+            retries (int | None): количество повторов при ошибке
+
+        Returns:
+            Callable: декоратор, возвращающий функцию без изменений
+        """
+
+        def decorator(func: Callable) -> Callable:
+            task_name = name or func.__name__
+            self.tasks[task_name] = Task(
+                task_name,
+                func,
+                blocking,
+                process,
+                self.max_retries if retries is None else retries,
+            )
+            return func
+
+        return decorator
+
+    def _add(self, job: Job) -> None:
+        self._pending += 1
+        self._idle.clear()
+        self._queue.put_nowait(job)
+
+    def _done(self) -> None:
+        self._pending -= 1
+        if self._pending == 0:
+            self._idle.set()
+
+    async def enqueue(self, name: str, *args, durable: bool = False, **kwargs) -> None:
+        """Ставит задачу в очередь. Аргументы durable задачи должны
+        сериализоваться в JSON
+
+        Args:
+            name (str): имя зарегистрированной задачи
+            durable (bool): сохранить задачу в базе данных до выполнения
+        """
+        if not durable:
+            self._check(name)
+            self._add(Job(name, args, kwargs))
+            return
+        row = self.durable_row(name, *args, **kwargs)
+        await self.sql_manager.add(row)
+        self.submit(row)
+
+    def _check(self, name: str) -> None:
+        if name not in self.tasks:
+            raise KeyError("Unknown job {}".format(name))
+
+    def durable_row(self, name: str, *args, **kwargs) -> Jobs:
+        """Строка durable задачи для записи в транзакции вызывающего кода.
+        После фиксации транзакции задача ставится в очередь через submit
+
+        Args:
+            name (str): имя зарегистрированной задачи
+
+        Returns:
+            Jobs: объект модели Jobs, ещё не записанный в базу данных
+        """
+        self._check(name)
+        return Jobs(
+            name=name,
+            args={"args": list(args), "kwargs": kwargs},
+            status="running",
+            claimed_at=datetime.now(timezone.utc),
+        )
+
+    def submit(self, row: Jobs) -> None:
+        """Ставит в очередь задачу, строка которой записана в базу данных
+
+        Args:
+            row (Jobs): записанная строка durable_row
+        """
+        self._add(Job(row.name, row.args["args"], row.args["kwargs"], row.id))
+
+    def schedule(self, name: str, interval: float, *args, **kwargs) -> None:
+        """Ставит задачу в очередь сразу и затем каждые interval секунд
+        до остановки очереди
+
+        Args:
+            name (str): имя зарегистрированной задачи
+            interval (float): период в секундах, 0 - только один раз
+        """
+        self._check(name)
+        if interval <= 0:
+            self._add(Job(name, args, kwargs))
+            return
+        self._schedules.append(
+            asyncio.create_task(self._schedule_loop(name, interval, args, kwargs))
+        )
+
+    async def _schedule_loop(
+        self, name: str, interval: float, args: tuple, kwargs: dict
+    ) -> None:
+        while True:
+            self._add(Job(name, args, kwargs))
+            await asyncio.sleep(interval)
+
+    async def run_blocking(self, func: Callable, *args) -> Any:
+        """Выполняет блокирующую функцию в пуле потоков и ожидает результат"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._thread_pool, func, *args)
+
+    async def _call(self, task: Task, job: Job) -> None:
+        if task.process and self._process_pool is not None:
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(
+                self._process_pool, _call_with_kwargs, task.func, job.args, job.kwargs
+            )
+        elif task.blocking or task.process:
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(
+                self._thread_pool, _call_with_kwargs, task.func, job.args, job.kwargs
+            )
+        else:
+            await task.func(*job.args, **job.kwargs)
+
+    async def _run(self, job: Job) -> None:
+        task = self.tasks[job.name]
+        JOB_WAIT.observe(time.perf_counter() - job.enqueued_at, (job.name,))
+        start = time.perf_counter()
+        try:
+            await self._call(task, job)
+        except Exception as exc:
+            JOB_DURATION.observe(time.perf_counter() - start, (job.name,))
+            job.attempts += 1
+            if job.attempts <= task.retries:
+                JOBS_TOTAL.inc(1, (job.name, "retry"))
+                delay = self.retry_delay * 2 ** (job.attempts - 1)
+                logger.warning(
+                    "Job %s failed, retry %d in %.1fs: %s",
+                    job.name,
+                    job.attempts,
+                    delay,
+                    exc,
+                )
+                self._pending += 1
+                asyncio.get_running_loop().call_later(delay, self._retry, job)
+                return
+            JOBS_TOTAL.inc(1, (job.name, "failed"))
+            logger.exception("Job %s failed after %d attempts", job.name, job.attempts)
+            if job.id is not None:
+                await self.sql_manager.execute(
+                    update(Jobs)
+                    .where(Jobs.id == job.id)
+                    .values(status="failed", attempts=job.attempts)
+                )
+            return
+        JOB_DURATION.observe(time.perf_counter() - start, (job.name,))
+        JOBS_TOTAL.inc(1, (job.name, "done"))
+        if job.id is not None:
+            await self.sql_manager.execute(delete(Jobs).where(Jobs.id == job.id))
+
+    def _retry(self, job: Job) -> None:
+        job.enqueued_at = time.perf_counter()
+        self._queue.put_nowait(job)
+
+    async def _worker(self) -> None:
+        while True:
+            job = await self._queue.get()
+            try:
+                await self._run(job)
+            except Exception:
+                logger.exception("Job %s internal error", job.name)
+            finally:
+                self._queue.task_done()
+                self._done()
+
+    async def recover(self) -> int:
+        """Забирает брошенные durable задачи и ставит их в очередь.
+        Несколько процессов не заберут одну задачу благодаря SKIP LOCKED
+
+        Returns:
+            int: количество восстановленных задач
+        """
+        now = datetime.now(timezone.utc)
+        stale = now - timedelta(seconds=self.stale_after)
+        claim = (
+            select(Jobs.id)
+            .where(Jobs.status == "running", Jobs.claimed_at < stale)
+            .limit(self.RECOVERY_BATCH)
+            .with_for_update(skip_locked=True)
+        )
+        async with await self.sql_manager.get_session() as session:
+            async with session.begin():
+                result = await session.execute(
+                    update(Jobs)
+                    .where(Jobs.id.in_(claim.scalar_subquery()))
+                    .values(claimed_at=now)
+                    .returning(Jobs.id, Jobs.name, Jobs.args, Jobs.attempts)
+                )
+                rows = result.all()
+        for job_id, name, args, attempts in rows:
+            if name not in self.tasks:
+                logger.error("Unknown durable job %s id=%s", name, job_id)
+                continue
+            self._add(Job(name, args["args"], args["kwargs"], job_id, attempts))
+        if rows:
+            logger.info("Recovered %d durable jobs", len(rows))
+        return len(rows)
+
+    async def _recovery_loop(self) -> None:
+        while True:
+            try:
+                await self.recover()
+            except Exception:
+                logger.exception("Durable jobs recovery error")
+            await asyncio.sleep(self.stale_after)
+
+    async def start(self, recover: bool = True) -> None:
+        """Запускает воркеры и пулы
+
+        Args:
+            recover (bool): периодически забирать брошенные durable задачи
+        """
+        if self._workers:
+            return
+        self._thread_pool = ThreadPoolExecutor(
+            max_workers=self.threads, thread_name_prefix="jobs"
+        )
+        if self.processes > 0:
+            self._process_pool = ProcessPoolExecutor(max_workers=self.processes)
+        self._workers = [
+            asyncio.create_task(self._worker()) for _ in range(self.workers)
+        ]
+        if recover:
+            self._recovery = asyncio.create_task(self._recovery_loop())
+
+    async def drain(self, timeout: float | None = None) -> None:
+        """Ожидает выполнения всех задач, включая повторы"""
+        await asyncio.wait_for(self._idle.wait(), timeout)
+
+    async def stop(self, timeout: float = 5.0) -> None:
+        """Ожидает выполнения задач не дольше timeout и останавливает воркеры.
+        Невыполненные durable задачи заберёт другой процесс
+        """
+        for task in self._schedules:
+            task.cancel()
+        await asyncio.gather(*self._schedules, return_exceptions=True)
+        self._schedules = []
+        if not self._workers:
+            return
+        try:
+            await self.drain(timeout)
+        except asyncio.TimeoutError:
+            logger.warning("Stop job queue with %d pending jobs", self._pending)
+        tasks = self._workers + ([self._recovery] if self._recovery else [])
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._workers = []
+        self._recovery = None
+        self._thread_pool.shutdown(wait=False)
+        if self._process_pool is not None:
+            self._process_pool.shutdown(wait=False)
+            self._process_pool = None
+
+
+def _call_with_kwargs(func: Callable, args, kwargs: dict) -> Any:
+    return func(*args, **kwargs)
+
+
+def register_metrics(job_queue: JobQueue) -> None:
+    """Публикует размер очереди в реестре метрик"""
+    metrics.registry.gauge(
+        "job_queue_depth",
+        "Jobs waiting in queue",
+        function=lambda: {(): job_queue.depth},
+    )
+    metrics.registry.gauge(
+        "job_queue_pending",
+        "Jobs queued, running or waiting for retry",
+        function=lambda: {(): job_queue.pending},
+    )
@@ -2,16 +2,83 @@ from contextlib import asynccontextmanager
 
 from fastapi import FastAPI
 
+from . import jobs, metrics, sql_stats
+from .idempotency import IdempotencyStore
+from .invalidation import InvalidationBus
 from .models.core import SQLManager
+from .profiling import LoopMonitor
 from .settings import settings
+from .storage import create_storage
+from .tasks import register_tasks
+from .tweet_cache import TweetCache, register_metrics
 
-sql_manager = SQLManager(settings.DATABASE_URL)
+sql_manager = SQLManager(
+    settings.DATABASE_URL,
+    echo=settings.DATABASE_ECHO,
+    prepared_statement_cache_size=settings.DATABASE_PREPARED_STATEMENT_CACHE_SIZE,
+)
+if settings.SQL_STATS_ENABLED:
+    sql_stats.instrument_engine(sql_manager.engine)
+if settings.METRICS_ENABLED:
+    metrics.instrument_engine(sql_manager.engine)
+invalidation_bus = InvalidationBus(
+    sql_manager.engine, enabled=settings.INVALIDATION_BUS_ENABLED
+)
+tweet_cache = TweetCache(
+    invalidation_bus,
+    capacity=settings.TWEET_CACHE_SIZE,
+    ttl=settings.TWEET_CACHE_TTL,
+)
+register_metrics(tweet_cache)
+idempotency_store = IdempotencyStore(
+    sql_manager, ttl=settings.IDEMPOTENCY_TTL, lease=settings.IDEMPOTENCY_LEASE
+)
+storage = create_storage(settings)
+job_queue = jobs.JobQueue(
+    sql_manager,
+    workers=settings.JOBS_WORKERS,
+    threads=settings.JOBS_THREADS,
+    processes=settings.JOBS_PROCESSES,
+    max_retries=settings.JOBS_MAX_RETRIES,
+    stale_after=settings.JOBS_STALE_AFTER,
+)
+jobs.register_metrics(job_queue)
+register_tasks(job_queue, sql_manager, idempotency_store, storage)
+loop_monitor = LoopMonitor(slow_callback=settings.PROFILING_SLOW_CALLBACK)
+shared_metrics = metrics.SharedMetrics(
+    metrics.registry, settings.METRICS_DIRECTORY, settings.METRICS_FLUSH_INTERVAL
+)
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # With start app
-    await sql_manager.initial_database()
+    if settings.DATABASE_AUTO_MIGRATE:
+        await sql_manager.upgrade_database()
+    else:
+        await sql_manager.check_database()
+    await invalidation_bus.start()
+    await job_queue.start()
+    if settings.PROFILING_ENABLED:
+        await loop_monitor.start()
+    if settings.METRICS_ENABLED:
+        await shared_metrics.start()
+    job_queue.schedule(
+        "delete_expired_idempotency_keys", settings.IDEMPOTENCY_CLEANUP_INTERVAL
+    )
+    job_queue.schedule(
+        "delete_old_hashtag_counts",
+        settings.TRENDING_CLEANUP_INTERVAL,
+        settings.TRENDING_MAX_HOURS,
+    )
+    # Пересчёт ставит по расписанию каждый процесс, но под advisory lock
+    # выполняет только один из них
+    job_queue.schedule("reconcile_user_stats", settings.USER_STATS_RECONCILE_INTERVAL)
     yield
     # With stop app
+    await loop_monitor.stop()
+    await shared_metrics.stop()
+    await job_queue.stop()
+    await invalidation_bus.stop()
     await sql_manager.close()
+    storage.close()
@@ -0,0 +1,472 @@
+import asyncio
+import glob
+import json
+import os
+import time
+import uuid
+from bisect import bisect_left
+from typing import Any, Callable, Iterable
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from ..logger.logger import logger_app
+
+logger = logger_app
+
+# Границы корзин гистограмм по умолчанию, секунды
+LATENCY_BUCKETS = (
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+# Границы корзин для размеров, байты
+SIZE_BUCKETS = (
+    1024,
+    10 * 1024,
+    100 * 1024,
+    512 * 1024,
+    1024**2,
+    5 * 1024**2,
+    10 * 1024**2,
+    50 * 1024**2,
+)
+
+
+def _format_labels(labelnames: tuple[str, ...], values: tuple, extra: str = "") -> str:
+    pairs = [
+        '{name}="{value}"'.format(
+            name=name,
+            value=str(value).replace("\\", "\\\\").replace('"', '\\"'),
+        )
+        for name, value in zip(labelnames, values)
+    ]
+    if extra:
+        pairs.append(extra)
+    return "{%s}" % ",".join(pairs) if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value)
+
+
+class Metric:
+    """Базовый класс метрики. Значения хранятся в словаре по кортежу меток,
+    без блокировок: метрики обновляются из потока цикла событий.
+    """
+
+    type_name = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+
+    def collect(self) -> dict[tuple, Any]:
+        """Текущие значения по кортежам меток"""
+        return dict(self._values)
+
+    def merge(self, values: dict[tuple, Any], labels: tuple, value: Any) -> None:
+        """Добавляет значение другого процесса к values"""
+        values[labels] = values.get(labels, 0) + value
+
+    def samples(self, values: dict[tuple, Any]) -> Iterable[str]:
+        raise NotImplementedError
+
+    def render(self, values: dict[tuple, Any] | None = None) -> str:
+        lines = [
+            "# HELP {name} {doc}".format(name=self.name, doc=self.documentation),
+            "# TYPE {name} {type}".format(name=self.name, type=self.type_name),
+        ]
+        lines.extend(self.samples(self.collect() if values is None else values))
+        return "\n".join(lines)
+
+
+class Counter(Metric):
+
+    type_name = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: dict[tuple, float] = {}
+
+    def inc(self, amount: float = 1, labels: tuple = ()) -> None:
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+    def value(self, labels: tuple = ()) -> float:
+        return self._values.get(labels, 0)
+
+    def samples(self, values: dict[tuple, Any]) -> Iterable[str]:
+        for labels, value in values.items():
+            yield "{name}{labels} {value}".format(
+                name=self.name,
+                labels=_format_labels(self.labelnames, labels),
+                value=_format_value(value),
+            )
+
+
+class Gauge(Metric):
+    """Метрика текущего значения. Может вычисляться функцией в момент сбора"""
+
+    type_name = "gauge"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Iterable[str] = (),
+        function: Callable[[], dict[tuple, float]] | None = None,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self._values: dict[tuple, float] = {}
+        self.function = function
+
+    def set(self, value: float, labels: tuple = ()) -> None:
+        self._values[labels] = value
+
+    def inc(self, amount: float = 1, labels: tuple = ()) -> None:
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+    def dec(self, amount: float = 1, labels: tuple = ()) -> None:
+        self._values[labels] = self._values.get(labels, 0) - amount
+
+    def value(self, labels: tuple = ()) -> float:
+        if self.function is not None:
+            return self.function().get(labels, 0)
+        return self._values.get(labels, 0)
+
+    def collect(self) -> dict[tuple, Any]:
+        if self.function is not None:
+            return dict(self.function())
+        return dict(self._values)
+
+    def samples(self, values: dict[tuple, Any]) -> Iterable[str]:
+        for labels, value in values.items():
+            yield "{name}{labels} {value}".format(
+                name=self.name,
+                labels=_format_labels(self.labelnames, labels),
+                value=_format_value(value),
+            )
+
+
+class Histogram(Metric):
+    """Гистограмма с фиксированными корзинами.
+    При наблюдении увеличивается одна корзина, накопительные суммы
+    считаются только при выводе.
+    """
+
+    type_name = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Iterable[str] = (),
+        buckets: Iterable[float] = LATENCY_BUCKETS,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # labels -> [counts по корзинам + корзина +Inf, sum]
+        self._values: dict[tuple, list] = {}
+
+    def observe(self, value: float, labels: tuple = ()) -> None:
+        state = self._values.get(labels)
+        if state is None:
+            state = self._values[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+        state[0][bisect_left(self.buckets, value)] += 1
+        state[1] += value
+
+    def count(self, labels: tuple = ()) -> int:
+        state = self._values.get(labels)
+        return sum(state[0]) if state is not None else 0
+
+    def collect(self) -> dict[tuple, Any]:
+        return {
+            labels: [list(counts), total]
+            for labels, (counts, total) in self._values.items()
+        }
+
+    def merge(self, values: dict[tuple, Any], labels: tuple, value: Any) -> None:
+        state = values.get(labels)
+        if state is None:
+            values[labels] = [list(value[0]), value[1]]
+            return
+        state[0] = [count + other for count, other in zip(state[0], value[0])]
+        state[1] += value[1]
+
+    def samples(self, values: dict[tuple, Any]) -> Iterable[str]:
+        bounds = self.buckets + (float("inf"),)
+        for labels, (counts, total) in values.items():
+            cumulative = 0
+            for bound, count in zip(bounds, counts):
+                cumulative += count
+                yield "{name}_bucket{labels} {value}".format(
+                    name=self.name,
+                    labels=_format_labels(
+                        self.labelnames, labels, 'le="%s"' % _format_value(bound)
+                    ),
+                    value=cumulative,
+                )
+            formatted = _format_labels(self.labelnames, labels)
+            yield "{name}_sum{labels} {value}".format(
+                name=self.name, labels=formatted, value=_format_value(total)
+            )
+            yield "{name}_count{labels} {value}".format(
+                name=self.name, labels=formatted, value=cumulative
+            )
+
+
+class Registry:
+    """Реестр метрик процесса"""
+
+    def __init__(self) -> None:
+        self._metrics: dict[str, Metric] = {}
+
+    def register(self, metric: Metric) -> Metric:
+        if metric.name in self._metrics:
+            raise ValueError("Metric {} already registered".format(metric.name))
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames=()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(
+        self, name: str, documentation: str, labelnames=(), function=None
+    ) -> Gauge:
+        return self.register(Gauge(name, documentation, labelnames, function))
+
+    def histogram(
+        self, name: str, documentation: str, labelnames=(), buckets=LATENCY_BUCKETS
+    ) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def get(self, name: str) -> Metric | None:
+        return self._metrics.get(name)
+
+    def collect(self) -> dict[str, dict[tuple, Any]]:
+        """Текущие значения всех метрик по имени"""
+        return {name: metric.collect() for name, metric in self._metrics.items()}
+
+    def render(self, values: dict[str, dict[tuple, Any]] | None = None) -> str:
+        """Вывод всех метрик в текстовом формате Prometheus
+
+        Args:
+            values (dict | None): значения метрик по имени вместо текущих
+        """
+        return (
+            "\n".join(
+                metric.render(None if values is None else values.get(name, {}))
+                for name, metric in self._metrics.items()
+            )
+            + "\n"
+        )
+
+
+class SharedMetrics:
+    """Метрики нескольких процессов приложения (uvicorn --workers).
+    Каждый процесс раз в interval секунд записывает свои значения в файл
+    общего каталога, /metrics отдаёт сумму по всем файлам, поэтому ответ
+    не зависит от процесса, принявшего запрос. Счётчики и гистограммы
+    остановленных процессов продолжают учитываться, чтобы суммы не убывали,
+    gauge - только пока файл процесса обновляется. Без каталога отдаются
+    метрики текущего процесса
+
+    Args:
+        registry (Registry): реестр метрик процесса
+        directory (str): общий каталог процессов, пустой - без объединения
+        interval (float): период записи значений процесса, секунды
+    """
+
+    def __init__(self, registry: Registry, directory: str, interval: float) -> None:
+        self.registry = registry
+        self.directory = directory
+        self.interval = interval
+        self.path: str | None = None
+        self._task: asyncio.Task | None = None
+
+    def write(self) -> None:
+        """Записывает значения метрик процесса в его файл"""
+        if self.path is None:
+            return
+        data = {
+            name: [[list(labels), value] for labels, value in values.items()]
+            for name, values in self.registry.collect().items()
+        }
+        temp_path = self.path + ".tmp"
+        with open(temp_path, "w") as file:
+            json.dump(data, file)
+        os.replace(temp_path, self.path)
+
+    def render(self) -> str:
+        """Вывод суммы метрик всех процессов в текстовом формате Prometheus"""
+        values = self.registry.collect()
+        if not self.directory:
+            return self.registry.render(values)
+        now = time.time()
+        for path in glob.glob(os.path.join(self.directory, "*.json")):
+            if path == self.path:
+                continue
+            try:
+                stale = now - os.path.getmtime(path) > self.interval * 3
+                with open(path) as file:
+                    data = json.load(file)
+            except (OSError, ValueError):
+                continue
+            for name, rows in data.items():
+                metric = self.registry.get(name)
+                if metric is None or (stale and isinstance(metric, Gauge)):
+                    continue
+                merged = values.setdefault(name, {})
+                for labels, value in rows:
+                    metric.merge(merged, tuple(labels), value)
+        return self.registry.render(values)
+
+    async def _write_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                # Файл в несколько килобайт, значения читаются в цикле событий,
+                # где они изменяются, поэтому запись без пула потоков
+                self.write()
+            except OSError:
+                logger.exception("Metrics write error %s", self.path)
+
+    async def start(self) -> None:
+        if not self.directory or self._task is not None:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        # pid может повториться после перезапуска, имя файла уникально
+        self.path = os.path.join(
+            self.directory, "{}-{}.json".format(os.getpid(), uuid.uuid4().hex)
+        )
+        self.write()
+        self._task = asyncio.create_task(self._write_loop())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+        # Итоговые значения счётчиков остановленного процесса
+        self.write()
+
+
+registry = Registry()
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# HTTP
+HTTP_REQUESTS = registry.counter(
+    "http_requests_total", "HTTP requests count", ("method", "route", "status")
+)
+HTTP_LATENCY = registry.histogram(
+    "http_request_duration_seconds", "HTTP request latency", ("method", "route")
+)
+HTTP_IN_PROGRESS = registry.gauge(
+    "http_requests_in_progress", "HTTP requests in progress"
+)
+
+# Database
+DB_STATEMENTS = registry.histogram(
+    "db_statement_duration_seconds", "SQL statement latency", ("operation",)
+)
+DB_POOL_CHECKOUTS = registry.counter(
+    "db_pool_checkouts_total", "Connections checked out from the pool"
+)
+
+# Uploads
+UPLOAD_BYTES = registry.counter("upload_bytes_total", "Uploaded media bytes")
+UPLOAD_SIZE = registry.histogram(
+    "upload_size_bytes", "Uploaded media file size", buckets=SIZE_BUCKETS
+)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    context._metrics_start = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    operation = statement.lstrip()[:6].lower()
+    DB_STATEMENTS.observe(time.perf_counter() - context._metrics_start, (operation,))
+
+
+def _on_checkout(dbapi_connection, connection_record, connection_proxy):
+    DB_POOL_CHECKOUTS.inc()
+
+
+def instrument_engine(engine: AsyncEngine) -> None:
+    """Подключает метрики запросов и пула соединений к движку базы данных
+
+    Args:
+        engine (AsyncEngine): асинхронный движок SQLAlchemy
+    """
+    sync_engine = engine.sync_engine
+    if event.contains(sync_engine, "before_cursor_execute", _before_cursor_execute):
+        return
+    event.listen(sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(sync_engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(sync_engine.pool, "checkout", _on_checkout)
+    pool = sync_engine.pool
+
+    def pool_state() -> dict[tuple, float]:
+        return {
+            ("size",): pool.size(),
+            ("checked_out",): pool.checkedout(),
+            ("checked_in",): pool.checkedin(),
+            ("overflow",): pool.overflow(),
+        }
+
+    if registry.get("db_pool_connections") is None:
+        registry.gauge(
+            "db_pool_connections", "Database pool state", ("state",), pool_state
+        )
+
+
+class MetricsMiddleware:
+    """ASGI middleware: количество и длительность HTTP запросов по маршрутам.
+    В метку route попадает шаблон пути (/api/tweets/{id}), а не сам путь.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        start = time.perf_counter()
+        status = 500
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        HTTP_IN_PROGRESS.inc()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            HTTP_IN_PROGRESS.dec()
+            route = scope.get("route")
+            route_path = getattr(route, "path", "other")
+            method = scope["method"]
+            HTTP_LATENCY.observe(time.perf_counter() - start, (method, route_path))
+            HTTP_REQUESTS.inc(1, (method, route_path, status))
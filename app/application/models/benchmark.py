@@ -0,0 +1,85 @@
+"""Микробенчмарк подготовки запросов горячих эндпоинтов
+
+> python -m app.application.models.benchmark [--number 20000]
+
+Сравнивает время, которое тратится на каждый HTTP запрос до отправки SQL:
+построение объекта запроса и вычисление ключа кэша компиляции SQLAlchemy.
+Запросы, собираемые в эндпоинте при каждом вызове, сравниваются с готовыми
+запросами из statements. База данных не нужна.
+"""
+
+import argparse
+import timeit
+from typing import Callable
+
+from sqlalchemy import Executable, delete, select
+from sqlalchemy.orm import selectinload
+
+from . import statements
+from .models import Follower, Followers, Likes, Tweets, Users
+
+
+def _user_by_api_key() -> Executable:
+    return (
+        select(Users)
+        .where(Users.api_key == "test")
+        .options(selectinload(Users.user_followers))
+        .options(selectinload(Users.following))
+    )
+
+
+def _tweet_by_id() -> Executable:
+    return select(Tweets).where(Tweets.id == 1)
+
+
+def _like() -> Executable:
+    return delete(Likes).where(Likes.user_id == 1).where(Likes.tweet_id == 1)
+
+
+def _follower() -> Executable:
+    return select(Follower).where(Follower.user_id == 1)
+
+
+def _followers_pair() -> Executable:
+    return (
+        select(Followers)
+        .where(Followers.user_id == 2)
+        .where(Followers.follower_id == 1)
+    )
+
+
+# Запрос в эндпоинте и готовый запрос с тем же назначением
+CASES: dict[str, tuple[Callable[[], Executable], Executable]] = {
+    "get_user": (_user_by_api_key, statements.USER_BY_API_KEY),
+    "tweet_by_id": (_tweet_by_id, statements.TWEET_BY_ID),
+    "delete_like": (_like, statements.LIKE_DELETE),
+    "follower": (_follower, statements.FOLLOWER_BY_USER_ID),
+    "followers_pair": (_followers_pair, statements.FOLLOWERS_PAIR),
+}
+
+
+def run(number: int = 20000) -> dict[str, tuple[float, float]]:
+    """Измеряет время подготовки запросов
+
+    Args:
+        number (int): количество повторов каждого запроса
+
+    Returns:
+        dict[str, tuple[float, float]]: имя запроса, время в микросекундах
+            на один запрос при построении в эндпоинте и для готового запроса
+    """
+    results = {}
+    for name, (build, prepared) in CASES.items():
+        inline = timeit.timeit(lambda: build()._generate_cache_key(), number=number)
+        cached = timeit.timeit(lambda: prepared._generate_cache_key(), number=number)
+        results[name] = (inline / number * 1e6, cached / number * 1e6)
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Statement build benchmark")
+    parser.add_argument("--number", type=int, default=20000)
+    args = parser.parse_args()
+    print("{:<16}{:>12}{:>12}".format("statement", "inline, us", "cached, us"))
+    for name, (inline, cached) in run(args.number).items():
+        print("{:<16}{:>12.2f}{:>12.2f}".format(name, inline, cached))
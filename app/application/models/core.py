@@ -1,6 +1,23 @@
-from typing import Any, Sequence
+import asyncio
+from datetime import datetime
+from typing import Any, AsyncIterator, Callable, Sequence
 
-from sqlalchemy import Select, select
+from sqlalchemy import (
+    Delete,
+    Executable,
+    Insert,
+    Select,
+    Update,
+    delete,
+    distinct,
+    func,
+    literal,
+    select,
+    text,
+    tuple_,
+    update,
+)
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.ext.asyncio import (
     AsyncEngine,
     AsyncSession,
@@ -9,20 +26,175 @@ from sqlalchemy.ext.asyncio import (
 )
 
 from ...logger.logger import logger_database
-from .models import Attachments, Base
+from ..hashtags import hour_bucket
+from . import migrations, statements
+from .models import (
+    Attachments,
+    Base,
+    Followers,
+    HashtagCounts,
+    Jobs,
+    Likes,
+    TweetHashtags,
+    TweetMentions,
+    Tweets,
+    Users,
+    UserStats,
+)
+from .statements import USER_STATS_COLUMNS
 
 logger = logger_database
 
+# Произвольный ключ pg_try_advisory_lock, чтобы пересчёт счётчиков
+# пользователей выполнял только один процесс
+RECONCILE_LOCK_ID = 728_501_338
+
+
+def _decrement_hashtag_counts(tweet_ids: Sequence[int]) -> Update:
+    """Запрос уменьшения счётчиков хэштегов удаляемых твитов.
+    Выполняется до удаления твитов в той же транзакции
+    """
+    removed = (
+        select(TweetHashtags.tag, TweetHashtags.bucket, func.count().label("count"))
+        .where(TweetHashtags.tweet_id.in_(tweet_ids))
+        .group_by(TweetHashtags.tag, TweetHashtags.bucket)
+        .subquery()
+    )
+    return (
+        update(HashtagCounts)
+        .where(
+            HashtagCounts.tag == removed.c.tag,
+            HashtagCounts.bucket == removed.c.bucket,
+        )
+        .values(count=HashtagCounts.count - removed.c.count)
+    )
+
+
+def _user_stats_changes(*changes: tuple[int, str, int]) -> list[dict]:
+    """Параметры statements.USER_STATS_UPDATE из изменений счётчиков
+    (user_id, счётчик, разница). Изменения одного пользователя складываются
+    в одну строку параметров. Строки отсортированы по user_id, чтобы
+    встречные транзакции блокировали строки счётчиков в одном порядке
+    """
+    params: dict[int, dict] = {}
+    for user_id, column, delta in changes:
+        row = params.setdefault(
+            user_id, {"user_id": user_id, **dict.fromkeys(USER_STATS_COLUMNS, 0)}
+        )
+        row[column] += delta
+    return [params[user_id] for user_id in sorted(params)]
+
+
+def _decrement_user_stats(tweet_ids: Sequence[int]) -> Update:
+    """Запрос уменьшения счётчиков твитов и полученных лайков авторов
+    удаляемых твитов. Выполняется до удаления твитов в той же транзакции
+    """
+    removed = (
+        select(
+            Tweets.user_id,
+            func.count(distinct(Tweets.id)).label("tweets"),
+            func.count(Likes.user_id).label("likes"),
+        )
+        .outerjoin(Likes, Likes.tweet_id == Tweets.id)
+        .where(Tweets.id.in_(tweet_ids))
+        .group_by(Tweets.user_id)
+        .subquery()
+    )
+    return (
+        update(UserStats)
+        .where(UserStats.user_id == removed.c.user_id)
+        .values(
+            tweets=UserStats.tweets - removed.c.tweets,
+            likes_received=UserStats.likes_received - removed.c.likes,
+        )
+    )
+
+
+def _decrement_likes_received(tweet_ids: Sequence[int]) -> Update:
+    """Запрос уменьшения счётчиков полученных лайков авторов твитов,
+    с которых удалено по одному лайку
+    """
+    removed = (
+        select(Tweets.user_id, func.count().label("likes"))
+        .where(Tweets.id.in_(tweet_ids))
+        .group_by(Tweets.user_id)
+        .subquery()
+    )
+    return (
+        update(UserStats)
+        .where(UserStats.user_id == removed.c.user_id)
+        .values(likes_received=UserStats.likes_received - removed.c.likes)
+    )
+
+
+def _decrement_user_stat(column: str, user_ids: Sequence[int]) -> Update:
+    """Запрос уменьшения счётчика column пользователей на единицу"""
+    return (
+        update(UserStats)
+        .where(UserStats.user_id.in_(user_ids))
+        .values({column: getattr(UserStats, column) - 1})
+    )
+
+
+def _reconcile_user_stats(first_id: int, last_id: int) -> Insert:
+    """Запрос пересчёта счётчиков пользователей с id от first_id до last_id
+    (не включая) по таблицам. Изменяет только строки с расхождениями
+    """
+
+    def counts(column, *joins) -> Select:
+        stmt = select(column.label("user_id"), func.count().label("count"))
+        for target, on in joins:
+            stmt = stmt.join(target, on)
+        return (
+            stmt.where(column >= first_id, column < last_id).group_by(column).subquery()
+        )
+
+    subqueries = {
+        "tweets": counts(Tweets.user_id),
+        "followers": counts(Followers.user_id),
+        "following": counts(Followers.follower_id),
+        "likes_received": counts(Tweets.user_id, (Likes, Likes.tweet_id == Tweets.id)),
+    }
+    actual = select(
+        Users.id,
+        *(func.coalesce(subquery.c.count, 0) for subquery in subqueries.values()),
+    ).where(Users.id >= first_id, Users.id < last_id)
+    for subquery in subqueries.values():
+        actual = actual.outerjoin(subquery, subquery.c.user_id == Users.id)
+    stmt = insert(UserStats).from_select(["user_id", *subqueries], actual)
+    return stmt.on_conflict_do_update(
+        index_elements=[UserStats.user_id],
+        set_={column: stmt.excluded[column] for column in subqueries},
+        where=tuple_(
+            *(getattr(UserStats, column) for column in subqueries)
+        ).is_distinct_from(tuple_(*(stmt.excluded[column] for column in subqueries))),
+    )
+
 
 class DatabaseManger:
     ECHO = False
     EXPIRE_ON_COMMIT = False
 
-    def __init__(self, database_url: str) -> None:
+    def __init__(
+        self,
+        database_url: str,
+        echo: bool | None = None,
+        prepared_statement_cache_size: int | None = None,
+    ) -> None:
         self.url = database_url
-        self.engine: AsyncEngine = create_async_engine(url=self.url, echo=self.ECHO)
+        self.echo = self.ECHO if echo is None else echo
+        connect_args = {}
+        if prepared_statement_cache_size is not None:
+            # Кэш подготовленных запросов asyncpg на каждом соединении,
+            # 0 отключает подготовку запросов
+            connect_args["prepared_statement_cache_size"] = (
+                prepared_statement_cache_size
+            )
+        self.engine: AsyncEngine = create_async_engine(
+            url=self.url, echo=self.echo, connect_args=connect_args
+        )
         logger.debug("Initial engine %s", self.url)
-        logger.debug("Engine echo %s", self.ECHO)
+        logger.debug("Engine echo %s", self.echo)
 
     async def initial_database(self) -> None:
         """Инициализирует базу данных, создаёт таблицы"""
@@ -30,6 +202,26 @@ class DatabaseManger:
             await connection.run_sync(Base.metadata.create_all)
         logger.info("Initialization database")
 
+    async def upgrade_database(self) -> int:
+        """Применяет миграции схемы базы данных до последней версии
+
+        Returns:
+            int: версия схемы
+        """
+        version = await migrations.upgrade(self.engine)
+        logger.info("Database schema version %s", version)
+        return version
+
+    async def check_database(self) -> int:
+        """Проверяет версию схемы базы данных без её изменения
+
+        Returns:
+            int: версия схемы
+        """
+        version = await migrations.check_version(self.engine)
+        logger.info("Database schema version %s", version)
+        return version
+
     async def drop_all_table(self) -> None:
         """Удаляет все таблицы из базы данных"""
         async with self.engine.begin() as connection:
@@ -77,34 +269,56 @@ class SQLManager(DatabaseManger):
                 await session.delete(obj)
                 await session.commit()
 
-    async def select_scalars_all(self, stmt: Select) -> Sequence:
+    async def execute(self, stmt: Executable, params: dict | None = None) -> int:
+        """Выполняет запрос без загрузки объектов в сессию,
+        например delete(Tweets).where(...)
+
+        Args:
+            stmt (Executable): объект запроса
+            params (dict | None): значения параметров bindparam запроса
+
+        Returns:
+            int: количество затронутых строк
+        """
+        async with await self.get_session() as session:
+            async with session.begin():
+                result = await session.execute(stmt, params)
+        return result.rowcount
+
+    async def select_scalars_all(
+        self, stmt: Select, params: dict | None = None
+    ) -> Sequence:
         """Возвращает все объекты из базы данных по Select
 
         Args:
             stmt (Select): объект запроса
+            params (dict | None): значения параметров bindparam запроса
 
         Returns:
             Sequence: Список объектов
         """
         async with await self.get_session() as session:
             async with session.begin():
-                result = await session.execute(stmt)
+                result = await session.execute(stmt, params)
                 object_list = result.scalars().all()
         return object_list
 
-    async def select_scalars_one_or_none(self, stmt: Select) -> Any | None:
+    async def select_scalars_one_or_none(
+        self, stmt: Select, params: dict | None = None
+    ) -> Any | None:
         """Возвращает объект по запросу Select или None
         Если такой объект не найден
 
         Args:
             stmt (Select): объект запроса
+            params (dict | None): значения параметров bindparam запроса
 
         Returns:
             Any | None: Объект модели баз данных
         """
         async with await self.get_session() as session:
             async with session.begin():
-                result = await session.execute(stmt)
+                result = await session.execute(stmt, params)
                 object = result.scalars().one_or_none()
             return object
 
@@ -149,3 +363,661 @@ class SQLManager(DatabaseManger):
                     filename=attachment.file_name
                 )
                 await session.commit()
+
+    async def add_tweet(
+        self,
+        tweet: Tweets,
+        hashtags: list[str],
+        mentions: list[str],
+        attachment_ids: Sequence[int] = (),
+    ) -> None:
+        """Добавляет твит вместе с его хэштегами, упоминаниями и вложениями
+        и увеличивает счётчики хэштегов текущего часа в одной транзакции.
+        Твит виден другим запросам сразу со всеми вложениями
+
+        Args:
+            tweet (Tweets): объект модели Tweets
+            hashtags (list[str]): хэштеги без повторов
+            mentions (list[str]): имена упомянутых пользователей без повторов.
+                Имя пользователя не уникально, имена нескольких пользователей
+                пропускаются
+            attachment_ids (Sequence[int]): id загруженных вложений твита
+        """
+        bucket = hour_bucket()
+        # Строки счётчиков блокируются в одном порядке во всех транзакциях,
+        # иначе твиты "#a #b" и "#b #a" взаимно блокируют друг друга
+        hashtags = sorted(set(hashtags))
+        async with await self.get_session() as session:
+            async with session.begin():
+                session.add(tweet)
+                await session.flush()
+                await session.execute(
+                    statements.USER_STATS_UPDATE,
+                    _user_stats_changes((tweet.user_id, "tweets", 1)),
+                )
+                if attachment_ids:
+                    await session.execute(
+                        update(Attachments)
+                        .where(Attachments.id.in_(attachment_ids))
+                        .values(tweet_id=tweet.id)
+                    )
+                if hashtags:
+                    await session.execute(
+                        insert(TweetHashtags).values(
+                            [
+                                {"tag": tag, "tweet_id": tweet.id, "bucket": bucket}
+                                for tag in hashtags
+                            ]
+                        )
+                    )
+                    stmt = insert(HashtagCounts).values(
+                        [{"tag": tag, "bucket": bucket, "count": 1} for tag in hashtags]
+                    )
+                    await session.execute(
+                        stmt.on_conflict_do_update(
+                            index_elements=[HashtagCounts.tag, HashtagCounts.bucket],
+                            set_={"count": HashtagCounts.count + 1},
+                        )
+                    )
+                if mentions:
+                    # Иначе @name упомянет всех пользователей с этим именем
+                    unique_names = (
+                        select(Users.name)
+                        .where(Users.name.in_(mentions))
+                        .group_by(Users.name)
+                        .having(func.count() == 1)
+                    )
+                    await session.execute(
+                        insert(TweetMentions).from_select(
+                            ["user_id", "tweet_id"],
+                            select(Users.id, literal(tweet.id))
+                            .where(Users.name.in_(unique_names))
+                            .order_by(Users.id),
+                        )
+                    )
+
+    async def delete_tweets(
+        self, tweet_ids: Sequence[int], jobs: Sequence[Jobs] = ()
+    ) -> int:
+        """Удаляет твиты, уменьшает счётчики их хэштегов, счётчики твитов
+        и полученных лайков авторов. Лайки, вложения, хэштеги и упоминания
+        удаляет база данных каскадом
+
+        Args:
+            tweet_ids (Sequence[int]): список id твитов
+            jobs (Sequence[Jobs]): строки durable задач, записываемые
+                в той же транзакции
+
+        Returns:
+            int: количество удалённых твитов
+        """
+        async with await self.get_session() as session:
+            async with session.begin():
+                # Блокировка твитов: новый лайк дождётся удаления и не будет
+                # удалён каскадом без уменьшения счётчика
+                await session.execute(
+                    select(Tweets.id).where(Tweets.id.in_(tweet_ids)).with_for_update()
+                )
+                await session.execute(_decrement_user_stats(tweet_ids))
+                await session.execute(_decrement_hashtag_counts(tweet_ids))
+                result = await session.execute(
+                    delete(Tweets).where(Tweets.id.in_(tweet_ids))
+                )
+                session.add_all(jobs)
+        return result.rowcount
+
+    async def _execute_with_stats(
+        self, stmt: Executable, params: dict, *changes: tuple[int, str, int]
+    ) -> int:
+        """Выполняет запрос и, если он изменил строки, меняет счётчики
+        пользователей в той же транзакции
+
+        Args:
+            stmt (Executable): запрос вставки или удаления
+            params (dict): значения параметров bindparam запроса
+            changes (tuple[int, str, int]): изменения (user_id, счётчик, разница)
+
+        Returns:
+            int: количество затронутых строк
+        """
+        async with await self.get_session() as session:
+            async with session.begin():
+                result = await session.execute(stmt, params)
+                if result.rowcount:
+                    await session.execute(
+                        statements.USER_STATS_UPDATE, _user_stats_changes(*changes)
+                    )
+        return result.rowcount
+
+    async def add_like(
+        self, tweet_id: int, author_id: int, user_id: int, name: str
+    ) -> None:
+        """Добавляет лайк и увеличивает счётчик полученных лайков автора
+
+        Args:
+            tweet_id (int): id твита
+            author_id (int): id автора твита
+            user_id (int): id пользователя, поставившего лайк
+            name (str): имя пользователя
+        """
+        await self._execute_with_stats(
+            statements.LIKE_INSERT,
+            {"user_id": user_id, "tweet_id": tweet_id, "name": name},
+            (author_id, "likes_received", 1),
+        )
+
+    async def delete_like(self, tweet_id: int, author_id: int, user_id: int) -> int:
+        """Удаляет лайк и уменьшает счётчик полученных лайков автора
+
+        Args:
+            tweet_id (int): id твита
+            author_id (int): id автора твита
+            user_id (int): id пользователя, поставившего лайк
+
+        Returns:
+            int: количество удалённых лайков
+        """
+        return await self._execute_with_stats(
+            statements.LIKE_DELETE,
+            {"user_id": user_id, "tweet_id": tweet_id},
+            (author_id, "likes_received", -1),
+        )
+
+    async def add_follow(self, user_id: int, follower_id: int) -> None:
+        """Подписывает follower_id на user_id и увеличивает счётчики
+        подписчиков и подписок
+
+        Args:
+            user_id (int): id пользователя, на которого подписываются
+            follower_id (int): id подписчика
+        """
+        await self._execute_with_stats(
+            statements.FOLLOWERS_INSERT,
+            {"user_id": user_id, "follower_id": follower_id},
+            (user_id, "followers", 1),
+            (follower_id, "following", 1),
+        )
+
+    async def delete_follow(self, user_id: int, follower_id: int) -> int:
+        """Отменяет подписку follower_id на user_id и уменьшает счётчики
+        подписчиков и подписок
+
+        Args:
+            user_id (int): id пользователя, на которого подписаны
+            follower_id (int): id подписчика
+
+        Returns:
+            int: количество удалённых подписок
+        """
+        return await self._execute_with_stats(
+            statements.FOLLOWERS_DELETE,
+            {"user_id": user_id, "follower_id": follower_id},
+            (user_id, "followers", -1),
+            (follower_id, "following", -1),
+        )
+
+    async def select_user_stats(self, user_id: int) -> dict | None:
+        """Возвращает счётчики пользователя одним запросом по первичному ключу
+
+        Args:
+            user_id (int): id пользователя
+
+        Returns:
+            dict | None: счётчики или None, если пользователь не найден
+        """
+        async with await self.get_session() as session:
+            async with session.begin():
+                result = await session.execute(
+                    statements.USER_STATS_BY_USER_ID, {"user_id": user_id}
+                )
+                row = result.one_or_none()
+        if row is None:
+            return None
+        return {column: getattr(row, column) for column in USER_STATS_COLUMNS}
+
+    async def reconcile_user_stats(self, batch_size: int = 1000) -> int:
+        """Пересчитывает счётчики пользователей по таблицам и исправляет
+        расхождения. Пользователи обрабатываются пачками по диапазону id,
+        каждая пачка в отдельной транзакции. Строки счётчиков пачки
+        блокируются до подсчёта, чтобы параллельные изменения дождались
+        пересчёта. Если пересчёт уже выполняет другой процесс, ничего
+        не делает
+
+        Args:
+            batch_size (int): количество id пользователей в пачке
+
+        Returns:
+            int: количество исправленных строк счётчиков
+        """
+        fixed = 0
+        async with self.engine.connect() as connection:
+            locked = await connection.scalar(
+                text("SELECT pg_try_advisory_lock(:lock_id)"),
+                {"lock_id": RECONCILE_LOCK_ID},
+            )
+            await connection.commit()
+            if not locked:
+                logger.info("User stats reconcile is running in another process")
+                return 0
+            try:
+                last_id = await connection.scalar(select(func.max(Users.id)))
+                await connection.commit()
+                for first_id in range(0, (last_id or 0) + 1, batch_size):
+                    last_batch_id = first_id + batch_size
+                    await connection.execute(
+                        select(UserStats.user_id)
+                        .where(
+                            UserStats.user_id >= first_id,
+                            UserStats.user_id < last_batch_id,
+                        )
+                        .order_by(UserStats.user_id)
+                        .with_for_update()
+                    )
+                    result = await connection.execute(
+                        _reconcile_user_stats(first_id, last_batch_id)
+                    )
+                    await connection.commit()
+                    fixed += result.rowcount
+                    # Отдаём управление циклу событий между пачками
+                    await asyncio.sleep(0)
+            finally:
+                await connection.rollback()
+                await connection.execute(
+                    text("SELECT pg_advisory_unlock(:lock_id)"),
+                    {"lock_id": RECONCILE_LOCK_ID},
+                )
+                await connection.commit()
+        if fixed:
+            logger.warning("User stats reconciled, %d rows fixed", fixed)
+        return fixed
+
+    async def _select_ids_page(
+        self, stmt: Select, column, limit: int, before_id: int | None
+    ) -> list[int]:
+        """Keyset пагинация по column от больших id к меньшим"""
+        stmt = stmt.order_by(column.desc()).limit(limit)
+        if before_id is not None:
+            stmt = stmt.where(column < before_id)
+        return list(await self.select_scalars_all(stmt))
+
+    async def select_user_tweet_ids(
+        self, user_id: int, limit: int, before_id: int | None = None
+    ) -> list[int]:
+        """Возвращает id твитов пользователя от новых к старым (keyset пагинация).
+        Запрос выполняется по индексу (user_id, id DESC) и не зависит
+        от общего количества твитов пользователя
+
+        Args:
+            user_id (int): id пользователя
+            limit (int): максимальное количество id
+            before_id (int | None): вернуть твиты с id меньше before_id
+
+        Returns:
+            list[int]: список id твитов
+        """
+        stmt = select(Tweets.id).where(Tweets.user_id == user_id)
+        return await self._select_ids_page(stmt, Tweets.id, limit, before_id)
+
+    async def select_hashtag_tweet_ids(
+        self, tag: str, limit: int, before_id: int | None = None
+    ) -> list[int]:
+        """Возвращает id твитов с хэштегом от новых к старым (keyset пагинация)
+        по первичному ключу (tag, tweet_id) таблицы tweet_hashtags
+
+        Args:
+            tag (str): хэштег без # в нижнем регистре
+            limit (int): максимальное количество id
+            before_id (int | None): вернуть твиты с id меньше before_id
+
+        Returns:
+            list[int]: список id твитов
+        """
+        stmt = select(TweetHashtags.tweet_id).where(TweetHashtags.tag == tag)
+        return await self._select_ids_page(
+            stmt, TweetHashtags.tweet_id, limit, before_id
+        )
+
+    async def select_mention_tweet_ids(
+        self, user_id: int, limit: int, before_id: int | None = None
+    ) -> list[int]:
+        """Возвращает id твитов с упоминанием пользователя от новых к старым
+        (keyset пагинация) по первичному ключу (user_id, tweet_id)
+        таблицы tweet_mentions
+
+        Args:
+            user_id (int): id упомянутого пользователя
+            limit (int): максимальное количество id
+            before_id (int | None): вернуть твиты с id меньше before_id
+
+        Returns:
+            list[int]: список id твитов
+        """
+        stmt = select(TweetMentions.tweet_id).where(TweetMentions.user_id == user_id)
+        return await self._select_ids_page(
+            stmt, TweetMentions.tweet_id, limit, before_id
+        )
+
+    async def select_trending_hashtags(
+        self, since: datetime, limit: int
+    ) -> list[tuple[str, int]]:
+        """Возвращает самые частые хэштеги по почасовым счётчикам
+
+        Args:
+            since (datetime): начало окна, учитываются часы не раньше since
+            limit (int): максимальное количество хэштегов
+
+        Returns:
+            list[tuple[str, int]]: хэштег и количество твитов за окно
+        """
+        total = func.sum(HashtagCounts.count).label("count")
+        stmt = (
+            select(HashtagCounts.tag, total)
+            .where(HashtagCounts.bucket >= since)
+            .group_by(HashtagCounts.tag)
+            .having(total > 0)
+            .order_by(total.desc(), HashtagCounts.tag)
+            .limit(limit)
+        )
+        async with await self.get_session() as session:
+            async with session.begin():
+                result = await session.execute(stmt)
+                return [(tag, count) for tag, count in result]
+
+    async def delete_hashtag_counts(self, before: datetime) -> int:
+        """Удаляет почасовые счётчики хэштегов старше before
+
+        Args:
+            before (datetime): граница удаления
+
+        Returns:
+            int: количество удалённых строк
+        """
+        return await self.execute(
+            delete(HashtagCounts).where(HashtagCounts.bucket < before)
+        )
+
+    async def select_tweets_by_ids(self, tweet_ids: Sequence[int]) -> list[dict]:
+        """Загружает твиты по списку id с автором, вложениями и лайками.
+        Выполняет по одному запросу = ANY(:ids) на таблицу в одной транзакции
+
+        Args:
+            tweet_ids (Sequence[int]): список id твитов
+
+        Returns:
+            list[dict]: твиты в порядке tweet_ids, ненайденные id пропускаются
+        """
+        if not tweet_ids:
+            return []
+        params = {"ids": list(tweet_ids)}
+        async with await self.get_session() as session:
+            async with session.begin():
+                tweets_rows = await session.execute(statements.TWEETS_BY_IDS, params)
+                attachments_rows = await session.execute(
+                    statements.ATTACHMENTS_BY_TWEET_IDS, params
+                )
+                likes_rows = await session.execute(
+                    statements.LIKES_BY_TWEET_IDS, params
+                )
+        tweets = {
+            tweet_id: {
+                "id": tweet_id,
+                "content": content,
+                "author": {"id": author_id, "name": author_name},
+                "attachments": [],
+                "likes": [],
+            }
+            for tweet_id, content, author_id, author_name in tweets_rows
+        }
+        for tweet_id, link in attachments_rows:
+            tweets[tweet_id]["attachments"].append(link)
+        for tweet_id, user_id, name in likes_rows:
+            tweets[tweet_id]["likes"].append({"user_id": user_id, "name": name})
+        return [tweets[tweet_id] for tweet_id in tweet_ids if tweet_id in tweets]
+
+    async def stream_user_export(
+        self, user_id: int, chunk_size: int = 1000
+    ) -> AsyncIterator[dict]:
+        """Выгружает данные пользователя по одной записи: профиль, твиты
+        со ссылками на вложения, лайки, подписки и подписчиков.
+        Строки читаются серверным курсором пачками по chunk_size,
+        поэтому память не зависит от размера истории.
+        Все запросы выполняются в одной транзакции (согласованный снимок)
+
+        Args:
+            user_id (int): id пользователя
+            chunk_size (int): количество строк, получаемых из курсора за раз
+
+        Yields:
+            dict: запись с полем type: user, tweet, like, following, follower
+        """
+        options = {"yield_per": chunk_size}
+        async with await self.get_session() as session:
+            async with session.begin():
+                result = await session.execute(
+                    select(Users.id, Users.name).where(Users.id == user_id)
+                )
+                user = result.one_or_none()
+                if user is None:
+                    return
+                yield {"type": "user", "id": user.id, "name": user.name}
+
+                # Вложения присоединяются к твиту, строки одного твита идут подряд
+                tweet = None
+                rows = await session.stream(
+                    select(Tweets.id, Tweets.content, Attachments.link)
+                    .outerjoin(Attachments, Attachments.tweet_id == Tweets.id)
+                    .where(Tweets.user_id == user_id)
+                    .order_by(Tweets.id, Attachments.id)
+                    .execution_options(**options)
+                )
+                async for tweet_id, content, link in rows:
+                    if tweet is None or tweet["id"] != tweet_id:
+                        if tweet is not None:
+                            yield tweet
+                        tweet = {
+                            "type": "tweet",
+                            "id": tweet_id,
+                            "content": content,
+                            "attachments": [],
+                        }
+                    if link is not None:
+                        tweet["attachments"].append(link)
+                if tweet is not None:
+                    yield tweet
+
+                rows = await session.stream(
+                    select(Likes.tweet_id)
+                    .where(Likes.user_id == user_id)
+                    .order_by(Likes.tweet_id)
+                    .execution_options(**options)
+                )
+                async for (tweet_id,) in rows:
+                    yield {"type": "like", "tweet_id": tweet_id}
+
+                rows = await session.stream(
+                    select(Users.id, Users.name)
+                    .join(Followers, Followers.user_id == Users.id)
+                    .where(Followers.follower_id == user_id)
+                    .order_by(Users.id)
+                    .execution_options(**options)
+                )
+                async for following_id, name in rows:
+                    yield {"type": "following", "user_id": following_id, "name": name}
+
+                rows = await session.stream(
+                    select(Users.id, Users.name)
+                    .join(Followers, Followers.follower_id == Users.id)
+                    .where(Followers.user_id == user_id)
+                    .order_by(Users.id)
+                    .execution_options(**options)
+                )
+                async for follower_id, name in rows:
+                    yield {"type": "follower", "user_id": follower_id, "name": name}
+
+    async def select_users_by_ids(self, user_ids: Sequence[int]) -> list[dict]:
+        """Загружает пользователей по списку id со счётчиками, подписчиками
+        и подписками. Выполняет по одному запросу = ANY(:ids) на пользователей
+        со счётчиками, подписчиков и подписки в одной транзакции
+
+        Args:
+            user_ids (Sequence[int]): список id пользователей
+
+        Returns:
+            list[dict]: пользователи в порядке user_ids, ненайденные id пропускаются
+        """
+        if not user_ids:
+            return []
+        params = {"ids": list(user_ids)}
+        async with await self.get_session() as session:
+            async with session.begin():
+                users_rows = await session.execute(statements.USERS_BY_IDS, params)
+                followers_rows = await session.execute(
+                    statements.FOLLOWERS_BY_USER_IDS, params
+                )
+                following_rows = await session.execute(
+                    statements.FOLLOWING_BY_USER_IDS, params
+                )
+        users = {
+            user_id: {
+                "id": user_id,
+                "name": name,
+                "stats": dict(zip(USER_STATS_COLUMNS, stats)),
+                "followers": [],
+                "following": [],
+            }
+            for user_id, name, *stats in users_rows
+        }
+        for user_id, follower_id, name in followers_rows:
+            users[user_id]["followers"].append({"id": follower_id, "name": name})
+        for user_id, following_id, name in following_rows:
+            users[user_id]["following"].append({"id": following_id, "name": name})
+        return [users[user_id] for user_id in user_ids if user_id in users]
+
+    async def _delete_batches(
+        self,
+        stmt: Delete,
+        batch_size: int,
+        on_deleted: Callable[[list], Executable] | None = None,
+    ) -> int:
+        """Повторяет запрос удаления пачки строк, пока удаляется полная пачка.
+        Каждая пачка удаляется в отдельной транзакции
+
+        Args:
+            stmt (Delete): запрос удаления не более batch_size строк,
+                с on_deleted - возвращающий (RETURNING) один столбец
+            batch_size (int): размер пачки
+            on_deleted (Callable[[list], Executable] | None): запрос по значениям
+                удалённых строк, выполняется в транзакции пачки
+
+        Returns:
+            int: количество удалённых строк
+        """
+        total = 0
+        while True:
+            async with await self.get_session() as session:
+                async with session.begin():
+                    result = await session.execute(stmt)
+                    if on_deleted is None:
+                        rowcount = result.rowcount
+                    else:
+                        values = result.scalars().all()
+                        rowcount = len(values)
+                        if values:
+                            await session.execute(on_deleted(values))
+            total += rowcount
+            if rowcount < batch_size:
+                return total
+            # Отдаём управление циклу событий между пачками
+            await asyncio.sleep(0)
+
+    async def purge_user(
+        self, user_id: int, batch_size: int = 1000
+    ) -> tuple[list[str], list[int]]:
+        """Удаляет пользователя с большой историей пачками по batch_size строк,
+        чтобы не держать одну долгую транзакцию и блокировки.
+        Лайки и вложения твитов удаляются каскадом в базе данных.
+        Счётчики полученных лайков, подписчиков и подписок других
+        пользователей уменьшаются в транзакции каждой пачки.
+
+        Args:
+            user_id (int): id пользователя
+            batch_size (int): размер пачки
+
+        Returns:
+            tuple[list[str], list[int]]: имена файлов вложений удалённых твитов
+                и id изменённых твитов: удалённых и твитов с удалёнными лайками
+        """
+        file_names: list[str] = []
+        affected_ids: list[int] = []
+        tweet_ids_stmt = (
+            select(Tweets.id).where(Tweets.user_id == user_id).limit(batch_size)
+        )
+        while True:
+            async with await self.get_session() as session:
+                async with session.begin():
+                    result = await session.execute(tweet_ids_stmt)
+                    tweet_ids = result.scalars().all()
+                    if not tweet_ids:
+                        break
+                    affected_ids.extend(tweet_ids)
+                    result = await session.execute(
+                        select(Attachments.file_name).where(
+                            Attachments.tweet_id.in_(tweet_ids)
+                        )
+                    )
+                    file_names.extend(name for name in result.scalars() if name)
+                    await session.execute(_decrement_hashtag_counts(tweet_ids))
+                    await session.execute(
+                        delete(Tweets).where(Tweets.id.in_(tweet_ids))
+                    )
+            await asyncio.sleep(0)
+
+        def on_likes_deleted(tweet_ids: list[int]) -> Update:
+            affected_ids.extend(tweet_ids)
+            return _decrement_likes_received(tweet_ids)
+
+        await self._delete_batches(
+            delete(Likes)
+            .where(
+                Likes.user_id == user_id,
+                Likes.tweet_id.in_(
+                    select(Likes.tweet_id)
+                    .where(Likes.user_id == user_id)
+                    .limit(batch_size)
+                ),
+            )
+            .returning(Likes.tweet_id),
+            batch_size,
+            on_deleted=on_likes_deleted,
+        )
+        await self._delete_batches(
+            delete(Followers)
+            .where(
+                Followers.user_id == user_id,
+                Followers.follower_id.in_(
+                    select(Followers.follower_id)
+                    .where(Followers.user_id == user_id)
+                    .limit(batch_size)
+                ),
+            )
+            .returning(Followers.follower_id),
+            batch_size,
+            on_deleted=lambda user_ids: _decrement_user_stat("following", user_ids),
+        )
+        await self._delete_batches(
+            delete(Followers)
+            .where(
+                Followers.follower_id == user_id,
+                Followers.user_id.in_(
+                    select(Followers.user_id)
+                    .where(Followers.follower_id == user_id)
+                    .limit(batch_size)
+                ),
+            )
+            .returning(Followers.user_id),
+            batch_size,
+            on_deleted=lambda user_ids: _decrement_user_stat("followers", user_ids),
+        )
+        await self.execute(delete(Users).where(Users.id == user_id))
+        logger.info("Purge user %s", user_id)
+        return file_names, affected_ids
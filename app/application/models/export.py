@@ -0,0 +1,71 @@
+"""Потоковая выгрузка данных пользователя в формате NDJSON
+
+> python -m app.application.models.export <user_id> [--output export.ndjson]
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+from typing import AsyncIterator
+
+from ..settings import settings
+from .core import SQLManager
+
+# Размер части ответа, байты
+BUFFER_SIZE = 64 * 1024
+
+
+async def ndjson_chunks(
+    sql_manager: SQLManager,
+    user_id: int,
+    chunk_size: int = 1000,
+    buffer_size: int = BUFFER_SIZE,
+) -> AsyncIterator[bytes]:
+    """Возвращает выгрузку пользователя частями по buffer_size байт,
+    одна запись на строку. Первая строка (профиль) отдаётся сразу
+
+    Args:
+        sql_manager (SQLManager): менеджер SQL запросов
+        user_id (int): id пользователя
+        chunk_size (int): количество строк, получаемых из курсора за раз
+        buffer_size (int): размер части, байты
+
+    Yields:
+        bytes: часть выгрузки из целых строк
+    """
+    buffer: list[bytes] = []
+    size = 0
+    first = True
+    async for record in sql_manager.stream_user_export(user_id, chunk_size):
+        line = json.dumps(record, ensure_ascii=False).encode() + b"\n"
+        buffer.append(line)
+        size += len(line)
+        if first or size >= buffer_size:
+            yield b"".join(buffer)
+            buffer.clear()
+            size = 0
+            first = False
+    if buffer:
+        yield b"".join(buffer)
+
+
+async def main(user_id: int, output: str | None, chunk_size: int) -> None:
+    sql_manager = SQLManager(settings.DATABASE_URL)
+    stream = open(output, "wb") if output else sys.stdout.buffer
+    try:
+        async for chunk in ndjson_chunks(sql_manager, user_id, chunk_size):
+            stream.write(chunk)
+    finally:
+        if output:
+            stream.close()
+        await sql_manager.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export user data as NDJSON")
+    parser.add_argument("user_id", type=int)
+    parser.add_argument("--output", help="file path, stdout by default")
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    args = parser.parse_args()
+    asyncio.run(main(args.user_id, args.output, args.chunk_size))
@@ -0,0 +1,137 @@
+"""Версионные миграции схемы базы данных.
+
+Каждая миграция - модуль vNNNN_<name>.py в этом пакете с атрибутами
+DESCRIPTION и STATEMENTS (список SQL команд, по одной на элемент).
+Номер версии берётся из имени модуля. Применённая версия хранится
+в таблице schema_version.
+"""
+
+import importlib
+import pkgutil
+from types import ModuleType
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine
+
+from ....logger.logger import logger_database
+
+logger = logger_database
+
+# Произвольный ключ pg_advisory_xact_lock, чтобы несколько процессов
+# не применяли миграции одновременно
+MIGRATION_LOCK_ID = 728_501_337
+
+
+class SchemaVersionError(Exception):
+    """Версия схемы базы данных не совпадает с версией приложения"""
+
+
+def load_migrations() -> list[tuple[int, ModuleType]]:
+    """Возвращает список миграций, отсортированный по версии
+
+    Returns:
+        list[tuple[int, ModuleType]]: пары (версия, модуль миграции)
+    """
+    migrations = []
+    for module_info in pkgutil.iter_modules(__path__):
+        name = module_info.name
+        if not name.startswith("v") or "_" not in name:
+            continue
+        version = int(name[1:].split("_", 1)[0])
+        migrations.append(
+            (version, importlib.import_module("{}.{}".format(__name__, name)))
+        )
+    migrations.sort(key=lambda item: item[0])
+    return migrations
+
+
+MIGRATIONS = load_migrations()
+HEAD_VERSION = MIGRATIONS[-1][0] if MIGRATIONS else 0
+
+
+async def _create_version_table(connection: AsyncConnection) -> None:
+    await connection.execute(
+        text(
+            "CREATE TABLE IF NOT EXISTS schema_version ("
+            "version INTEGER NOT NULL, "
+            "description VARCHAR(200) NOT NULL, "
+            "applied_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now())"
+        )
+    )
+
+
+async def current_version(connection: AsyncConnection) -> int:
+    """Возвращает применённую версию схемы, 0 если миграций не было
+
+    Args:
+        connection (AsyncConnection): соединение с базой данных
+
+    Returns:
+        int: версия схемы
+    """
+    exists = await connection.scalar(text("SELECT to_regclass('schema_version')"))
+    if exists is None:
+        return 0
+    version = await connection.scalar(text("SELECT max(version) FROM schema_version"))
+    return version or 0
+
+
+async def upgrade(engine: AsyncEngine, target: int = HEAD_VERSION) -> int:
+    """Применяет недостающие миграции до версии target в одной транзакции
+
+    Args:
+        engine (AsyncEngine): движок базы данных
+        target (int): версия, до которой обновляется схема
+
+    Returns:
+        int: версия схемы после обновления
+    """
+    async with engine.begin() as connection:
+        await connection.execute(
+            text("SELECT pg_advisory_xact_lock(:lock_id)"),
+            {"lock_id": MIGRATION_LOCK_ID},
+        )
+        await _create_version_table(connection)
+        version = await current_version(connection)
+        for migration_version, module in MIGRATIONS:
+            if migration_version <= version or migration_version > target:
+                continue
+            logger.info(
+                "Apply migration %04d %s", migration_version, module.DESCRIPTION
+            )
+            for statement in module.STATEMENTS:
+                await connection.execute(text(statement))
+            await connection.execute(
+                text(
+                    "INSERT INTO schema_version (version, description) "
+                    "VALUES (:version, :description)"
+                ),
+                {"version": migration_version, "description": module.DESCRIPTION},
+            )
+            version = migration_version
+    return version
+
+
+async def check_version(engine: AsyncEngine) -> int:
+    """Проверяет, что схема базы данных обновлена до последней миграции.
+    Выполняет один лёгкий запрос, не меняет схему.
+
+    Args:
+        engine (AsyncEngine): движок базы данных
+
+    Raises:
+        SchemaVersionError: если версия схемы не совпадает с HEAD_VERSION
+
+    Returns:
+        int: версия схемы
+    """
+    async with engine.connect() as connection:
+        version = await current_version(connection)
+    if version != HEAD_VERSION:
+        raise SchemaVersionError(
+            "Database schema version {} != {}. Run "
+            "'python -m app.application.models.migrations upgrade'".format(
+                version, HEAD_VERSION
+            )
+        )
+    return version
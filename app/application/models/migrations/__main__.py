@@ -0,0 +1,34 @@
+"""Запуск миграций из командной строки
+
+> python -m app.application.models.migrations upgrade
+> python -m app.application.models.migrations current
+"""
+
+import argparse
+import asyncio
+
+from ...settings import settings
+from ..core import DatabaseManger
+from . import HEAD_VERSION, current_version, upgrade
+
+
+async def main(command: str, database_url: str) -> None:
+    manager = DatabaseManger(database_url)
+    try:
+        if command == "upgrade":
+            version = await upgrade(manager.engine)
+            print("Schema version {}".format(version))
+        else:
+            async with manager.engine.connect() as connection:
+                version = await current_version(connection)
+            print("Schema version {} (head {})".format(version, HEAD_VERSION))
+    finally:
+        await manager.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Database schema migrations")
+    parser.add_argument("command", choices=["upgrade", "current"])
+    parser.add_argument("--url", default=settings.DATABASE_URL, help="Database url")
+    args = parser.parse_args()
+    asyncio.run(main(args.command, args.url))
@@ -0,0 +1,64 @@
+"""Начальная схема базы данных.
+Таблицы создаются с IF NOT EXISTS, чтобы подхватить базы,
+созданные раньше через Base.metadata.create_all
+"""
+
+DESCRIPTION = "initial schema"
+
+STATEMENTS = [
+    """
+    CREATE TABLE IF NOT EXISTS users (
+        id SERIAL NOT NULL,
+        name VARCHAR(100) NOT NULL,
+        api_key VARCHAR(10) NOT NULL,
+        PRIMARY KEY (id),
+        UNIQUE (api_key)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS follower (
+        user_id INTEGER NOT NULL,
+        name VARCHAR(100) NOT NULL,
+        PRIMARY KEY (user_id),
+        FOREIGN KEY(user_id) REFERENCES users (id)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS tweets (
+        id SERIAL NOT NULL,
+        content TEXT NOT NULL,
+        user_id INTEGER NOT NULL,
+        PRIMARY KEY (id),
+        FOREIGN KEY(user_id) REFERENCES users (id)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS attachments (
+        id SERIAL NOT NULL,
+        tweet_id INTEGER,
+        file_name VARCHAR(100),
+        link VARCHAR(200),
+        PRIMARY KEY (id),
+        FOREIGN KEY(tweet_id) REFERENCES tweets (id)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS followers (
+        user_id INTEGER NOT NULL,
+        follower_id INTEGER NOT NULL,
+        PRIMARY KEY (user_id, follower_id),
+        FOREIGN KEY(user_id) REFERENCES users (id),
+        FOREIGN KEY(follower_id) REFERENCES follower (user_id)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS likes (
+        tweet_id INTEGER NOT NULL,
+        user_id INTEGER NOT NULL,
+        name VARCHAR(100) NOT NULL,
+        PRIMARY KEY (tweet_id, user_id),
+        FOREIGN KEY(tweet_id) REFERENCES tweets (id),
+        FOREIGN KEY(user_id) REFERENCES users (id)
+    )
+    """,
+]
@@ -0,0 +1,17 @@
+"""Индексы по внешним ключам под запросы api.py
+
+- tweets.user_id: selectinload(Users.tweets) в get_user, каскад удаления пользователя
+- likes.user_id: каскад Users.user_likes (tweet_id покрыт первичным ключом)
+- followers.follower_id: selectinload(Follower.followers) в get_me/get_user
+  (user_id покрыт первичным ключом)
+- attachments.tweet_id: selectinload(Tweets.attachments), обновление вложений
+"""
+
+DESCRIPTION = "foreign key indexes"
+
+STATEMENTS = [
+    "CREATE INDEX IF NOT EXISTS ix_tweets_user_id ON tweets (user_id)",
+    "CREATE INDEX IF NOT EXISTS ix_likes_user_id ON likes (user_id)",
+    "CREATE INDEX IF NOT EXISTS ix_followers_follower_id ON followers (follower_id)",
+    "CREATE INDEX IF NOT EXISTS ix_attachments_tweet_id ON attachments (tweet_id)",
+]
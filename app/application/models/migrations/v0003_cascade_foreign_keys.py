@@ -0,0 +1,27 @@
+"""Внешние ключи с ON DELETE CASCADE.
+Дочерние строки (лайки, вложения, подписки, твиты пользователя)
+удаляет база данных одной командой, ORM их не загружает (passive_deletes)
+"""
+
+DESCRIPTION = "on delete cascade foreign keys"
+
+# (таблица, колонка, ссылка)
+FOREIGN_KEYS = [
+    ("tweets", "user_id", "users (id)"),
+    ("attachments", "tweet_id", "tweets (id)"),
+    ("likes", "tweet_id", "tweets (id)"),
+    ("likes", "user_id", "users (id)"),
+    ("follower", "user_id", "users (id)"),
+    ("followers", "user_id", "users (id)"),
+    ("followers", "follower_id", "follower (user_id)"),
+]
+
+STATEMENTS = [
+    "ALTER TABLE {table} "
+    "DROP CONSTRAINT IF EXISTS {table}_{column}_fkey, "
+    "ADD CONSTRAINT {table}_{column}_fkey FOREIGN KEY ({column}) "
+    "REFERENCES {reference} ON DELETE CASCADE".format(
+        table=table, column=column, reference=reference
+    )
+    for table, column, reference in FOREIGN_KEYS
+]
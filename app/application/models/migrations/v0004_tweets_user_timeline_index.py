@@ -0,0 +1,10 @@
+"""Индекс (user_id, id DESC) для ленты пользователя с keyset пагинацией.
+Заменяет ix_tweets_user_id, который является его префиксом
+"""
+
+DESCRIPTION = "tweets user timeline index"
+
+STATEMENTS = [
+    "CREATE INDEX IF NOT EXISTS ix_tweets_user_id_id ON tweets (user_id, id DESC)",
+    "DROP INDEX IF EXISTS ix_tweets_user_id",
+]
@@ -0,0 +1,20 @@
+"""Таблица сохранённых ответов для заголовка Idempotency-Key"""
+
+DESCRIPTION = "idempotency keys"
+
+STATEMENTS = [
+    """
+    CREATE TABLE IF NOT EXISTS idempotency_keys (
+        user_id INTEGER NOT NULL,
+        key VARCHAR(100) NOT NULL,
+        path VARCHAR(200) NOT NULL,
+        response JSONB,
+        created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now(),
+        PRIMARY KEY (user_id, key),
+        CONSTRAINT idempotency_keys_user_id_fkey FOREIGN KEY(user_id)
+            REFERENCES users (id) ON DELETE CASCADE
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS ix_idempotency_keys_created_at "
+    "ON idempotency_keys (created_at)",
+]
@@ -0,0 +1,20 @@
+"""Таблица durable фоновых задач"""
+
+DESCRIPTION = "jobs"
+
+STATEMENTS = [
+    """
+    CREATE TABLE IF NOT EXISTS jobs (
+        id SERIAL NOT NULL,
+        name VARCHAR(100) NOT NULL,
+        args JSONB NOT NULL,
+        attempts INTEGER DEFAULT '0' NOT NULL,
+        status VARCHAR(20) NOT NULL,
+        claimed_at TIMESTAMP WITH TIME ZONE NOT NULL,
+        created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now(),
+        PRIMARY KEY (id)
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS ix_jobs_status_claimed_at "
+    "ON jobs (status, claimed_at)",
+]
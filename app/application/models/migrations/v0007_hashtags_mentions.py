@@ -0,0 +1,41 @@
+"""Хэштеги и упоминания твитов, почасовые счётчики хэштегов"""
+
+DESCRIPTION = "hashtags and mentions"
+
+STATEMENTS = [
+    """
+    CREATE TABLE IF NOT EXISTS tweet_hashtags (
+        tag VARCHAR(100) NOT NULL,
+        tweet_id INTEGER NOT NULL,
+        bucket TIMESTAMP WITH TIME ZONE NOT NULL,
+        PRIMARY KEY (tag, tweet_id),
+        CONSTRAINT tweet_hashtags_tweet_id_fkey FOREIGN KEY(tweet_id)
+            REFERENCES tweets (id) ON DELETE CASCADE
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS ix_tweet_hashtags_tweet_id "
+    "ON tweet_hashtags (tweet_id)",
+    """
+    CREATE TABLE IF NOT EXISTS tweet_mentions (
+        user_id INTEGER NOT NULL,
+        tweet_id INTEGER NOT NULL,
+        PRIMARY KEY (user_id, tweet_id),
+        CONSTRAINT tweet_mentions_user_id_fkey FOREIGN KEY(user_id)
+            REFERENCES users (id) ON DELETE CASCADE,
+        CONSTRAINT tweet_mentions_tweet_id_fkey FOREIGN KEY(tweet_id)
+            REFERENCES tweets (id) ON DELETE CASCADE
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS ix_tweet_mentions_tweet_id "
+    "ON tweet_mentions (tweet_id)",
+    """
+    CREATE TABLE IF NOT EXISTS hashtag_counts (
+        tag VARCHAR(100) NOT NULL,
+        bucket TIMESTAMP WITH TIME ZONE NOT NULL,
+        count INTEGER NOT NULL,
+        PRIMARY KEY (tag, bucket)
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS ix_hashtag_counts_bucket ON hashtag_counts (bucket)",
+    "CREATE INDEX IF NOT EXISTS ix_users_name ON users (name)",
+]
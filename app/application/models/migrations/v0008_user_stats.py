@@ -0,0 +1,29 @@
+"""Счётчики твитов, подписчиков, подписок и полученных лайков пользователей"""
+
+DESCRIPTION = "user stats"
+
+STATEMENTS = [
+    """
+    CREATE TABLE IF NOT EXISTS user_stats (
+        user_id INTEGER NOT NULL,
+        tweets INTEGER DEFAULT '0' NOT NULL,
+        followers INTEGER DEFAULT '0' NOT NULL,
+        following INTEGER DEFAULT '0' NOT NULL,
+        likes_received INTEGER DEFAULT '0' NOT NULL,
+        PRIMARY KEY (user_id),
+        CONSTRAINT user_stats_user_id_fkey FOREIGN KEY(user_id)
+            REFERENCES users (id) ON DELETE CASCADE
+    )
+    """,
+    """
+    INSERT INTO user_stats (user_id, tweets, followers, following, likes_received)
+    SELECT users.id,
+        (SELECT count(*) FROM tweets WHERE tweets.user_id = users.id),
+        (SELECT count(*) FROM followers WHERE followers.user_id = users.id),
+        (SELECT count(*) FROM followers WHERE followers.follower_id = users.id),
+        (SELECT count(*) FROM likes JOIN tweets ON tweets.id = likes.tweet_id
+            WHERE tweets.user_id = users.id)
+    FROM users
+    ON CONFLICT (user_id) DO NOTHING
+    """,
+]
@@ -0,0 +1,15 @@
+"""Время начала попытки и хэш тела запроса для ключей идемпотентности"""
+
+DESCRIPTION = "idempotency lease"
+
+STATEMENTS = [
+    """
+    ALTER TABLE idempotency_keys
+        ADD COLUMN IF NOT EXISTS request_hash VARCHAR(64)
+    """,
+    """
+    ALTER TABLE idempotency_keys
+        ADD COLUMN IF NOT EXISTS started_at TIMESTAMP WITH TIME ZONE
+            NOT NULL DEFAULT now()
+    """,
+]
@@ -1,6 +1,8 @@
+from datetime import datetime
 from typing import List
 
-from sqlalchemy import ARRAY, ForeignKey, Integer, String, Text
+from sqlalchemy import ARRAY, DateTime, ForeignKey, Index, Integer, String, Text, func
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.ext.asyncio import AsyncAttrs
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, relationship
 
@@ -14,20 +16,21 @@ class Users(Base):
     __tablename__: str = "users"
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
-    name: Mapped[str] = mapped_column(String(100), nullable=False)
+    # Индекс для поиска упомянутых пользователей по имени
+    name: Mapped[str] = mapped_column(String(100), nullable=False, index=True)
     api_key: Mapped[str] = mapped_column(String(10), unique=True, nullable=False)
 
     tweets: Mapped[List["Tweets"]] = relationship(
-        back_populates="author", cascade="all, delete"
+        back_populates="author", cascade="all, delete", passive_deletes=True
     )
     user_likes: Mapped[List["Likes"]] = relationship(
-        back_populates="users", cascade="all, delete"
+        back_populates="users", cascade="all, delete", passive_deletes=True
     )
     following: Mapped["Follower"] = relationship(
-        back_populates="user", cascade="all, delete"
+        back_populates="user", cascade="all, delete", passive_deletes=True
     )
     user_followers: Mapped[List["Followers"]] = relationship(
-        back_populates="user_follower", cascade="all, delete"
+        back_populates="user_follower", cascade="all, delete", passive_deletes=True
     )
 
 
@@ -37,23 +40,32 @@ class Tweets(Base):
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     content: Mapped[str] = mapped_column(Text)
-    user_id: Mapped[int] = mapped_column(ForeignKey(column="users.id"))
+    user_id: Mapped[int] = mapped_column(
+        ForeignKey(column="users.id", ondelete="CASCADE")
+    )
 
     author: Mapped["Users"] = relationship(back_populates="tweets")
     likes: Mapped[List["Likes"]] = relationship(
-        back_populates="tweet", cascade="all, delete"
+        back_populates="tweet", cascade="all, delete", passive_deletes=True
     )
     attachments: Mapped[List["Attachments"]] = relationship(
-        back_populates="tweet_media", cascade="all, delete"
+        back_populates="tweet_media", cascade="all, delete", passive_deletes=True
     )
 
 
+# Лента пользователя: WHERE user_id = ? ORDER BY id DESC,
+# индекс также покрывает поиск по user_id для каскадов
+Index("ix_tweets_user_id_id", Tweets.user_id, Tweets.id.desc())
+
+
 class Attachments(Base):
 
     __tablename__: str = "attachments"
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
-    tweet_id: Mapped[int] = mapped_column(ForeignKey("tweets.id"), nullable=True)
+    tweet_id: Mapped[int] = mapped_column(
+        ForeignKey("tweets.id", ondelete="CASCADE"), nullable=True, index=True
+    )
     file_name: Mapped[str] = mapped_column(String(100), nullable=True)
     link: Mapped[str] = mapped_column(String(200), nullable=True)
 
@@ -65,10 +77,10 @@ class Likes(Base):
     __tablename__: str = "likes"
 
     tweet_id: Mapped[int] = mapped_column(
-        ForeignKey(column="tweets.id"), primary_key=True
+        ForeignKey(column="tweets.id", ondelete="CASCADE"), primary_key=True
     )
     user_id: Mapped[int] = mapped_column(
-        ForeignKey(column="users.id"), primary_key=True
+        ForeignKey(column="users.id", ondelete="CASCADE"), primary_key=True, index=True
     )
     name: Mapped[str] = mapped_column(String(100))
 
@@ -80,11 +92,15 @@ class Follower(Base):
 
     __tablename__: str = "follower"
 
-    user_id: Mapped[int] = mapped_column(ForeignKey("users.id"), primary_key=True)
+    user_id: Mapped[int] = mapped_column(
+        ForeignKey("users.id", ondelete="CASCADE"), primary_key=True
+    )
     name: Mapped[str] = mapped_column(String(100))
 
     user: Mapped["Users"] = relationship(back_populates="following")
-    followers: Mapped[List["Followers"]] = relationship(back_populates="user_followers")
+    followers: Mapped[List["Followers"]] = relationship(
+        back_populates="user_followers", passive_deletes=True
+    )
 
 
 class Followers(Base):
@@ -92,11 +108,118 @@ class Followers(Base):
     __tablename__: str = "followers"
 
     user_id: Mapped[int] = mapped_column(
-        ForeignKey(column="users.id"), primary_key=True
+        ForeignKey(column="users.id", ondelete="CASCADE"), primary_key=True
     )
     follower_id: Mapped[int] = mapped_column(
-        ForeignKey(column="follower.user_id"), primary_key=True
+        ForeignKey(column="follower.user_id", ondelete="CASCADE"),
+        primary_key=True,
+        index=True,
     )
 
     user_follower: Mapped["Users"] = relationship(back_populates="user_followers")
     user_followers: Mapped["Follower"] = relationship(back_populates="followers")
+
+
+class TweetHashtags(Base):
+    """Хэштеги твитов. Первичный ключ (tag, tweet_id) - индекс
+    для ленты хэштега с keyset пагинацией
+    """
+
+    __tablename__: str = "tweet_hashtags"
+
+    tag: Mapped[str] = mapped_column(String(100), primary_key=True)
+    tweet_id: Mapped[int] = mapped_column(
+        ForeignKey(column="tweets.id", ondelete="CASCADE"), primary_key=True, index=True
+    )
+    # Час публикации твита, строка HashtagCounts с его учётом
+    bucket: Mapped[datetime] = mapped_column(DateTime(timezone=True))
+
+
+class TweetMentions(Base):
+    """Упоминания пользователей в твитах. Первичный ключ (user_id, tweet_id) -
+    индекс для ленты упоминаний с keyset пагинацией
+    """
+
+    __tablename__: str = "tweet_mentions"
+
+    user_id: Mapped[int] = mapped_column(
+        ForeignKey(column="users.id", ondelete="CASCADE"), primary_key=True
+    )
+    tweet_id: Mapped[int] = mapped_column(
+        ForeignKey(column="tweets.id", ondelete="CASCADE"), primary_key=True, index=True
+    )
+
+
+class HashtagCounts(Base):
+    """Количество твитов с хэштегом за час. Обновляется при добавлении
+    и удалении твита, популярные хэштеги за окно времени считаются
+    по этой таблице без чтения твитов
+    """
+
+    __tablename__: str = "hashtag_counts"
+
+    tag: Mapped[str] = mapped_column(String(100), primary_key=True)
+    bucket: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), primary_key=True, index=True
+    )
+    count: Mapped[int] = mapped_column(Integer)
+
+
+class IdempotencyKeys(Base):
+    """Сохранённые ответы запросов с заголовком Idempotency-Key.
+    response пустой, пока запрос выполняется. started_at - время начала
+    последней попытки, request_hash - sha256 тела запроса
+    """
+
+    __tablename__: str = "idempotency_keys"
+
+    user_id: Mapped[int] = mapped_column(
+        ForeignKey(column="users.id", ondelete="CASCADE"), primary_key=True
+    )
+    key: Mapped[str] = mapped_column(String(100), primary_key=True)
+    path: Mapped[str] = mapped_column(String(200))
+    request_hash: Mapped[str] = mapped_column(String(64), nullable=True)
+    response: Mapped[dict] = mapped_column(JSONB(none_as_null=True), nullable=True)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now(), index=True
+    )
+    started_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now()
+    )
+
+
+class Jobs(Base):
+    """Durable фоновые задачи до их выполнения"""
+
+    __tablename__: str = "jobs"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    name: Mapped[str] = mapped_column(String(100))
+    args: Mapped[dict] = mapped_column(JSONB)
+    attempts: Mapped[int] = mapped_column(Integer, server_default="0")
+    # running - выполняется процессом, захватившим задачу в claimed_at
+    # failed - все повторы завершились ошибкой
+    status: Mapped[str] = mapped_column(String(20))
+    claimed_at: Mapped[datetime] = mapped_column(DateTime(timezone=True))
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now()
+    )
+
+    __table_args__ = (Index("ix_jobs_status_claimed_at", "status", "claimed_at"),)
+
+
+class UserStats(Base):
+    """Счётчики пользователя для заголовка профиля без загрузки списков.
+    Обновляются в транзакции изменения, расхождения исправляет
+    фоновая задача reconcile_user_stats
+    """
+
+    __tablename__: str = "user_stats"
+
+    user_id: Mapped[int] = mapped_column(
+        ForeignKey(column="users.id", ondelete="CASCADE"), primary_key=True
+    )
+    tweets: Mapped[int] = mapped_column(Integer, server_default="0")
+    followers: Mapped[int] = mapped_column(Integer, server_default="0")
+    following: Mapped[int] = mapped_column(Integer, server_default="0")
+    likes_received: Mapped[int] = mapped_column(Integer, server_default="0")
@@ -0,0 +1,64 @@
+"""Удаление пользователя с большой историей пачками
+
+> python -m app.application.models.purge <user_id> [--batch-size 1000]
+"""
+
+import argparse
+import asyncio
+
+from ..invalidation import InvalidationBus, tweet_key
+from ..settings import settings
+from ..storage import Storage, create_storage
+from .core import SQLManager
+
+
+async def purge_user(
+    sql_manager: SQLManager,
+    storage: Storage,
+    user_id: int,
+    batch_size: int = 1000,
+    bus: InvalidationBus | None = None,
+) -> int:
+    """Удаляет пользователя, файлы вложений его твитов
+    и инвалидирует кэш удалённых твитов и твитов с его лайками
+
+    Args:
+        sql_manager (SQLManager): менеджер SQL запросов
+        storage (Storage): хранилище файлов вложений
+        user_id (int): id пользователя
+        batch_size (int): размер пачки
+        bus (InvalidationBus | None): шина инвалидации, по умолчанию новая
+            шина на движке sql_manager
+
+    Returns:
+        int: количество файлов вложений
+    """
+    file_names, tweet_ids = await sql_manager.purge_user(user_id, batch_size=batch_size)
+    loop = asyncio.get_running_loop()
+    await loop.run_in_executor(None, storage.delete, file_names)
+    if bus is None:
+        bus = InvalidationBus(
+            sql_manager.engine, enabled=settings.INVALIDATION_BUS_ENABLED
+        )
+    tweet_keys = [tweet_key(tweet_id) for tweet_id in dict.fromkeys(tweet_ids)]
+    await bus.publish(*tweet_keys)
+    return len(file_names)
+
+
+async def main(user_id: int, batch_size: int) -> None:
+    sql_manager = SQLManager(settings.DATABASE_URL)
+    storage = create_storage(settings)
+    try:
+        removed = await purge_user(sql_manager, storage, user_id, batch_size)
+        print("User {} purged, {} files removed".format(user_id, removed))
+    finally:
+        await sql_manager.close()
+        storage.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Purge user with all history")
+    parser.add_argument("user_id", type=int)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args()
+    asyncio.run(main(args.user_id, args.batch_size))
@@ -42,3 +42,40 @@ class AttachmentLoadOUT(Answer):
 
 class GetTweets(Answer):
     tweets: list[TweetsOut]
+
+
+class TweetsPage(GetTweets):
+    # id для параметра before_id следующей страницы, None если страниц больше нет
+    next_cursor: int | None = None
+
+
+class HashtagCountOut(BaseModel):
+    tag: str
+    count: int
+
+
+class TrendingHashtags(Answer):
+    hashtags: list[HashtagCountOut]
+
+
+class UserStatsOut(BaseModel):
+    tweets: int
+    followers: int
+    following: int
+    likes_received: int
+
+
+class GetUserStats(Answer):
+    stats: UserStatsOut
+
+
+class UserProfileOut(BaseModel):
+    id: int
+    name: str
+    stats: UserStatsOut
+    followers: list[UserTweetsOut]
+    following: list[UserTweetsOut]
+
+
+class GetUsers(Answer):
+    users: list[UserProfileOut]
@@ -0,0 +1,114 @@
+"""Запросы горячих эндпоинтов, построенные один раз при импорте.
+
+Значения передаются через bindparam при выполнении:
+> await SQL_MANAGER.select_scalars_one_or_none(TWEET_BY_ID, {"tweet_id": id})
+
+Готовый объект запроса не собирается заново на каждый HTTP запрос,
+а его ключ кэша компиляции SQLAlchemy вычисляется один раз,
+поэтому сразу находится скомпилированный SQL и подготовленный
+запрос asyncpg.
+"""
+
+from sqlalchemy import Integer, any_, bindparam, delete, func, insert, select
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm import selectinload
+
+from .models import Attachments, Follower, Followers, Likes, Tweets, Users, UserStats
+
+# Пользователь по api-key с подписчиками и подписками
+USER_BY_API_KEY = (
+    select(Users)
+    .where(Users.api_key == bindparam("api_key"))
+    .options(selectinload(Users.user_followers), selectinload(Users.following))
+)
+USER_BY_ID = select(Users).where(Users.id == bindparam("user_id"))
+TWEET_BY_ID = select(Tweets).where(Tweets.id == bindparam("tweet_id"))
+
+# Вставки по таблице, а не по модели: с параметрами при выполнении
+# ORM выполняет insert(Model) как пакетную вставку без rowcount
+# Параметры: user_id, tweet_id, name
+LIKE_INSERT = insert(Likes.__table__)
+LIKE_DELETE = delete(Likes).where(
+    Likes.user_id == bindparam("user_id"), Likes.tweet_id == bindparam("tweet_id")
+)
+
+FOLLOWER_BY_USER_ID = select(Follower).where(Follower.user_id == bindparam("user_id"))
+# Подписка follower_id на user_id
+FOLLOWERS_PAIR = select(Followers).where(
+    Followers.user_id == bindparam("user_id"),
+    Followers.follower_id == bindparam("follower_id"),
+)
+# Параметры: user_id, follower_id
+FOLLOWERS_INSERT = insert(Followers.__table__)
+
+FOLLOWERS_DELETE = delete(Followers).where(
+    Followers.user_id == bindparam("user_id"),
+    Followers.follower_id == bindparam("follower_id"),
+)
+
+USER_STATS_COLUMNS = ("tweets", "followers", "following", "likes_received")
+# Счётчики пользователя по id, нули у пользователя без строки счётчиков
+USER_STATS_BY_USER_ID = (
+    select(
+        Users.id,
+        *(
+            func.coalesce(getattr(UserStats, column), 0).label(column)
+            for column in USER_STATS_COLUMNS
+        ),
+    )
+    .outerjoin(UserStats, UserStats.user_id == Users.id)
+    .where(Users.id == bindparam("user_id"))
+)
+# Изменение счётчиков на разницу, строка создаётся при первом изменении
+# Параметры: user_id, tweets, followers, following, likes_received
+_user_stats_insert = postgresql.insert(UserStats.__table__)
+USER_STATS_UPDATE = _user_stats_insert.on_conflict_do_update(
+    index_elements=[UserStats.__table__.c.user_id],
+    set_={
+        column: UserStats.__table__.c[column] + _user_stats_insert.excluded[column]
+        for column in USER_STATS_COLUMNS
+    },
+)
+
+# Пакетная загрузка по списку id: один параметр-массив = ANY(:ids)
+# вместо IN с параметром на каждый id, поэтому списки любой длины
+# выполняются одним подготовленным запросом
+_ids = bindparam("ids", type_=postgresql.ARRAY(Integer))
+TWEETS_BY_IDS = (
+    select(Tweets.id, Tweets.content, Users.id, Users.name)
+    .join(Users, Users.id == Tweets.user_id)
+    .where(Tweets.id == any_(_ids))
+)
+ATTACHMENTS_BY_TWEET_IDS = (
+    select(Attachments.tweet_id, Attachments.link)
+    .where(Attachments.tweet_id == any_(_ids))
+    .order_by(Attachments.id)
+)
+LIKES_BY_TWEET_IDS = select(Likes.tweet_id, Likes.user_id, Likes.name).where(
+    Likes.tweet_id == any_(_ids)
+)
+USERS_BY_IDS = (
+    select(
+        Users.id,
+        Users.name,
+        *(
+            func.coalesce(getattr(UserStats, column), 0)
+            for column in USER_STATS_COLUMNS
+        ),
+    )
+    .outerjoin(UserStats, UserStats.user_id == Users.id)
+    .where(Users.id == any_(_ids))
+)
+# Подписчики и подписки пользователей: id пользователя, id и имя второго
+FOLLOWERS_BY_USER_IDS = (
+    select(Followers.user_id, Users.id, Users.name)
+    .join(Users, Users.id == Followers.follower_id)
+    .where(Followers.user_id == any_(_ids))
+    .order_by(Users.id)
+)
+FOLLOWING_BY_USER_IDS = (
+    select(Followers.follower_id, Users.id, Users.name)
+    .join(Users, Users.id == Followers.user_id)
+    .where(Followers.follower_id == any_(_ids))
+    .order_by(Users.id)
+)
@@ -0,0 +1,242 @@
+"""Профилирование запросов по требованию и наблюдение за циклом событий.
+
+ProfilingMiddleware выполняет выбранные запросы под cProfile и сохраняет
+статистику в файл .prof (pstats, открывается snakeviz, flameprof,
+gprof2dot). Запрос выбирается по заголовку X-Profile с токеном из
+настроек или случайно с долей sample_rate. Профилировщик собирает всё,
+что выполняет поток цикла событий во время запроса, включая
+параллельные запросы, поэтому одновременно профилируется один запрос.
+
+LoopMonitor измеряет задержку цикла событий и запоминает самые долгие
+блокирующие обратные вызовы вместе с запросом, в котором они выполнялись.
+"""
+
+import asyncio
+import contextvars
+import cProfile
+import heapq
+import os
+import random
+import re
+import time
+from datetime import datetime
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from ..logger.logger import logger_app
+from . import metrics
+
+logger = logger_app
+
+PROFILE_HEADER = "X-Profile"
+
+LOOP_LAG = metrics.registry.histogram(
+    "event_loop_lag_seconds", "Event loop scheduling delay"
+)
+SLOW_CALLBACKS = metrics.registry.counter(
+    "event_loop_slow_callbacks_total", "Event loop callbacks over the threshold"
+)
+
+# Запрос, в контексте которого выполняется обратный вызов цикла событий
+current_request: contextvars.ContextVar[str | None] = contextvars.ContextVar(
+    "current_request", default=None
+)
+
+
+class ProfilingMiddleware:
+    """ASGI middleware: профилирование выбранных запросов
+
+    Args:
+        app (ASGIApp): приложение
+        directory (str): каталог файлов .prof
+        token (str): значение заголовка X-Profile, пустое отключает заголовок
+        sample_rate (float): доля случайно профилируемых запросов от 0 до 1
+        paths (list[str]): префиксы путей для профилирования, пустой - все пути
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        directory: str,
+        token: str = "",
+        sample_rate: float = 0.0,
+        paths: list[str] | None = None,
+    ) -> None:
+        self.app = app
+        self.directory = directory
+        self.token = token
+        self.sample_rate = sample_rate
+        self.paths = tuple(paths or ())
+        self._active = False
+
+    def _selected(self, scope: Scope) -> bool:
+        if self._active:
+            return False
+        if self.paths and not scope["path"].startswith(self.paths):
+            return False
+        if self.token and Headers(scope=scope).get(PROFILE_HEADER) == self.token:
+            return True
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        token = current_request.set("{} {}".format(scope["method"], scope["path"]))
+        try:
+            if self._selected(scope):
+                await self._profile(scope, receive, send)
+            else:
+                await self.app(scope, receive, send)
+        finally:
+            current_request.reset(token)
+
+    async def _profile(self, scope: Scope, receive: Receive, send: Send) -> None:
+        file_name = "{}_{}_{}.prof".format(
+            datetime.now().strftime("%Y%m%d%H%M%S%f"),
+            scope["method"],
+            re.sub(r"[^\w]+", "_", scope["path"]).strip("_") or "root",
+        )
+
+        async def send_with_file(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                MutableHeaders(scope=message)[PROFILE_HEADER] = file_name
+            await send(message)
+
+        profile = cProfile.Profile()
+        self._active = True
+        start = time.perf_counter()
+        profile.enable()
+        try:
+            await self.app(scope, receive, send_with_file)
+        finally:
+            profile.disable()
+            self._active = False
+            duration = time.perf_counter() - start
+            path = os.path.join(self.directory, file_name)
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(None, self._dump, profile, path)
+            logger.info(
+                "Profile %s %s %.3fms saved to %s",
+                scope["method"],
+                scope["path"],
+                duration * 1000,
+                path,
+                extra={"http_path": scope["path"], "profile_file": path},
+            )
+
+    def _dump(self, profile: cProfile.Profile, path: str) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        profile.dump_stats(path)
+
+
+class LoopMonitor:
+    """Задержка цикла событий и самые долгие блокирующие обратные вызовы.
+    Время обратных вызовов измеряется подменой asyncio.Handle._run
+    на время работы монитора
+
+    Args:
+        interval (float): период измерения задержки, секунды
+        slow_callback (float): порог долгого обратного вызова, секунды
+        top (int): количество сохраняемых самых долгих вызовов
+    """
+
+    def __init__(
+        self, interval: float = 0.5, slow_callback: float = 0.05, top: int = 20
+    ) -> None:
+        self.interval = interval
+        self.slow_callback = slow_callback
+        self.top = top
+        self.max_lag = 0.0
+        self.slow_callbacks = 0
+        self._slowest: list[tuple[float, int, str, str | None]] = []
+        self._counter = 0
+        self._task: asyncio.Task | None = None
+        self._handle_run = None
+
+    def _record(self, duration: float, handle: asyncio.Handle) -> None:
+        self.slow_callbacks += 1
+        SLOW_CALLBACKS.inc()
+        self._counter += 1
+        item = (duration, self._counter, _describe(handle), _request(handle))
+        if len(self._slowest) < self.top:
+            heapq.heappush(self._slowest, item)
+        elif duration > self._slowest[0][0]:
+            heapq.heapreplace(self._slowest, item)
+
+    def _install(self) -> None:
+        handle_run = asyncio.Handle._run
+        monitor = self
+
+        def _run(handle: asyncio.Handle) -> None:
+            start = time.perf_counter()
+            handle_run(handle)
+            duration = time.perf_counter() - start
+            if duration >= monitor.slow_callback:
+                monitor._record(duration, handle)
+
+        self._handle_run = handle_run
+        asyncio.Handle._run = _run
+
+    def _uninstall(self) -> None:
+        if self._handle_run is not None:
+            asyncio.Handle._run = self._handle_run
+            self._handle_run = None
+
+    async def _measure_lag(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            start = loop.time()
+            await asyncio.sleep(self.interval)
+            lag = max(loop.time() - start - self.interval, 0.0)
+            LOOP_LAG.observe(lag)
+            self.max_lag = max(self.max_lag, lag)
+
+    async def start(self) -> None:
+        if self._task is not None:
+            return
+        self._install()
+        self._task = asyncio.create_task(self._measure_lag())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._uninstall()
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    def stats(self) -> dict:
+        return {
+            "max_lag_ms": round(self.max_lag * 1000, 3),
+            "slow_callbacks": self.slow_callbacks,
+            "slowest": [
+                {
+                    "duration_ms": round(duration * 1000, 3),
+                    "callback": callback,
+                    "request": request,
+                }
+                for duration, _, callback, request in sorted(
+                    self._slowest, reverse=True
+                )
+            ],
+        }
+
+
+def _describe(handle: asyncio.Handle) -> str:
+    """Имя корутины задачи или обратного вызова"""
+    callback = handle._callback
+    owner = getattr(callback, "__self__", None)
+    if isinstance(owner, asyncio.Task):
+        coro = owner.get_coro()
+        return getattr(coro, "__qualname__", repr(coro))
+    return getattr(callback, "__qualname__", repr(callback))
+
+
+def _request(handle: asyncio.Handle) -> str | None:
+    context = handle._context
+    return context.get(current_request) if context is not None else None
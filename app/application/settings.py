@@ -6,6 +6,15 @@ class Settings(BaseSettings):
     # App
     DEBUG_MOD: bool
 
+    # Logging
+    LOG_LEVEL: str = "INFO"
+    LOG_JSON: bool = True
+    # Levels of separate loggers {"logger name": "LEVEL"}
+    LOG_LEVELS: dict[str, str] = {"sqlalchemy": "WARNING", "asyncpg": "WARNING"}
+    # Share of records below WARNING kept for a logger {"logger name": 0.1}
+    LOG_SAMPLING: dict[str, float] = {}
+    LOG_QUEUE_SIZE: int = 10000
+
     # Directories
     DIRECTORY_MEDIA: str
     DIRECTORY_TEMPLATES: str
@@ -14,6 +23,91 @@ class Settings(BaseSettings):
     DATABASE_URL_TEST: str
     # Local url use for run not in docker container
     DATABASE_URL: str
+    DATABASE_ECHO: bool = False
+    # Apply migrations at startup instead of only checking schema version
+    DATABASE_AUTO_MIGRATE: bool = False
+    # Prepared statements cached on each asyncpg connection, 0 disables
+    DATABASE_PREPARED_STATEMENT_CACHE_SIZE: int = 500
+
+    # SQL statistics
+    SQL_STATS_ENABLED: bool = True
+    SQL_N_PLUS_ONE_THRESHOLD: int = 5
+
+    # Metrics
+    METRICS_ENABLED: bool = True
+    # Bearer token required by /metrics, empty - /metrics only in DEBUG_MOD
+    METRICS_TOKEN: str = ""
+    # Directory shared by worker processes to sum their metrics, empty - off
+    METRICS_DIRECTORY: str = ""
+    # Seconds between writes of process metrics to METRICS_DIRECTORY
+    METRICS_FLUSH_INTERVAL: float = 5.0
+
+    # Profiling
+    PROFILING_ENABLED: bool = False
+    # X-Profile header value that profiles a request, empty disables the header
+    PROFILING_TOKEN: str = ""
+    # Share of randomly profiled requests from 0 to 1
+    PROFILING_SAMPLE_RATE: float = 0.0
+    # Path prefixes to profile, empty - all paths
+    PROFILING_PATHS: list[str] = []
+    PROFILING_DIRECTORY: str = "profiles"
+    # Event loop callbacks longer than this are reported, seconds
+    PROFILING_SLOW_CALLBACK: float = 0.05
+
+    # Response compression
+    COMPRESSION_ENABLED: bool = True
+    # Encodings in order of preference and their levels, br and zstd
+    # are used only with installed brotli and zstandard packages
+    COMPRESSION_LEVELS: dict[str, int] = {"zstd": 3, "br": 4, "gzip": 6}
+    COMPRESSION_MIN_SIZE: int = 1024
+    # Responses from this size are compressed in a thread pool
+    COMPRESSION_THREAD_MIN_SIZE: int = 262144
+    COMPRESSION_EXCLUDE_PATHS: list[str] = ["/images"]
+
+    # Cross-worker cache invalidation (Postgres LISTEN/NOTIFY)
+    INVALIDATION_BUS_ENABLED: bool = True
+    # Max tweets in in-process LRU cache, 0 disables cache
+    TWEET_CACHE_SIZE: int = 10000
+    # Seconds a cached tweet lives if its invalidation was lost, 0 - no limit
+    TWEET_CACHE_TTL: int = 300
+
+    # Seconds a response is kept for the Idempotency-Key header
+    IDEMPOTENCY_TTL: int = 86400
+    # Seconds after which an unfinished request no longer holds its key
+    IDEMPOTENCY_LEASE: int = 60
+    # Seconds between expired keys cleanups, 0 - only at startup
+    IDEMPOTENCY_CLEANUP_INTERVAL: int = 3600
+
+    # Background jobs
+    JOBS_WORKERS: int = 4
+    JOBS_THREADS: int = 4
+    JOBS_PROCESSES: int = 0
+    JOBS_MAX_RETRIES: int = 3
+    # Seconds after which an unfinished durable job is taken by another process
+    JOBS_STALE_AFTER: int = 300
+
+    # Seconds between user counters reconciles, 0 - only at startup
+    USER_STATS_RECONCILE_INTERVAL: int = 86400
+
+    # Hashtags
+    # Maximum trending window, older hourly counts are deleted
+    TRENDING_MAX_HOURS: int = 168
+    # Seconds between old hourly counts cleanups, 0 - only at startup
+    TRENDING_CLEANUP_INTERVAL: int = 3600
+
+    # Media storage: local - DIRECTORY_MEDIA/images, s3 - S3 compatible bucket
+    STORAGE_BACKEND: str = "local"
+    # Levels of hash prefixed subdirectories (2 hex chars each), 0 - flat layout
+    STORAGE_SHARD_DEPTH: int = 2
+    STORAGE_S3_ENDPOINT: str = ""
+    STORAGE_S3_BUCKET: str = ""
+    STORAGE_S3_REGION: str = "us-east-1"
+    STORAGE_S3_ACCESS_KEY: str = ""
+    STORAGE_S3_SECRET_KEY: str = ""
+    # Public bucket url for /images redirects, empty - presigned urls
+    STORAGE_S3_PUBLIC_URL: str = ""
+    # Lifetime of presigned urls, seconds
+    STORAGE_S3_URL_EXPIRES: int = 3600
 
     model_config = SettingsConfigDict(
         env_file="settings_app.cfg", env_file_encoding="utf-8"
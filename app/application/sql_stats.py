@@ -0,0 +1,240 @@
+import re
+import time
+from contextvars import ContextVar, Token
+from threading import Lock
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from ..logger.logger import logger_database
+
+logger = logger_database
+
+_PLACEHOLDER = re.compile(r"\$\d+")
+# Развёрнутый список параметров IN ($n, $n, ...) любой длины
+_IN_LIST = re.compile(r"\bIN \((\$n(?:::[A-Z_]+)?)(?:, \1)*\)")
+# Одинаковые строки VALUES (...), (...) многострочной вставки
+_VALUES_RUN = re.compile(r"(\([^()]*\))(?:, \1)+")
+
+
+def statement_shape(statement: str) -> str:
+    """Форма запроса: номера параметров и развёрнутые списки IN и VALUES
+    сворачиваются, поэтому списки разной длины дают одну форму
+
+    Args:
+        statement (str): текст запроса
+
+    Returns:
+        str: форма запроса
+    """
+    shape = _PLACEHOLDER.sub("$n", statement)
+    shape = _IN_LIST.sub(r"IN (\1, ...)", shape)
+    return _VALUES_RUN.sub(r"\1, ...", shape)
+
+
+class RequestSQLStats:
+    """Статистика SQL запросов в рамках одного HTTP запроса"""
+
+    __slots__ = ("statements", "rows", "db_time", "shapes")
+
+    def __init__(self) -> None:
+        self.statements: int = 0
+        self.rows: int = 0
+        self.db_time: float = 0.0
+        self.shapes: dict[str, int] = {}
+
+    def record(self, statement: str, rows: int, duration: float) -> None:
+        self.statements += 1
+        self.rows += rows
+        self.db_time += duration
+        self.shapes[statement] = self.shapes.get(statement, 0) + 1
+
+    def repeated_shapes(self, threshold: int) -> dict[str, int]:
+        """Возвращает запросы, которые повторились threshold и более раз (N+1)
+
+        Args:
+            threshold (int): минимальное количество повторений
+
+        Returns:
+            dict[str, int]: текст запроса и количество повторений
+        """
+        return {
+            statement: count
+            for statement, count in self.shapes.items()
+            if count >= threshold
+        }
+
+    def server_timing(self) -> str:
+        """Значение заголовка Server-Timing"""
+        return 'db;dur={dur:.3f};desc="statements={statements} rows={rows}"'.format(
+            dur=self.db_time * 1000, statements=self.statements, rows=self.rows
+        )
+
+
+class StatementShapes:
+    """Накопительная статистика по формам запросов за всё время работы процесса.
+    Количество хранимых форм ограничено, при переполнении вытесняется
+    форма с наименьшим количеством вызовов.
+    """
+
+    def __init__(self, limit: int = 500) -> None:
+        self.limit = limit
+        self._lock = Lock()
+        # statement -> [count, total_time, max_time, rows]
+        self._shapes: dict[str, list] = {}
+
+    def record(self, statement: str, rows: int, duration: float) -> None:
+        with self._lock:
+            shape = self._shapes.get(statement)
+            if shape is None:
+                if len(self._shapes) >= self.limit:
+                    least_used = min(self._shapes, key=lambda key: self._shapes[key][0])
+                    del self._shapes[least_used]
+                shape = self._shapes[statement] = [0, 0.0, 0.0, 0]
+            shape[0] += 1
+            shape[1] += duration
+            if duration > shape[2]:
+                shape[2] = duration
+            shape[3] += rows
+
+    def slowest(self, count: int = 20) -> list[dict]:
+        """Возвращает самые медленные формы запросов по суммарному времени
+
+        Args:
+            count (int): количество форм в ответе
+
+        Returns:
+            list[dict]: список форм запросов со статистикой
+        """
+        with self._lock:
+            items = sorted(
+                self._shapes.items(), key=lambda item: item[1][1], reverse=True
+            )[:count]
+        return [
+            {
+                "statement": statement,
+                "calls": calls,
+                "total_ms": round(total * 1000, 3),
+                "mean_ms": round(total * 1000 / calls, 3),
+                "max_ms": round(maximum * 1000, 3),
+                "rows": rows,
+            }
+            for statement, (calls, total, maximum, rows) in items
+        ]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._shapes.clear()
+
+
+statement_shapes = StatementShapes()
+_request_stats: ContextVar[RequestSQLStats | None] = ContextVar(
+    "request_sql_stats", default=None
+)
+
+
+def activate(stats: RequestSQLStats) -> Token:
+    """Делает stats текущей статистикой запроса в контексте"""
+    return _request_stats.set(stats)
+
+
+def deactivate(token: Token) -> None:
+    _request_stats.reset(token)
+
+
+def current() -> RequestSQLStats | None:
+    return _request_stats.get()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    context._sql_stats_start = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    duration = time.perf_counter() - context._sql_stats_start
+    rows = cursor.rowcount
+    if rows < 0:
+        # asyncpg адаптер заранее вычитывает все строки SELECT в буфер _rows
+        rows = len(getattr(cursor, "_rows", ()) or ())
+    shape = statement_shape(statement)
+    statement_shapes.record(shape, rows, duration)
+    stats = _request_stats.get()
+    if stats is not None:
+        stats.record(shape, rows, duration)
+
+
+def instrument_engine(engine: AsyncEngine) -> None:
+    """Подключает подсчёт запросов, строк и времени к движку базы данных
+
+    Args:
+        engine (AsyncEngine): асинхронный движок SQLAlchemy
+    """
+    sync_engine = engine.sync_engine
+    if event.contains(sync_engine, "before_cursor_execute", _before_cursor_execute):
+        return
+    event.listen(sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(sync_engine, "after_cursor_execute", _after_cursor_execute)
+    logger.debug("SQL stats instrumentation enabled")
+
+
+class SQLStatsMiddleware:
+    """ASGI middleware: собирает статистику SQL для каждого HTTP запроса,
+    добавляет заголовок Server-Timing, пишет структурированный лог
+    и предупреждает о повторяющихся запросах (N+1)
+    """
+
+    def __init__(self, app: ASGIApp, n_plus_one_threshold: int = 5) -> None:
+        self.app = app
+        self.n_plus_one_threshold = n_plus_one_threshold
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        stats = RequestSQLStats()
+        token = activate(stats)
+
+        async def send_with_timing(message: Message) -> None:
+            if message["type"] == "http.response.start" and stats.statements:
+                headers = MutableHeaders(scope=message)
+                headers.append("Server-Timing", stats.server_timing())
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            deactivate(token)
+            self._log(scope, stats)
+
+    def _log(self, scope: Scope, stats: RequestSQLStats) -> None:
+        if not stats.statements:
+            return
+        path = scope["path"]
+        logger.info(
+            "SQL %s %s statements=%d rows=%d time=%.3fms",
+            scope["method"],
+            path,
+            stats.statements,
+            stats.rows,
+            stats.db_time * 1000,
+            extra={
+                "http_method": scope["method"],
+                "http_path": path,
+                "sql_statements": stats.statements,
+                "sql_rows": stats.rows,
+                "sql_time_ms": round(stats.db_time * 1000, 3),
+            },
+        )
+        for statement, count in stats.repeated_shapes(
+            self.n_plus_one_threshold
+        ).items():
+            logger.warning(
+                "Possible N+1: statement repeated %d times in %s %s: %s",
+                count,
+                scope["method"],
+                path,
+                statement,
+                extra={"http_path": path, "sql_repeats": count},
+            )
@@ -0,0 +1,467 @@
+"""Хранилище медиа файлов вложений.
+
+LocalStorage хранит файлы в каталоге с подкаталогами по префиксу хэша
+имени файла: images/3f/a2/12_photo.png. При shard_depth=0 файлы лежат
+в одном каталоге, как до появления хранилищ. S3Storage хранит файлы
+в бакете S3 совместимого хранилища (AWS S3, MinIO) с теми же ключами,
+запросы подписываются AWS Signature Version 4. Адрес вложения не
+зависит от хранилища: /images/<имя файла>.
+
+Перенос существующих файлов в хранилище из настроек:
+> python -m app.application.storage_migrate [--source-depth 0] [--keep-source]
+"""
+
+import asyncio
+import hashlib
+import hmac
+import mimetypes
+import os
+from datetime import datetime, timezone
+from typing import Iterator
+from urllib.parse import quote, urlsplit
+
+import httpx
+from fastapi.responses import FileResponse, RedirectResponse, Response
+
+from ..logger.logger import logger_app
+from .settings import Settings
+
+logger = logger_app
+
+TMP_SUFFIX = ".tmp"
+
+
+def write_file(path: str, data: bytes) -> None:
+    """Записывает файл атомарно: во временный файл и переименованием,
+    чтобы недописанный файл не был отдан клиенту
+    """
+    tmp_path = path + TMP_SUFFIX
+    with open(file=tmp_path, mode="wb") as file:
+        file.write(data)
+    os.replace(tmp_path, path)
+
+
+def remove_files(paths: list[str]) -> None:
+    """Удаляет файлы. Уже удалённые файлы пропускаются,
+    поэтому задачу можно безопасно повторять
+    """
+    for path in paths:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+def check_name(name: str) -> None:
+    """Проверяет, что имя файла не пустое и не содержит каталогов
+
+    Args:
+        name (str): имя файла
+
+    Raises:
+        ValueError: имя содержит каталоги или пустое
+    """
+    if not name or name in (".", "..") or "/" in name or "\\" in name:
+        raise ValueError("Invalid file name {!r}".format(name))
+
+
+def shard_key(name: str, depth: int) -> str:
+    """Ключ файла с подкаталогами по префиксу SHA-256 от имени
+
+    Args:
+        name (str): имя файла без каталогов
+        depth (int): количество уровней подкаталогов по 2 символа хэша
+
+    Raises:
+        ValueError: имя содержит каталоги или пустое
+
+    Returns:
+        str: ключ вида 3f/a2/name
+    """
+    check_name(name)
+    digest = hashlib.sha256(name.encode()).hexdigest()
+    return "/".join([digest[i * 2 : i * 2 + 2] for i in range(depth)] + [name])
+
+
+class Storage:
+    """Хранилище файлов вложений. Методы, кроме response, блокирующие
+    и вызываются в пуле потоков (JobQueue.run_blocking) или из CLI
+    """
+
+    def save(self, name: str, data: bytes) -> None:
+        raise NotImplementedError
+
+    def read(self, name: str) -> bytes:
+        raise NotImplementedError
+
+    def exists(self, name: str) -> bool:
+        raise NotImplementedError
+
+    def delete(self, names: list[str]) -> None:
+        """Удаляет файлы, отсутствующие файлы пропускаются"""
+        raise NotImplementedError
+
+    async def response(self, name: str) -> Response | None:
+        """Ответ на запрос файла /images/<name>
+
+        Returns:
+            Response | None: ответ или None, если файла нет
+        """
+        raise NotImplementedError
+
+    def close(self) -> None:
+        pass
+
+
+class LocalStorage(Storage):
+    """Файлы в локальном каталоге
+
+    Args:
+        root (str): каталог файлов
+        shard_depth (int): уровни подкаталогов по префиксу хэша, 0 - без них
+    """
+
+    def __init__(self, root: str, shard_depth: int = 2) -> None:
+        self.root = root
+        self.shard_depth = shard_depth
+
+    def path(self, name: str) -> str:
+        return os.path.join(self.root, shard_key(name, self.shard_depth))
+
+    def save(self, name: str, data: bytes) -> None:
+        path = self.path(name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        write_file(path, data)
+
+    def read(self, name: str) -> bytes:
+        with open(file=self.path(name), mode="rb") as file:
+            return file.read()
+
+    def exists(self, name: str) -> bool:
+        return os.path.isfile(self.path(name))
+
+    def delete(self, names: list[str]) -> None:
+        remove_files([self.path(name) for name in names])
+
+    def move(self, name: str, target: "LocalStorage") -> None:
+        """Переносит файл переименованием, без копирования данных"""
+        path = target.path(name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        os.replace(self.path(name), path)
+
+    def names(self) -> Iterator[str]:
+        """Имена всех файлов хранилища
+
+        Yields:
+            str: имя файла
+        """
+
+        def walk(directory: str, depth: int) -> Iterator[str]:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    if depth:
+                        if len(entry.name) == 2 and entry.is_dir():
+                            yield from walk(entry.path, depth - 1)
+                    elif entry.is_file() and not entry.name.endswith(TMP_SUFFIX):
+                        yield entry.name
+
+        if os.path.isdir(self.root):
+            yield from walk(self.root, self.shard_depth)
+
+    async def response(self, name: str) -> Response | None:
+        path = self.path(name)
+        loop = asyncio.get_running_loop()
+        if not await loop.run_in_executor(None, os.path.isfile, path):
+            return None
+        return FileResponse(path)
+
+
+def _hmac_sha256(key: bytes, message: str) -> bytes:
+    return hmac.new(key, message.encode(), hashlib.sha256).digest()
+
+
+def _canonical_query(query: dict[str, str]) -> str:
+    return "&".join(
+        "{}={}".format(quote(key, safe="-_.~"), quote(value, safe="-_.~"))
+        for key, value in sorted(query.items())
+    )
+
+
+def sign_v4(
+    method: str,
+    path: str,
+    query: dict[str, str],
+    headers: dict[str, str],
+    payload_hash: str,
+    access_key: str,
+    secret_key: str,
+    region: str,
+    amz_date: str,
+) -> tuple[str, str, str]:
+    """Подпись запроса AWS Signature Version 4 для сервиса s3
+
+    Args:
+        method (str): HTTP метод
+        path (str): путь запроса, уже закодированный
+        query (dict[str, str]): параметры запроса
+        headers (dict[str, str]): подписываемые заголовки
+        payload_hash (str): SHA-256 тела запроса или UNSIGNED-PAYLOAD
+        access_key (str): ключ доступа
+        secret_key (str): секретный ключ
+        region (str): регион
+        amz_date (str): время запроса в формате 20130524T000000Z
+
+    Returns:
+        tuple[str, str, str]: подпись, область учётных данных
+            и список подписанных заголовков
+    """
+    signed = sorted((name.lower(), value.strip()) for name, value in headers.items())
+    signed_headers = ";".join(name for name, _ in signed)
+    canonical_request = "\n".join(
+        [
+            method,
+            path,
+            _canonical_query(query),
+            "".join("{}:{}\n".format(name, value) for name, value in signed),
+            signed_headers,
+            payload_hash,
+        ]
+    )
+    scope = "{}/{}/s3/aws4_request".format(amz_date[:8], region)
+    string_to_sign = "\n".join(
+        [
+            "AWS4-HMAC-SHA256",
+            amz_date,
+            scope,
+            hashlib.sha256(canonical_request.encode()).hexdigest(),
+        ]
+    )
+    key = ("AWS4" + secret_key).encode()
+    for part in (amz_date[:8], region, "s3", "aws4_request"):
+        key = _hmac_sha256(key, part)
+    signature = hmac.new(key, string_to_sign.encode(), hashlib.sha256).hexdigest()
+    return signature, "{}/{}".format(access_key, scope), signed_headers
+
+
+class S3Storage(Storage):
+    """Файлы в бакете S3 совместимого хранилища, адресация по пути
+    (endpoint/bucket/key). Файлы отдаются перенаправлением на публичный
+    адрес бакета или на подписанную ссылку. Время подписи ссылки
+    округляется до половины срока её действия, поэтому в течение этого
+    времени ссылка на файл одна и та же и кэшируется браузером
+
+    Args:
+        endpoint (str): адрес хранилища, например http://minio:9000
+        bucket (str): бакет
+        access_key (str): ключ доступа
+        secret_key (str): секретный ключ
+        region (str): регион
+        shard_depth (int): уровни префикса хэша в ключе
+        public_url (str): публичный адрес бакета, пустой - подписанные ссылки
+        url_expires (int): срок действия подписанной ссылки, секунды
+        transport (httpx.BaseTransport | None): транспорт httpx для тестов
+    """
+
+    def __init__(
+        self,
+        endpoint: str,
+        bucket: str,
+        access_key: str,
+        secret_key: str,
+        region: str = "us-east-1",
+        shard_depth: int = 2,
+        public_url: str = "",
+        url_expires: int = 3600,
+        transport: httpx.BaseTransport | None = None,
+    ) -> None:
+        self.endpoint = endpoint.rstrip("/")
+        self.host = urlsplit(self.endpoint).netloc
+        self.bucket = bucket
+        self.access_key = access_key
+        self.secret_key = secret_key
+        self.region = region
+        self.shard_depth = shard_depth
+        self.public_url = public_url.rstrip("/")
+        self.url_expires = url_expires
+        self.client = httpx.Client(transport=transport, timeout=30)
+
+    def _path(self, name: str) -> str:
+        key = shard_key(name, self.shard_depth)
+        return quote("/{}/{}".format(self.bucket, key), safe="/-_.~")
+
+    def _request(
+        self,
+        method: str,
+        name: str,
+        data: bytes = b"",
+        headers: dict[str, str] | None = None,
+    ) -> httpx.Response:
+        path = self._path(name)
+        payload_hash = hashlib.sha256(data).hexdigest()
+        amz_date = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+        signed_headers = {
+            "host": self.host,
+            "x-amz-content-sha256": payload_hash,
+            "x-amz-date": amz_date,
+        }
+        signature, credential, signed = sign_v4(
+            method,
+            path,
+            {},
+            signed_headers,
+            payload_hash,
+            self.access_key,
+            self.secret_key,
+            self.region,
+            amz_date,
+        )
+        authorization = (
+            "AWS4-HMAC-SHA256 Credential={}, SignedHeaders={}, Signature={}".format(
+                credential, signed, signature
+            )
+        )
+        return self.client.request(
+            method,
+            self.endpoint + path,
+            content=data,
+            headers={
+                **signed_headers,
+                **(headers or {}),
+                "authorization": authorization,
+            },
+        )
+
+    def save(self, name: str, data: bytes) -> None:
+        content_type = mimetypes.guess_type(name)[0] or "application/octet-stream"
+        self._request(
+            "PUT", name, data, headers={"content-type": content_type}
+        ).raise_for_status()
+
+    def read(self, name: str) -> bytes:
+        response = self._request("GET", name)
+        if response.status_code == 404:
+            raise FileNotFoundError(name)
+        response.raise_for_status()
+        return response.content
+
+    def exists(self, name: str) -> bool:
+        response = self._request("HEAD", name)
+        if response.status_code == 404:
+            return False
+        response.raise_for_status()
+        return True
+
+    def delete(self, names: list[str]) -> None:
+        for name in names:
+            response = self._request("DELETE", name)
+            if response.status_code != 404:
+                response.raise_for_status()
+
+    def url(self, name: str, now: datetime | None = None) -> str:
+        """Публичный адрес или подписанная ссылка на файл
+
+        Args:
+            name (str): имя файла
+            now (datetime | None): текущее время
+
+        Returns:
+            str: адрес файла
+        """
+        path = self._path(name)
+        if self.public_url:
+            return self.public_url + path[len(self.bucket) + 1 :]
+        timestamp = int((now or datetime.now(timezone.utc)).timestamp())
+        timestamp -= timestamp % max(self.url_expires // 2, 1)
+        amz_date = datetime.fromtimestamp(timestamp, timezone.utc).strftime(
+            "%Y%m%dT%H%M%SZ"
+        )
+        query = {
+            "X-Amz-Algorithm": "AWS4-HMAC-SHA256",
+            "X-Amz-Credential": "{}/{}/{}/s3/aws4_request".format(
+                self.access_key, amz_date[:8], self.region
+            ),
+            "X-Amz-Date": amz_date,
+            "X-Amz-Expires": str(self.url_expires),
+            "X-Amz-SignedHeaders": "host",
+        }
+        signature, _, _ = sign_v4(
+            "GET",
+            path,
+            query,
+            {"host": self.host},
+            "UNSIGNED-PAYLOAD",
+            self.access_key,
+            self.secret_key,
+            self.region,
+            amz_date,
+        )
+        query["X-Amz-Signature"] = signature
+        return "{}{}?{}".format(self.endpoint, path, _canonical_query(query))
+
+    async def response(self, name: str) -> Response | None:
+        return RedirectResponse(self.url(name), status_code=307)
+
+    def close(self) -> None:
+        self.client.close()
+
+
+def create_storage(settings: Settings) -> Storage:
+    """Создаёт хранилище по настройкам STORAGE_*
+
+    Args:
+        settings (Settings): настройки приложения
+
+    Raises:
+        ValueError: неизвестное хранилище
+
+    Returns:
+        Storage: хранилище файлов вложений
+    """
+    if settings.STORAGE_BACKEND == "local":
+        return LocalStorage(
+            "{}/images".format(settings.DIRECTORY_MEDIA),
+            shard_depth=settings.STORAGE_SHARD_DEPTH,
+        )
+    if settings.STORAGE_BACKEND == "s3":
+        return S3Storage(
+            settings.STORAGE_S3_ENDPOINT,
+            settings.STORAGE_S3_BUCKET,
+            settings.STORAGE_S3_ACCESS_KEY,
+            settings.STORAGE_S3_SECRET_KEY,
+            region=settings.STORAGE_S3_REGION,
+            shard_depth=settings.STORAGE_SHARD_DEPTH,
+            public_url=settings.STORAGE_S3_PUBLIC_URL,
+            url_expires=settings.STORAGE_S3_URL_EXPIRES,
+        )
+    raise ValueError("Unknown storage backend {}".format(settings.STORAGE_BACKEND))
+
+
+def migrate(source: LocalStorage, target: Storage, keep_source: bool = False) -> int:
+    """Переносит файлы из локального каталога в хранилище. Уже перенесённые
+    файлы пропускаются, поэтому прерванный перенос можно запустить снова
+
+    Args:
+        source (LocalStorage): исходный каталог
+        target (Storage): хранилище
+        keep_source (bool): не удалять исходные файлы
+
+    Returns:
+        int: количество перенесённых файлов
+    """
+    moved = 0
+    for name in source.names():
+        try:
+            if isinstance(target, LocalStorage) and not keep_source:
+                source.move(name, target)
+            else:
+                if not target.exists(name):
+                    target.save(name, source.read(name))
+                if not keep_source:
+                    source.delete([name])
+        except FileNotFoundError:
+            # Файл уже перенесён или удалён во время обхода каталога
+            continue
+        moved += 1
+        if moved % 10000 == 0:
+            logger.info("Storage migration: %d files moved", moved)
+    return moved
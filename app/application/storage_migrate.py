@@ -0,0 +1,38 @@
+"""Перенос файлов вложений из каталога DIRECTORY_MEDIA/images
+в хранилище из настроек STORAGE_*
+
+> python -m app.application.storage_migrate [--source-depth 0] [--keep-source]
+"""
+
+import argparse
+
+from .settings import settings
+from .storage import LocalStorage, create_storage, migrate
+
+
+def main(source_depth: int, keep_source: bool) -> None:
+    storage = create_storage(settings)
+    source = LocalStorage(
+        "{}/images".format(settings.DIRECTORY_MEDIA), shard_depth=source_depth
+    )
+    if (
+        isinstance(storage, LocalStorage)
+        and storage.root == source.root
+        and storage.shard_depth == source.shard_depth
+    ):
+        print("Source and target storage are the same, nothing to migrate")
+        return
+    try:
+        print("{} files migrated".format(migrate(source, storage, keep_source)))
+    finally:
+        storage.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Move files from DIRECTORY_MEDIA/images to the storage"
+    )
+    parser.add_argument("--source-depth", type=int, default=0)
+    parser.add_argument("--keep-source", action="store_true")
+    args = parser.parse_args()
+    main(args.source_depth, args.keep_source)
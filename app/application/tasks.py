@@ -0,0 +1,43 @@
+"""Фоновые задачи приложения"""
+
+import os
+from datetime import datetime, timedelta, timezone
+
+from .idempotency import IdempotencyStore
+from .jobs import JobQueue
+from .models.core import SQLManager
+from .storage import Storage
+
+
+def register_tasks(
+    job_queue: JobQueue,
+    sql_manager: SQLManager,
+    idempotency_store: IdempotencyStore,
+    storage: Storage,
+) -> None:
+    """Регистрирует обработчики фоновых задач
+
+    Args:
+        job_queue (JobQueue): очередь фоновых задач
+        sql_manager (SQLManager): менеджер SQL запросов
+        idempotency_store (IdempotencyStore): хранилище ключей идемпотентности
+        storage (Storage): хранилище файлов вложений
+    """
+
+    @job_queue.task("remove_files", blocking=True)
+    def remove_media(names: list[str]) -> None:
+        # Задачи, сохранённые до появления хранилищ, содержат полные пути
+        storage.delete([os.path.basename(name) for name in names])
+
+    @job_queue.task("delete_expired_idempotency_keys", retries=0)
+    async def delete_expired_idempotency_keys() -> None:
+        await idempotency_store.delete_expired()
+
+    @job_queue.task("reconcile_user_stats", retries=0)
+    async def reconcile_user_stats() -> None:
+        await sql_manager.reconcile_user_stats()
+
+    @job_queue.task("delete_old_hashtag_counts", retries=0)
+    async def delete_old_hashtag_counts(hours: int) -> None:
+        before = datetime.now(timezone.utc) - timedelta(hours=hours)
+        await sql_manager.delete_hashtag_counts(before)
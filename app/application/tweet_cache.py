@@ -0,0 +1,213 @@
+"""LRU кэш загруженных твитов внутри процесса.
+
+Твит хранится компактной записью CachedTweet (__slots__ и кортежи)
+вместе с версией ключа tweet:<id> из InvalidationBus на момент чтения
+из базы. Запись с устаревшей версией считается промахом, поэтому
+изменения лайков и удаление твита в любом процессе сразу видны.
+Если уведомление об изменении потерялось, запись устаревает
+по времени жизни ttl.
+"""
+
+import sys
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, Sequence
+
+from . import metrics
+from .invalidation import ALL_KEYS, InvalidationBus, tweet_key
+
+TweetsLoader = Callable[[Sequence[int]], Awaitable[list[dict]]]
+
+LOOKUPS = metrics.registry.counter(
+    "tweet_cache_lookups_total", "Tweet cache lookups", ("result",)
+)
+
+
+class CachedTweet:
+    """Компактная запись твита в кэше"""
+
+    __slots__ = (
+        "id",
+        "author_id",
+        "author_name",
+        "content",
+        "attachments",
+        "likes",
+        "version",
+        "expires",
+        "size",
+    )
+
+    def __init__(
+        self, tweet: dict, version: tuple[int, int], expires: float = float("inf")
+    ) -> None:
+        self.id: int = tweet["id"]
+        self.author_id: int = tweet["author"]["id"]
+        self.author_name: str = tweet["author"]["name"]
+        self.content: str = tweet["content"]
+        self.attachments: tuple[str, ...] = tuple(tweet["attachments"])
+        self.likes: tuple[tuple[int, str], ...] = tuple(
+            (like["user_id"], like["name"]) for like in tweet["likes"]
+        )
+        self.version = version
+        self.expires = expires
+        self.size = self._size()
+
+    @property
+    def like_count(self) -> int:
+        return len(self.likes)
+
+    def _size(self) -> int:
+        """Приблизительный размер записи в памяти, байты"""
+        size = sys.getsizeof(self) + sys.getsizeof(self.content)
+        size += sys.getsizeof(self.author_name) + sys.getsizeof(self.attachments)
+        size += sum(sys.getsizeof(link) for link in self.attachments)
+        size += sys.getsizeof(self.likes)
+        size += sum(sys.getsizeof(like) + sys.getsizeof(like[1]) for like in self.likes)
+        return size
+
+    def to_dict(self) -> dict:
+        return {
+            "id": self.id,
+            "content": self.content,
+            "author": {"id": self.author_id, "name": self.author_name},
+            "attachments": list(self.attachments),
+            "likes": [
+                {"user_id": user_id, "name": name} for user_id, name in self.likes
+            ],
+        }
+
+
+class TweetCache:
+    """Ограниченный по количеству записей LRU кэш твитов
+
+    Args:
+        bus (InvalidationBus): шина инвалидации, источник версий ключей
+        capacity (int): максимальное количество твитов в кэше
+        ttl (float): время жизни записи, секунды, 0 - без ограничения
+    """
+
+    def __init__(
+        self, bus: InvalidationBus, capacity: int = 10000, ttl: float = 300
+    ) -> None:
+        self.bus = bus
+        self.capacity = capacity
+        self.ttl = ttl
+        self._records: OrderedDict[int, CachedTweet] = OrderedDict()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        bus.subscribe("tweet:", self._on_invalidate)
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def _on_invalidate(self, key: str) -> None:
+        if key == ALL_KEYS:
+            self.clear()
+            return
+        self.discard(int(key.partition(":")[2]))
+
+    def discard(self, tweet_id: int) -> None:
+        record = self._records.pop(tweet_id, None)
+        if record is not None:
+            self.bytes -= record.size
+
+    def clear(self) -> None:
+        self._records.clear()
+        self.bytes = 0
+
+    def get_many(self, tweet_ids: Sequence[int]) -> tuple[dict[int, dict], list[int]]:
+        """Ищет твиты в кэше
+
+        Args:
+            tweet_ids (Sequence[int]): список id твитов
+
+        Returns:
+            tuple[dict[int, dict], list[int]]: найденные твиты и id промахов
+        """
+        found: dict[int, dict] = {}
+        missing: list[int] = []
+        now = time.monotonic()
+        for tweet_id in tweet_ids:
+            record = self._records.get(tweet_id)
+            if (
+                record is None
+                or record.expires <= now
+                or record.version != self.bus.version(tweet_key(tweet_id))
+            ):
+                missing.append(tweet_id)
+                continue
+            self._records.move_to_end(tweet_id)
+            found[tweet_id] = record.to_dict()
+        self.hits += len(found)
+        self.misses += len(missing)
+        LOOKUPS.inc(len(found), ("hit",))
+        LOOKUPS.inc(len(missing), ("miss",))
+        return found, missing
+
+    def put(self, tweet: dict, version: tuple[int, int]) -> None:
+        """Сохраняет твит с версией ключа, взятой до чтения из базы"""
+        if version != self.bus.version(tweet_key(tweet["id"])):
+            # Твит изменился, пока его читали из базы
+            return
+        self.discard(tweet["id"])
+        expires = time.monotonic() + self.ttl if self.ttl > 0 else float("inf")
+        record = CachedTweet(tweet, version, expires)
+        self._records[record.id] = record
+        self.bytes += record.size
+        while len(self._records) > self.capacity:
+            _, evicted = self._records.popitem(last=False)
+            self.bytes -= evicted.size
+
+    async def get_tweets(
+        self, tweet_ids: Sequence[int], loader: TweetsLoader
+    ) -> list[dict]:
+        """Возвращает твиты по id из кэша, промахи загружает одним вызовом loader
+
+        Args:
+            tweet_ids (Sequence[int]): список id твитов
+            loader (TweetsLoader): загрузка твитов по id, например
+                SQLManager.select_tweets_by_ids
+
+        Returns:
+            list[dict]: твиты в порядке tweet_ids, ненайденные id пропускаются
+        """
+        if self.capacity <= 0:
+            return await loader(tweet_ids)
+        found, missing = self.get_many(tweet_ids)
+        if missing:
+            versions = {
+                tweet_id: self.bus.version(tweet_key(tweet_id)) for tweet_id in missing
+            }
+            for tweet in await loader(missing):
+                found[tweet["id"]] = tweet
+                self.put(tweet, versions[tweet["id"]])
+        return [found[tweet_id] for tweet_id in tweet_ids if tweet_id in found]
+
+    def stats(self) -> dict:
+        requests = self.hits + self.misses
+        return {
+            "size": len(self._records),
+            "capacity": self.capacity,
+            "bytes": self.bytes,
+            "bytes_per_tweet": self.bytes // len(self._records) if self._records else 0,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / requests if requests else 0.0,
+        }
+
+
+def register_metrics(cache: TweetCache) -> None:
+    """Публикует статистику кэша в реестре метрик"""
+
+    def state() -> dict[tuple, float]:
+        stats = cache.stats()
+        return {(key,): stats[key] for key in ("size", "bytes", "bytes_per_tweet")}
+
+    metrics.registry.gauge("tweet_cache", "Tweet cache state", ("state",), state)
+    metrics.registry.gauge(
+        "tweet_cache_hit_ratio",
+        "Tweet cache hit ratio",
+        function=lambda: {(): cache.stats()["hit_ratio"]},
+    )
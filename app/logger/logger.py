@@ -1,5 +1,156 @@
+"""Настройка логирования приложения.
+
+Обработчики запросов только кладут запись в очередь (QueueHandler),
+форматирование в JSON и запись в stderr выполняет фоновый поток
+QueueListener. Уровни логгеров и доля сохраняемых записей (sampling)
+задаются в Settings. Логгеры uvicorn, включая лог запросов uvicorn.access,
+тоже пишут через очередь.
+"""
+
+import atexit
+import json
 import logging
+import queue
+import random
+import sys
+from logging.handlers import QueueHandler, QueueListener
+
+# Стандартные атрибуты LogRecord, всё остальное - поля из extra
+_RECORD_ATTRS = frozenset(
+    vars(logging.LogRecord("", 0, "", 0, "", (), None)).keys()
+) | {"message", "asctime", "taskName"}
+# Логгеры со своими обработчиками, которые uvicorn создаёт до импорта приложения
+_UVICORN_LOGGERS = ("uvicorn", "uvicorn.error", "uvicorn.access")
+
+
+class JSONFormatter(logging.Formatter):
+    """Форматирует запись в одну строку JSON, включая поля из extra"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        data = {
+            "time": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRS:
+                data[key] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            data["exc_info"] = record.exc_text
+        return json.dumps(data, default=str, ensure_ascii=False)
+
+
+class SamplingFilter(logging.Filter):
+    """Пропускает только часть записей ниже WARNING для указанных логгеров.
+    Доля для логгера ищется по его имени и именам родителей.
+
+    Args:
+        rates (dict[str, float]): имя логгера и доля сохраняемых записей от 0 до 1
+    """
+
+    def __init__(self, rates: dict[str, float]) -> None:
+        super().__init__()
+        self.rates = rates
+        self._resolved: dict[str, float] = {}
+
+    def _rate(self, name: str) -> float:
+        rate = self._resolved.get(name)
+        if rate is None:
+            rate = 1.0
+            candidate = name
+            while candidate:
+                if candidate in self.rates:
+                    rate = self.rates[candidate]
+                    break
+                candidate = candidate.rpartition(".")[0]
+            self._resolved[name] = rate
+        return rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+        rate = self._rate(record.name)
+        return rate >= 1.0 or random.random() < rate
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    """QueueHandler, который не блокирует и не форматирует запись в потоке
+    вызова. При переполнении очереди запись отбрасывается.
+    """
+
+    def __init__(self, log_queue: queue.Queue) -> None:
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Аргументы подставляются сразу: объекты могут измениться до записи
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+_listener: QueueListener | None = None
+
+
+def configure_logging(settings) -> QueueListener:
+    """Настраивает корневой логгер на очередь и запускает фоновый поток записи.
+    Повторный вызов заменяет предыдущую настройку.
+
+    Args:
+        settings (Settings): настройки приложения
+
+    Returns:
+        QueueListener: фоновый обработчик очереди
+    """
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+    stream_handler = logging.StreamHandler(sys.stderr)
+    if settings.LOG_JSON:
+        stream_handler.setFormatter(JSONFormatter())
+    else:
+        stream_handler.setFormatter(
+            logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s")
+        )
+    queue_handler = NonBlockingQueueHandler(queue.Queue(settings.LOG_QUEUE_SIZE))
+    if settings.LOG_SAMPLING:
+        queue_handler.addFilter(SamplingFilter(settings.LOG_SAMPLING))
+
+    root = logging.getLogger()
+    for handler in root.handlers[:]:
+        if isinstance(handler, NonBlockingQueueHandler):
+            root.removeHandler(handler)
+    root.addHandler(queue_handler)
+    root.setLevel(settings.LOG_LEVEL.upper())
+    for name in _UVICORN_LOGGERS:
+        uvicorn_logger = logging.getLogger(name)
+        uvicorn_logger.handlers.clear()
+        uvicorn_logger.propagate = True
+    for name, level in settings.LOG_LEVELS.items():
+        logging.getLogger(name).setLevel(level.upper())
+
+    _listener = QueueListener(queue_handler.queue, stream_handler)
+    _listener.start()
+    return _listener
+
+
+@atexit.register
+def _stop_listener() -> None:
+    if _listener is not None:
+        _listener.stop()
+
 
-logging.basicConfig(level=logging.DEBUG)
 logger_app = logging.getLogger("APP")
 logger_database = logging.getLogger("DATABASE")
@@ -1,26 +1,39 @@
-import os
+from datetime import timedelta
 from typing import Annotated, Dict
 
-from fastapi import APIRouter, Depends, UploadFile
+from fastapi import APIRouter, Depends, Header, Query, Request, UploadFile
+from fastapi.responses import StreamingResponse
 from fastapi.security import APIKeyHeader
 from sqlalchemy import select
 from sqlalchemy.orm import selectinload
 
-from ..application import DIRECTORY_MEDIA, SQL_MANAGER
-from ..application.custom_exp import CustomException
-from ..application.models import schemas
-from ..application.models.models import (
-    Attachments,
-    Follower,
-    Followers,
-    Likes,
-    Tweets,
-    Users,
+from ..application import (
+    IDEMPOTENCY_STORE,
+    INVALIDATION_BUS,
+    JOB_QUEUE,
+    SQL_MANAGER,
+    STORAGE,
+    TWEET_CACHE,
+    metrics,
+    settings,
 )
+from ..application.custom_exp import CustomException
+from ..application.hashtags import extract_hashtags, extract_mentions, hour_bucket
+from ..application.idempotency import Idempotency, request_hash
+from ..application.invalidation import tweet_key
+from ..application.models import schemas, statements
+from ..application.models.export import ndjson_chunks
+from ..application.models.models import Attachments, Follower, Tweets, Users
+from ..application.storage import check_name
 
 api_routes = APIRouter()
 header_scheme = APIKeyHeader(name="api-key")
 
+# Список id через запятую для пакетных запросов: ids=1,2,3
+IDS_PATTERN = r"^\d+(,\d+)*$"
+# Максимальное количество id в одном пакетном запросе
+BATCH_MAX_IDS = 100
+
 
 async def get_user(api_key: Annotated[str, Depends(header_scheme)]):
     """Функция возвращает пользователя по api-key
@@ -35,14 +48,9 @@ async def get_user(api_key: Annotated[str, Depends(header_scheme)]):
     Returns:
         _type_: объект модели баз данных Users
     """
-    stmt = (
-        select(Users)
-        .where(Users.api_key == api_key)
-        .options(selectinload(Users.tweets))
-        .options(selectinload(Users.user_followers))
-        .options(selectinload(Users.following))
+    user = await SQL_MANAGER.select_scalars_one_or_none(
+        statements.USER_BY_API_KEY, {"api_key": api_key}
     )
-    user = await SQL_MANAGER.select_scalars_one_or_none(stmt=stmt)
     if user is None:
         raise CustomException(
             status_code=404,
@@ -55,49 +63,101 @@ async def get_user(api_key: Annotated[str, Depends(header_scheme)]):
 GetUserDep = Annotated[Users, Depends(get_user)]
 
 
+async def get_idempotency(
+    request: Request,
+    user: GetUserDep,
+    idempotency_key: Annotated[str | None, Header(max_length=100)] = None,
+):
+    """Обрабатывает заголовок Idempotency-Key.
+    Если запрос с этим ключом уже выполнялся, содержит сохранённый ответ.
+    Если эндпоинт завершился ошибкой, ключ освобождается для повтора.
+    Повтор с тем же ключом и другим телом запроса получает ошибку 422
+
+    Args:
+        request (Request): объект запроса
+        user (GetUserDep): объект Users
+        idempotency_key (str | None): значение заголовка Idempotency-Key
+
+    Yields:
+        Idempotency: состояние ключа идемпотентности
+    """
+    body_hash = await request_hash(request) if idempotency_key is not None else None
+    idempotency = await IDEMPOTENCY_STORE.begin(
+        user.id, idempotency_key, request.url.path, body_hash
+    )
+    try:
+        yield idempotency
+    except Exception:
+        await idempotency.release()
+        raise
+
+
+IdempotencyDep = Annotated[Idempotency, Depends(get_idempotency)]
+
+
 @api_routes.post("/api/tweets", response_model=schemas.TweetCreateOUT)
-async def add_tweet(user: GetUserDep, tweet_in: schemas.TweetCreateIN) -> Dict:
+async def add_tweet(
+    user: GetUserDep, tweet_in: schemas.TweetCreateIN, idempotency: IdempotencyDep
+) -> Dict:
     """Добавляет новый твит в базу данных
     Получает объект Users и схему данных schemas.TweetCreateIN
 
     Args:
         user (GetUserDep): объект Users
         tweet_in (schemas.TweetCreateIN): Схема данных schemas.TweetCreateIN
+        idempotency (IdempotencyDep): ключ идемпотентности запроса
 
     Returns:
         Dict: Возвращает ID нового твита и результат
     """
+    if idempotency.response is not None:
+        return idempotency.response
     new_tweet = Tweets()
     new_tweet.user_id = user.id
     new_tweet.content = tweet_in.tweet_data
-    await SQL_MANAGER.add(new_tweet)
-    await SQL_MANAGER.attachments_update_tweet_id(
-        tweet_in.tweet_media_ids, new_tweet.id
+    await SQL_MANAGER.add_tweet(
+        new_tweet,
+        hashtags=extract_hashtags(tweet_in.tweet_data),
+        mentions=extract_mentions(tweet_in.tweet_data),
+        attachment_ids=tweet_in.tweet_media_ids,
     )
-    return {"id": new_tweet.id, "result": True}
+    return await idempotency.save({"id": new_tweet.id, "result": True})
 
 
 @api_routes.post("/api/medias", response_model=schemas.AttachmentLoadOUT)
-async def load_media(user: GetUserDep, file: UploadFile) -> Dict:
+async def load_media(
+    user: GetUserDep, file: UploadFile, idempotency: IdempotencyDep
+) -> Dict:
     """Загружает изображение и создаёт новое вложение Attachments
 
     Args:
         user (GetUserDep): объект Users
         file (UploadFile): загружаемый файл картинки
+        idempotency (IdempotencyDep): ключ идемпотентности запроса
+
+    Raises:
+        CustomException: Ошибка 400 если имя файла пустое или содержит каталоги
 
     Returns:
         Dict: возвращает id нового вложения и результат
     """
+    if idempotency.response is not None:
+        return idempotency.response
+    try:
+        check_name(file.filename or "")
+    except ValueError:
+        raise CustomException(
+            status_code=400,
+            error_type="Bad Request",
+            error_message="Invalid file name",
+        )
     new_attach = Attachments()
     await SQL_MANAGER.add_attachment(new_attach, file_name=file.filename)
-    file_path = "{path}/{id}_{filename}".format(
-        path="{}/images".format(DIRECTORY_MEDIA),
-        id=new_attach.id,
-        filename=file.filename,
-    )
-    with open(file=file_path, mode="wb") as image:
-        image.write(file.file.read())
-    return {"result": True, "media_id": new_attach.id}
+    data = await file.read()
+    metrics.UPLOAD_BYTES.inc(len(data))
+    metrics.UPLOAD_SIZE.observe(len(data))
+    await JOB_QUEUE.run_blocking(STORAGE.save, new_attach.file_name, data)
+    return await idempotency.save({"result": True, "media_id": new_attach.id})
 
 
 @api_routes.delete("/api/tweets/{id}", response_model=schemas.Answer)
@@ -132,14 +192,15 @@ async def delete_tweet(user: GetUserDep, id: int):
             error_type="Bad Request",
             error_message="Tweet author is not user",
         )
-    tweet_attachments = get_tweet.attachments
-    for attach in tweet_attachments:
-        os.remove(
-            "{path}/images/{filename}".format(
-                path=DIRECTORY_MEDIA, filename=attach.file_name
-            )
-        )
-    await SQL_MANAGER.delete(get_tweet)
+    file_names = [attach.file_name for attach in get_tweet.attachments]
+    # Файлы удаляются из хранилища в фоне. Строка задачи записывается
+    # в транзакции удаления твита и переживёт перезапуск процесса
+    jobs = [JOB_QUEUE.durable_row("remove_files", file_names)] if file_names else []
+    # Лайки, вложения, хэштеги и упоминания удаляет база данных (ON DELETE CASCADE)
+    await SQL_MANAGER.delete_tweets([get_tweet.id], jobs=jobs)
+    for job in jobs:
+        JOB_QUEUE.submit(job)
+    await INVALIDATION_BUS.publish(tweet_key(id))
     return {"result": True}
 
 
@@ -158,19 +219,22 @@ async def add_like(user: GetUserDep, id: int) -> Dict:
     Returns:
         Dict: возвращает результат
     """
-    stmt = select(Tweets).where(Tweets.id == id)
-    get_tweet = await SQL_MANAGER.select_scalars_one_or_none(stmt=stmt)
+    get_tweet = await SQL_MANAGER.select_scalars_one_or_none(
+        statements.TWEET_BY_ID, {"tweet_id": id}
+    )
     if get_tweet is None:
         raise CustomException(
             status_code=404,
             error_type="Not Found",
             error_message="Not found tweet by id",
         )
-    new_like = Likes()
-    new_like.user_id = user.id
-    new_like.name = user.name
-    new_like.tweet_id = get_tweet.id
-    await SQL_MANAGER.add(new_like)
+    await SQL_MANAGER.add_like(
+        tweet_id=get_tweet.id,
+        author_id=get_tweet.user_id,
+        user_id=user.id,
+        name=user.name,
+    )
+    await INVALIDATION_BUS.publish(tweet_key(get_tweet.id))
     return {"result": True}
 
 
@@ -189,22 +253,20 @@ async def delete_like(user: GetUserDep, id: int) -> Dict:
     Returns:
         Dict: возвращает результат
     """
-    stmt = select(Tweets).where(Tweets.id == id)
-    get_tweet = await SQL_MANAGER.select_scalars_one_or_none(stmt=stmt)
+    get_tweet = await SQL_MANAGER.select_scalars_one_or_none(
+        statements.TWEET_BY_ID, {"tweet_id": id}
+    )
     if get_tweet is None:
         raise CustomException(
             status_code=404,
             error_type="Not Found",
             error_message="Not found tweet by id",
         )
-    stmt = (
-        select(Likes)
-        .where(Likes.user_id == user.id)
-        .where(Likes.tweet_id == get_tweet.id)
+    deleted = await SQL_MANAGER.delete_like(
+        tweet_id=get_tweet.id, author_id=get_tweet.user_id, user_id=user.id
     )
-    get_like = await SQL_MANAGER.select_scalars_one_or_none(stmt=stmt)
-    if get_like is not None:
-        await SQL_MANAGER.delete(get_like)
+    if deleted:
+        await INVALIDATION_BUS.publish(tweet_key(get_tweet.id))
     return {"result": True}
 
 
@@ -224,37 +286,34 @@ async def add_follow(user: GetUserDep, id: int) -> Dict:
     Returns:
         Dict: результат
     """
-    stmt = select(Users).where(Users.id == id)
-    get_follow_user = await SQL_MANAGER.select_scalars_one_or_none(stmt=stmt)
+    get_follow_user = await SQL_MANAGER.select_scalars_one_or_none(
+        statements.USER_BY_ID, {"user_id": id}
+    )
     if get_follow_user is None:
         raise CustomException(
             status_code=404,
             error_type="Not Found",
             error_message="Not found user by id",
         )
-    stmt = select(Follower).where(Follower.user_id == user.id)
-    follower: Follower | None = await SQL_MANAGER.select_scalars_one_or_none(stmt=stmt)
+    follower: Follower | None = await SQL_MANAGER.select_scalars_one_or_none(
+        statements.FOLLOWER_BY_USER_ID, {"user_id": user.id}
+    )
     if follower is None:
         follower = Follower()
         follower.user_id = user.id
         follower.name = user.name
         await SQL_MANAGER.add(follower)
-    stmt = (
-        select(Followers)
-        .where(Followers.user_id == get_follow_user.id)
-        .where(Followers.follower_id == follower.user_id)
+    pair = {"user_id": get_follow_user.id, "follower_id": follower.user_id}
+    followers = await SQL_MANAGER.select_scalars_one_or_none(
+        statements.FOLLOWERS_PAIR, pair
     )
-    followers = await SQL_MANAGER.select_scalars_one_or_none(stmt=stmt)
     if followers is not None:
         raise CustomException(
             status_code=400,
             error_type="Bad Request",
             error_message="The user has already followed",
         )
-    new_followers = Followers()
-    new_followers.user_id = get_follow_user.id
-    new_followers.follower_id = follower.user_id
-    await SQL_MANAGER.add(new_followers)
+    await SQL_MANAGER.add_follow(**pair)
     return {"result": True}
 
 
@@ -274,63 +333,204 @@ async def delete_follow(user: GetUserDep, id: int) -> Dict:
     Returns:
         Dict: результат
     """
-    stmt = select(Users).where(Users.id == id)
-    get_follow_user = await SQL_MANAGER.select_scalars_one_or_none(stmt=stmt)
+    get_follow_user = await SQL_MANAGER.select_scalars_one_or_none(
+        statements.USER_BY_ID, {"user_id": id}
+    )
     if get_follow_user is None:
         raise CustomException(
             status_code=404,
             error_type="Not Found",
             error_message="Not found user by id",
         )
-    stmt = (
-        select(Followers)
-        .where(Followers.user_id == get_follow_user.id)
-        .where(Followers.follower_id == user.id)
+    deleted = await SQL_MANAGER.delete_follow(
+        user_id=get_follow_user.id, follower_id=user.id
     )
-    get_followers = await SQL_MANAGER.select_scalars_one_or_none(stmt)
-    if get_followers is None:
+    if not deleted:
         raise CustomException(
             status_code=400,
             error_type="Bad Request",
             error_message="The user is no following",
         )
-    await SQL_MANAGER.delete(get_followers)
     return {"result": True}
 
 
+def parse_ids(ids: str) -> list[int]:
+    """Разбирает параметр ids=1,2,3 в список id без повторов
+
+    Args:
+        ids (str): id через запятую
+
+    Raises:
+        CustomException: Ошибка 400 если id больше BATCH_MAX_IDS
+
+    Returns:
+        list[int]: список id в порядке первого появления
+    """
+    unique_ids = list(dict.fromkeys(int(value) for value in ids.split(",")))
+    if len(unique_ids) > BATCH_MAX_IDS:
+        raise CustomException(
+            status_code=400,
+            error_type="Bad Request",
+            error_message="Too many ids, maximum {}".format(BATCH_MAX_IDS),
+        )
+    return unique_ids
+
+
 @api_routes.get("/api/tweets", response_model=schemas.GetTweets)
-async def get_tweets(user: GetUserDep) -> Dict:
-    """Возвращает все твиты из базы данных
+async def get_tweets(
+    user: GetUserDep,
+    ids: Annotated[str | None, Query(pattern=IDS_PATTERN)] = None,
+) -> Dict:
+    """Возвращает все твиты из базы данных или твиты по списку id
 
     Args:
         user (GetUserDep): объект Users
+        ids (str | None): id твитов через запятую, ненайденные id пропускаются
+
+    Raises:
+        CustomException: Ошибка 400 если id больше BATCH_MAX_IDS
 
     Returns:
         Dict: Результат и список твитов в виде словаря
     """
-    stmt = (
-        select(Tweets)
-        .options(selectinload(Tweets.author))
-        .options(selectinload(Tweets.likes))
-        .options(selectinload(Tweets.attachments))
-    )
-    get_tweets: list[Tweets] = await SQL_MANAGER.select_scalars_all(stmt=stmt)
-    tweets = [
-        schemas.TweetsOut(
-            id=tweet.id,
-            content=tweet.content,
-            author=schemas.UserTweetsOut(id=tweet.author.id, name=tweet.author.name),
-            attachments=[att.link for att in tweet.attachments],
-            likes=[
-                schemas.LikesTweetsOut(user_id=like.user_id, name=like.name)
-                for like in tweet.likes
-            ],
-        )
-        for tweet in get_tweets
-    ]
+    # Твиты загружаются через кэш, из базы читаются только промахи
+    if ids is not None:
+        tweet_ids = parse_ids(ids)
+    else:
+        tweet_ids = await SQL_MANAGER.select_scalars_all(stmt=select(Tweets.id))
+    tweets = await TWEET_CACHE.get_tweets(tweet_ids, SQL_MANAGER.select_tweets_by_ids)
     return {"result": True, "tweets": tweets}
 
 
+async def tweets_page(tweet_ids: list[int], limit: int) -> Dict:
+    """Формирует страницу ответа из limit + 1 id твитов
+
+    Args:
+        tweet_ids (list[int]): id твитов страницы и, если есть, следующего твита
+        limit (int): количество твитов на странице
+
+    Returns:
+        Dict: результат, список твитов и курсор следующей страницы
+    """
+    next_cursor = None
+    if len(tweet_ids) > limit:
+        tweet_ids = tweet_ids[:limit]
+        next_cursor = tweet_ids[-1]
+    tweets = await TWEET_CACHE.get_tweets(tweet_ids, SQL_MANAGER.select_tweets_by_ids)
+    return {"result": True, "tweets": tweets, "next_cursor": next_cursor}
+
+
+@api_routes.get("/api/users/{id}/tweets", response_model=schemas.TweetsPage)
+async def get_user_tweets(
+    user: GetUserDep,
+    id: int,
+    limit: Annotated[int, Query(ge=1, le=100)] = 20,
+    before_id: int | None = None,
+) -> Dict:
+    """Возвращает страницу твитов пользователя от новых к старым.
+    Следующая страница запрашивается с before_id=next_cursor
+
+    Args:
+        user (GetUserDep): объект Users
+        id (int): id пользователя, чьи твиты запрашиваются
+        limit (int): количество твитов на странице
+        before_id (int | None): твиты с id меньше before_id
+
+    Raises:
+        CustomException: Ошибка 404 если пользователь не найден
+
+    Returns:
+        Dict: результат, список твитов и курсор следующей страницы
+    """
+    tweet_ids = await SQL_MANAGER.select_user_tweet_ids(
+        user_id=id, limit=limit + 1, before_id=before_id
+    )
+    if not tweet_ids:
+        stmt = select(Users.id).where(Users.id == id)
+        if await SQL_MANAGER.select_scalars_one_or_none(stmt=stmt) is None:
+            raise CustomException(
+                status_code=404,
+                error_type="Not Found",
+                error_message="Not found user by id",
+            )
+    return await tweets_page(tweet_ids, limit)
+
+
+@api_routes.get("/api/users/{id}/mentions", response_model=schemas.TweetsPage)
+async def get_user_mentions(
+    user: GetUserDep,
+    id: int,
+    limit: Annotated[int, Query(ge=1, le=100)] = 20,
+    before_id: int | None = None,
+) -> Dict:
+    """Возвращает страницу твитов с упоминанием пользователя от новых к старым.
+    Следующая страница запрашивается с before_id=next_cursor
+
+    Args:
+        user (GetUserDep): объект Users
+        id (int): id упомянутого пользователя
+        limit (int): количество твитов на странице
+        before_id (int | None): твиты с id меньше before_id
+
+    Returns:
+        Dict: результат, список твитов и курсор следующей страницы
+    """
+    tweet_ids = await SQL_MANAGER.select_mention_tweet_ids(
+        user_id=id, limit=limit + 1, before_id=before_id
+    )
+    return await tweets_page(tweet_ids, limit)
+
+
+@api_routes.get("/api/hashtags/trending", response_model=schemas.TrendingHashtags)
+async def get_trending_hashtags(
+    user: GetUserDep,
+    hours: Annotated[int, Query(ge=1, le=settings.TRENDING_MAX_HOURS)] = 24,
+    limit: Annotated[int, Query(ge=1, le=100)] = 10,
+) -> Dict:
+    """Возвращает самые частые хэштеги за последние hours часов.
+    Считается по почасовым счётчикам, текущий час учитывается целиком
+
+    Args:
+        user (GetUserDep): объект Users
+        hours (int): окно времени в часах
+        limit (int): количество хэштегов
+
+    Returns:
+        Dict: результат и список хэштегов с количеством твитов
+    """
+    since = hour_bucket() - timedelta(hours=hours - 1)
+    trending = await SQL_MANAGER.select_trending_hashtags(since=since, limit=limit)
+    return {
+        "result": True,
+        "hashtags": [{"tag": tag, "count": count} for tag, count in trending],
+    }
+
+
+@api_routes.get("/api/hashtags/{tag}/tweets", response_model=schemas.TweetsPage)
+async def get_hashtag_tweets(
+    user: GetUserDep,
+    tag: str,
+    limit: Annotated[int, Query(ge=1, le=100)] = 20,
+    before_id: int | None = None,
+) -> Dict:
+    """Возвращает страницу твитов с хэштегом от новых к старым.
+    Следующая страница запрашивается с before_id=next_cursor
+
+    Args:
+        user (GetUserDep): объект Users
+        tag (str): хэштег без #, регистр не учитывается
+        limit (int): количество твитов на странице
+        before_id (int | None): твиты с id меньше before_id
+
+    Returns:
+        Dict: результат, список твитов и курсор следующей страницы
+    """
+    tweet_ids = await SQL_MANAGER.select_hashtag_tweet_ids(
+        tag=tag.lower(), limit=limit + 1, before_id=before_id
+    )
+    return await tweets_page(tweet_ids, limit)
+
+
 @api_routes.get("/api/users/me")
 async def get_me(user: GetUserDep) -> Dict:
     """Возвращает информацию о пользователе
@@ -346,6 +546,7 @@ async def get_me(user: GetUserDep) -> Dict:
         "user": {
             "id": user.id,
             "name": user.name,
+            "stats": await SQL_MANAGER.select_user_stats(user.id),
             "followers": [],
             "following": [],
         },
@@ -375,6 +576,70 @@ async def get_me(user: GetUserDep) -> Dict:
     return answer
 
 
+@api_routes.get("/api/users/me/export")
+async def export_me(user: GetUserDep) -> StreamingResponse:
+    """Выгружает данные пользователя в формате NDJSON: профиль, твиты,
+    лайки, подписки и подписчиков. Ответ передаётся частями по мере
+    чтения из базы данных
+
+    Args:
+        user (GetUserDep): объект Users
+
+    Returns:
+        StreamingResponse: поток строк JSON
+    """
+    return StreamingResponse(
+        ndjson_chunks(SQL_MANAGER, user.id),
+        media_type="application/x-ndjson",
+        headers={
+            "Content-Disposition": 'attachment; filename="export_{}.ndjson"'.format(
+                user.id
+            )
+        },
+    )
+
+
+@api_routes.get("/api/users", response_model=schemas.GetUsers)
+async def get_users(ids: Annotated[str, Query(pattern=IDS_PATTERN)]) -> Dict:
+    """Возвращает пользователей по списку id с подписчиками и подписками
+
+    Args:
+        ids (str): id пользователей через запятую, ненайденные id пропускаются
+
+    Raises:
+        CustomException: Ошибка 400 если id больше BATCH_MAX_IDS
+
+    Returns:
+        Dict: результат и список пользователей
+    """
+    users = await SQL_MANAGER.select_users_by_ids(parse_ids(ids))
+    return {"result": True, "users": users}
+
+
+@api_routes.get("/api/users/{id}/stats", response_model=schemas.GetUserStats)
+async def get_user_stats(id: int) -> Dict:
+    """Возвращает счётчики твитов, подписчиков, подписок и полученных лайков
+    пользователя одним запросом, без загрузки списков
+
+    Args:
+        id (int): id пользователя
+
+    Raises:
+        CustomException: возвращает 404 если пользователь не найден
+
+    Returns:
+        Dict: результат и счётчики пользователя
+    """
+    stats = await SQL_MANAGER.select_user_stats(id)
+    if stats is None:
+        raise CustomException(
+            status_code=404,
+            error_type="Not Found",
+            error_message="Not found user by id",
+        )
+    return {"result": True, "stats": stats}
+
+
 @api_routes.get("/api/users/{id}")
 async def get_user(id: int) -> Dict:
     """Возвращает информацию о пользователе по id
@@ -386,50 +651,13 @@ async def get_user(id: int) -> Dict:
         CustomException: возвращает 404 если пользователь не найден
 
     Returns:
-        Dict: _description_
+        Dict: результат и информация о пользователе
     """
-    stmt = (
-        select(Users)
-        .where(Users.id == id)
-        .options(selectinload(Users.user_followers))
-        .options(selectinload(Users.following))
-    )
-    user: Users | None = await SQL_MANAGER.select_scalars_one_or_none(stmt=stmt)
-    if user is None:
+    users = await SQL_MANAGER.select_users_by_ids([id])
+    if not users:
         raise CustomException(
             status_code=404,
             error_type="Not Found",
             error_message="Not found user by id",
         )
-    answer = {
-        "result": True,
-        "user": {
-            "id": user.id,
-            "name": user.name,
-            "followers": [],
-            "following": [],
-        },
-    }
-    # Get Followers
-    follower_ids = [f.follower_id for f in user.user_followers]
-    stmt = select(Users).filter(Users.id.in_(follower_ids))
-    followers_users: list[Users] = await SQL_MANAGER.select_scalars_all(stmt=stmt)
-    answer["user"]["followers"] = [
-        {"id": user.id, "name": user.name} for user in followers_users
-    ]
-    # GET Following
-    if user.following is not None:
-        stmt = (
-            select(Follower)
-            .where(Follower.user_id == user.following.user_id)
-            .options(selectinload(Follower.followers))
-        )
-        following: Follower = await SQL_MANAGER.select_scalars_one_or_none(stmt)
-        stmt = select(Users).filter(
-            Users.id.in_([f.user_id for f in following.followers])
-        )
-        following_users: list[Users] = await SQL_MANAGER.select_scalars_all(stmt=stmt)
-        answer["user"]["following"] = [
-            {"id": user.id, "name": user.name} for user in following_users
-        ]
-    return answer
+    return {"result": True, "user": users[0]}
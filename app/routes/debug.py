@@ -0,0 +1,75 @@
+from typing import Annotated, Dict
+
+from fastapi import APIRouter, Header
+
+from ..application import LOOP_MONITOR, TWEET_CACHE, settings
+from ..application.custom_exp import CustomException
+from ..application.sql_stats import statement_shapes
+
+debug_router = APIRouter()
+
+
+def check_debug_mod() -> None:
+    """Отладочные маршруты доступны только в режиме DEBUG_MOD
+
+    Raises:
+        CustomException: Ошибка 404 если режим отладки выключен
+    """
+    if not settings.DEBUG_MOD:
+        raise CustomException(
+            status_code=404,
+            error_type="Not Found",
+            error_message="Debug mode is disabled",
+        )
+
+
+@debug_router.get("/api/debug/sql", include_in_schema=False)
+async def slowest_statements(limit: int = 20) -> Dict:
+    """Возвращает самые медленные формы SQL запросов по суммарному времени
+
+    Args:
+        limit (int): количество форм запросов в ответе
+
+    Returns:
+        Dict: результат и список форм запросов со статистикой
+    """
+    check_debug_mod()
+    return {"result": True, "statements": statement_shapes.slowest(limit)}
+
+
+@debug_router.get("/api/debug/cache", include_in_schema=False)
+async def cache_stats() -> Dict:
+    """Возвращает статистику кэша твитов: размер, память на твит, долю попаданий
+
+    Returns:
+        Dict: результат и статистика кэша
+    """
+    check_debug_mod()
+    return {"result": True, "tweet_cache": TWEET_CACHE.stats()}
+
+
+@debug_router.get("/api/debug/loop", include_in_schema=False)
+async def loop_stats(x_profile: Annotated[str | None, Header()] = None) -> Dict:
+    """Возвращает максимальную задержку цикла событий и самые долгие
+    блокирующие обратные вызовы. Доступно при PROFILING_ENABLED
+    в режиме отладки или с заголовком X-Profile
+
+    Args:
+        x_profile (str | None): токен профилирования PROFILING_TOKEN
+
+    Raises:
+        CustomException: Ошибка 404 если профилирование недоступно
+
+    Returns:
+        Dict: результат и статистика цикла событий
+    """
+    token = settings.PROFILING_TOKEN
+    if not settings.PROFILING_ENABLED or not (
+        settings.DEBUG_MOD or (token and x_profile == token)
+    ):
+        raise CustomException(
+            status_code=404,
+            error_type="Not Found",
+            error_message="Profiling is disabled",
+        )
+    return {"result": True, "loop": LOOP_MONITOR.stats()}
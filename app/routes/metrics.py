@@ -0,0 +1,50 @@
+import secrets
+from typing import Annotated
+
+from fastapi import APIRouter, Header
+from fastapi.responses import Response
+
+from ..application import SHARED_METRICS, metrics, settings
+from ..application.custom_exp import CustomException
+
+metrics_router = APIRouter()
+
+
+def check_metrics_token(authorization: str | None) -> None:
+    """Метрики доступны с заголовком Authorization: Bearer METRICS_TOKEN,
+    без токена в настройках - только в режиме DEBUG_MOD
+
+    Args:
+        authorization (str | None): значение заголовка Authorization
+
+    Raises:
+        CustomException: Ошибка 404 если метрики недоступны
+    """
+    token = settings.METRICS_TOKEN
+    if token:
+        allowed = secrets.compare_digest(authorization or "", "Bearer {}".format(token))
+    else:
+        allowed = settings.DEBUG_MOD
+    if not settings.METRICS_ENABLED or not allowed:
+        raise CustomException(
+            status_code=404,
+            error_type="Not Found",
+            error_message="Metrics are disabled",
+        )
+
+
+@metrics_router.get("/metrics", include_in_schema=False)
+async def get_metrics(
+    authorization: Annotated[str | None, Header()] = None
+) -> Response:
+    """Возвращает метрики приложения в текстовом формате Prometheus,
+    с METRICS_DIRECTORY - сумму по всем процессам
+
+    Args:
+        authorization (str | None): заголовок Authorization: Bearer METRICS_TOKEN
+
+    Returns:
+        Response: текст метрик
+    """
+    check_metrics_token(authorization)
+    return Response(content=SHARED_METRICS.render(), media_type=metrics.CONTENT_TYPE)
@@ -2,7 +2,8 @@ from fastapi import APIRouter, Request
 from fastapi.responses import FileResponse, HTMLResponse
 from fastapi.templating import Jinja2Templates
 
-from ..application import DIRECTORY_MEDIA, DIRECTORY_TEMPLATES
+from ..application import DIRECTORY_MEDIA, DIRECTORY_TEMPLATES, STORAGE
+from ..application.custom_exp import CustomException
 
 web_router = APIRouter()
 templates = Jinja2Templates(directory=DIRECTORY_TEMPLATES)
@@ -18,6 +19,32 @@ async def favicon():
     return FileResponse("{dir_media}/favicon.ico".format(dir_media=DIRECTORY_MEDIA))
 
 
+@web_router.get("/images/{file_name}", include_in_schema=False)
+async def image(file_name: str):
+    """Возвращает файл вложения из хранилища
+
+    Args:
+        file_name (str): имя файла вложения
+
+    Raises:
+        CustomException: Ошибка 404 если файл не найден
+
+    Returns:
+        Response: файл или перенаправление на файл в хранилище
+    """
+    try:
+        response = await STORAGE.response(file_name)
+    except ValueError:
+        response = None
+    if response is None:
+        raise CustomException(
+            status_code=404,
+            error_type="Not Found",
+            error_message="Not found file by name",
+        )
+    return response
+
+
 @web_router.get("/", response_class=HTMLResponse, include_in_schema=False)
 async def hello(request: Request):
     """Возвращает страницу сайта 
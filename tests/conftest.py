@@ -0,0 +1,16 @@
+import os
+import tempfile
+
+from dotenv import dotenv_values
+
+# Приложение создаёт менеджер базы данных при импорте app.application,
+# поэтому тесты переключают его на тестовую базу до первого импорта
+os.environ["DATABASE_URL"] = os.environ.get("DATABASE_URL_TEST") or dotenv_values(
+    "settings_app.cfg"
+).get("DATABASE_URL_TEST", "")
+
+# Каталоги статических файлов, которые монтирует приложение
+_media = tempfile.mkdtemp(prefix="twitter_clone_media_")
+for _directory in ("css", "js", "images"):
+    os.makedirs(os.path.join(_media, _directory), exist_ok=True)
+os.environ["DIRECTORY_MEDIA"] = _media
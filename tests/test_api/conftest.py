@@ -0,0 +1,107 @@
+import httpx
+import pytest_asyncio
+
+from app.app import app
+from app.application import SQL_MANAGER, TWEET_CACHE
+from app.application.hashtags import hour_bucket
+from app.application.models.models import (
+    Attachments,
+    Follower,
+    Followers,
+    HashtagCounts,
+    Likes,
+    TweetHashtags,
+    TweetMentions,
+    Tweets,
+    Users,
+)
+
+USERS = 4
+HASHTAG = "python"
+
+
+async def seed_database(tweets_per_user: int) -> dict[str, int | str]:
+    """Пересоздаёт базу данных и заполняет её: первый пользователь (api-key
+    test) подписан на всех, все подписаны на него. У каждого пользователя
+    tweets_per_user твитов с хэштегом, упоминанием первого пользователя,
+    вложением и лайками двух других пользователей. Счётчики пользователей
+    пересчитываются по заполненным таблицам
+
+    Args:
+        tweets_per_user (int): количество твитов каждого пользователя
+
+    Returns:
+        dict[str, int | str]: id для подстановки в адреса запросов
+    """
+    await SQL_MANAGER.drop_all_table()
+    await SQL_MANAGER.initial_database()
+    users = [
+        Users(name="user{}".format(number), api_key="key{}".format(number))
+        for number in range(USERS)
+    ]
+    users[0].api_key = "test"
+    await SQL_MANAGER.add(*users)
+    me, others = users[0], users[1:]
+
+    follows = [Follower(user_id=user.id, name=user.name) for user in users]
+    follows += [Followers(user_id=user.id, follower_id=me.id) for user in others]
+    follows += [Followers(user_id=me.id, follower_id=user.id) for user in others]
+    await SQL_MANAGER.add(*follows)
+
+    tweets = [
+        Tweets(
+            user_id=user.id,
+            content="tweet {} #{} @{}".format(number, HASHTAG, me.name),
+        )
+        for number in range(tweets_per_user)
+        for user in users
+    ]
+    await SQL_MANAGER.add(*tweets)
+
+    bucket = hour_bucket()
+    rows = [HashtagCounts(tag=HASHTAG, bucket=bucket, count=len(tweets))]
+    for tweet in tweets:
+        rows.append(TweetHashtags(tag=HASHTAG, tweet_id=tweet.id, bucket=bucket))
+        rows.append(TweetMentions(user_id=me.id, tweet_id=tweet.id))
+        file_name = "{}_image.png".format(tweet.id)
+        rows.append(
+            Attachments(
+                tweet_id=tweet.id, file_name=file_name, link="images/" + file_name
+            )
+        )
+        rows += [
+            Likes(user_id=user.id, tweet_id=tweet.id, name=user.name)
+            for user in others[:2]
+        ]
+    await SQL_MANAGER.add(*rows)
+    # Строки добавлены в обход эндпоинтов, счётчики считаются пересчётом
+    await SQL_MANAGER.reconcile_user_stats()
+
+    my_tweets = [tweet.id for tweet in tweets if tweet.user_id == me.id]
+    return {
+        "me": me.id,
+        "other": others[0].id,
+        "tweet": my_tweets[0],
+        "other_tweet": tweets[1].id,
+        "tweet_ids": ",".join(str(tweet.id) for tweet in tweets[:10]),
+        "tag": HASHTAG,
+    }
+
+
+@pytest_asyncio.fixture
+async def client():
+    """HTTP клиент приложения с api-key первого пользователя
+
+    Yields:
+        httpx.AsyncClient: клиент
+    """
+    TWEET_CACHE.clear()
+    async with httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=app),
+        base_url="http://test",
+        headers={"api-key": "test"},
+    ) as client:
+        yield client
+    TWEET_CACHE.clear()
+    # Каждый тест работает в своём цикле событий, соединения пула закрываются
+    await SQL_MANAGER.close()
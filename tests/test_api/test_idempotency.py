@@ -0,0 +1,32 @@
+import httpx
+import pytest
+
+from .conftest import seed_database
+
+
+@pytest.mark.asyncio
+async def test_idempotency_request_body(client: httpx.AsyncClient):
+    """Проверяет повтор запросов с ключом идемпотентности: тот же ответ
+    для того же тела, ошибка 422 для другого тела, в том числе файла
+
+    Args:
+        client (httpx.AsyncClient): клиент приложения
+    """
+    await seed_database(1)
+    headers = {"idempotency-key": "tweet-1"}
+    body = {"tweet_data": "hello", "tweet_media_ids": []}
+    first = await client.post("/api/tweets", json=body, headers=headers)
+    repeat = await client.post("/api/tweets", json=body, headers=headers)
+    assert repeat.json() == first.json()
+    body["tweet_data"] = "other"
+    response = await client.post("/api/tweets", json=body, headers=headers)
+    assert response.status_code == 422
+
+    headers = {"idempotency-key": "media-1"}
+    files = {"file": ("photo.png", b"image", "image/png")}
+    first = await client.post("/api/medias", files=files, headers=headers)
+    repeat = await client.post("/api/medias", files=files, headers=headers)
+    assert repeat.json() == first.json()
+    files = {"file": ("photo.png", b"other", "image/png")}
+    response = await client.post("/api/medias", files=files, headers=headers)
+    assert response.status_code == 422
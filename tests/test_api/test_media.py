@@ -0,0 +1,72 @@
+import httpx
+import pytest
+from sqlalchemy import select
+
+from app.application import SQL_MANAGER, STORAGE
+from app.application.models.models import Attachments
+
+from .conftest import seed_database
+
+
+@pytest.mark.asyncio
+async def test_media_storage(client: httpx.AsyncClient):
+    """Проверяет загрузку вложения в хранилище и выдачу файла по адресу
+    /images/<имя файла>
+
+    Args:
+        client (httpx.AsyncClient): клиент приложения
+    """
+    await seed_database(1)
+    response = await client.post(
+        "/api/medias", files={"file": ("photo.png", b"image", "image/png")}
+    )
+    file_name = "{}_photo.png".format(response.json()["media_id"])
+    assert STORAGE.read(file_name) == b"image"
+
+    response = await client.get("/images/{}".format(file_name))
+    assert response.status_code == 200
+    assert response.content == b"image"
+    assert response.headers["content-type"] == "image/png"
+
+    STORAGE.delete([file_name])
+    assert (await client.get("/images/{}".format(file_name))).status_code == 404
+    assert (await client.get("/images/%2E%2E")).status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_media_invalid_file_name(client: httpx.AsyncClient):
+    """Проверяет ошибку 400 без записи вложения для имени файла с каталогами
+
+    Args:
+        client (httpx.AsyncClient): клиент приложения
+    """
+    await seed_database(1)
+    attachments = await SQL_MANAGER.select_scalars_all(select(Attachments.id))
+    for file_name in ("../photo.png", "dir\\photo.png"):
+        response = await client.post(
+            "/api/medias", files={"file": (file_name, b"image", "image/png")}
+        )
+        assert response.status_code == 400, file_name
+    assert await SQL_MANAGER.select_scalars_all(select(Attachments.id)) == attachments
+
+
+@pytest.mark.asyncio
+async def test_tweet_with_media(client: httpx.AsyncClient):
+    """Проверяет, что новый твит сразу отдаётся со своим вложением
+
+    Args:
+        client (httpx.AsyncClient): клиент приложения
+    """
+    await seed_database(1)
+    response = await client.post(
+        "/api/medias", files={"file": ("photo.png", b"image", "image/png")}
+    )
+    media_id = response.json()["media_id"]
+    response = await client.post(
+        "/api/tweets", json={"tweet_data": "photo", "tweet_media_ids": [media_id]}
+    )
+    tweet_id = response.json()["id"]
+    tweets = (await client.get("/api/tweets")).json()["tweets"]
+    [tweet] = [tweet for tweet in tweets if tweet["id"] == tweet_id]
+    assert tweet["attachments"] == ["images/{}_photo.png".format(media_id)]
+    STORAGE.delete(["{}_photo.png".format(media_id)])
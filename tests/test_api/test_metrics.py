@@ -0,0 +1,26 @@
+import httpx
+import pytest
+
+from app.application import settings
+
+
+@pytest.mark.asyncio
+async def test_metrics_token(client: httpx.AsyncClient, monkeypatch):
+    """Проверяет, что /metrics отдаётся только с токеном METRICS_TOKEN
+
+    Args:
+        client (httpx.AsyncClient): клиент приложения
+        monkeypatch (pytest.MonkeyPatch): замена настроек
+    """
+    monkeypatch.setattr(settings, "DEBUG_MOD", False)
+    monkeypatch.setattr(settings, "METRICS_TOKEN", "")
+    assert (await client.get("/metrics")).status_code == 404
+
+    monkeypatch.setattr(settings, "METRICS_TOKEN", "secret")
+    assert (await client.get("/metrics")).status_code == 404
+    headers = {"authorization": "Bearer wrong"}
+    assert (await client.get("/metrics", headers=headers)).status_code == 404
+    headers = {"authorization": "Bearer secret"}
+    response = await client.get("/metrics", headers=headers)
+    assert response.status_code == 200
+    assert "http_requests_total" in response.text
@@ -0,0 +1,163 @@
+"""Бюджет SQL запросов эндпоинтов API.
+
+Каждый эндпоинт из app/routes/api.py выполняется через HTTP на базе
+заданного размера, и считаются выполненные SQL запросы и прочитанные строки
+(для INSERT, UPDATE и DELETE - изменённые). Тест падает, если эндпоинт
+превышает свой бюджет или если стоимость постраничного эндпоинта растёт
+вместе с размером таблиц. Кэш твитов очищается перед каждым запросом,
+поэтому измеряется холодный путь.
+"""
+
+from typing import NamedTuple
+
+import httpx
+import pytest
+
+from app.application import TWEET_CACHE
+from app.application.sql_stats import statement_shapes
+from app.routes.api import api_routes
+
+from .conftest import seed_database
+
+# Твитов у каждого пользователя: больше одной страницы и в несколько раз больше
+SMALL = 25
+LARGE = 100
+
+
+class Case(NamedTuple):
+    """Запрос к эндпоинту и его бюджет
+
+    Args:
+        method (str): HTTP метод
+        path (str): путь маршрута в api_routes
+        url (str): адрес запроса, id подставляются из seed_database
+        statements (int): максимум SQL запросов
+        rows (int): максимум строк на базе размера SMALL
+        paginated (bool): стоимость не должна зависеть от размера таблиц
+        request (dict | None): тело запроса для httpx
+    """
+
+    method: str
+    path: str
+    url: str
+    statements: int
+    rows: int
+    paginated: bool = False
+    request: dict | None = None
+
+
+# Запросы, изменяющие данные, идут после чтения и в порядке выполнения
+CASES = [
+    Case("GET", "/api/tweets", "/api/tweets", 7, 505),
+    Case("GET", "/api/tweets", "/api/tweets?ids={tweet_ids}", 6, 45, True),
+    Case("GET", "/api/users/{id}/tweets", "/api/users/{other}/tweets", 7, 106, True),
+    Case("GET", "/api/users/{id}/mentions", "/api/users/{me}/mentions", 7, 106, True),
+    Case("GET", "/api/hashtags/trending", "/api/hashtags/trending", 4, 6, True),
+    Case(
+        "GET", "/api/hashtags/{tag}/tweets", "/api/hashtags/{tag}/tweets", 7, 106, True
+    ),
+    # Профили отдают полные списки подписчиков и подписок, их стоимость
+    # растёт с количеством подписок, а seed_database его не меняет
+    Case("GET", "/api/users/me", "/api/users/me", 8, 16),
+    Case("GET", "/api/users/me/export", "/api/users/me/export", 8, 6),
+    Case("GET", "/api/users", "/api/users?ids={me},{other}", 3, 10),
+    Case("GET", "/api/users/{id}/stats", "/api/users/{other}/stats", 1, 1, True),
+    Case("GET", "/api/users/{id}", "/api/users/{other}", 3, 3),
+    Case(
+        "POST",
+        "/api/tweets",
+        "/api/tweets",
+        10,
+        11,
+        request={"json": {"tweet_data": "new #python @user1", "tweet_media_ids": []}},
+    ),
+    Case(
+        "POST",
+        "/api/medias",
+        "/api/medias",
+        5,
+        7,
+        request={"files": {"file": ("image.png", b"image", "image/png")}},
+    ),
+    Case("POST", "/api/tweets/{id}/likes", "/api/tweets/{other_tweet}/likes", 7, 9),
+    Case("DELETE", "/api/tweets/{id}/likes", "/api/tweets/{other_tweet}/likes", 7, 9),
+    Case("DELETE", "/api/users/{id}/follow", "/api/users/{other}/follow", 7, 8),
+    Case("POST", "/api/users/{id}/follow", "/api/users/{other}/follow", 9, 9),
+    Case("DELETE", "/api/tweets/{id}", "/api/tweets/{tweet}", 11, 13),
+]
+
+
+async def measure(
+    client: httpx.AsyncClient, case: Case, ids: dict[str, int | str]
+) -> tuple[int, int]:
+    """Выполняет запрос и считает SQL запросы и строки, включая запросы,
+    выполненные во время передачи потокового ответа
+
+    Args:
+        client (httpx.AsyncClient): клиент приложения
+        case (Case): запрос
+        ids (dict[str, int | str]): id из seed_database
+
+    Returns:
+        tuple[int, int]: количество SQL запросов и строк
+    """
+    TWEET_CACHE.clear()
+    statement_shapes.clear()
+    response = await client.request(
+        case.method, case.url.format(**ids), **(case.request or {})
+    )
+    assert response.status_code == 200, (case.url, response.text)
+    shapes = statement_shapes.slowest(count=statement_shapes.limit)
+    return sum(shape["calls"] for shape in shapes), sum(
+        shape["rows"] for shape in shapes
+    )
+
+
+def test_all_routes_have_budget():
+    """Проверяет, что для каждого эндпоинта API задан бюджет"""
+    routes = {
+        (method, route.path) for route in api_routes.routes for method in route.methods
+    }
+    assert routes == {(case.method, case.path) for case in CASES}
+
+
+@pytest.mark.asyncio
+async def test_query_budget(client: httpx.AsyncClient):
+    """Проверяет, что эндпоинты укладываются в бюджет запросов и строк
+
+    Args:
+        client (httpx.AsyncClient): клиент приложения
+    """
+    ids = await seed_database(SMALL)
+    over_budget = []
+    for case in CASES:
+        statements, rows = await measure(client, case, ids)
+        if statements > case.statements or rows > case.rows:
+            over_budget.append(
+                "{} {}: statements {}/{}, rows {}/{}".format(
+                    case.method, case.url, statements, case.statements, rows, case.rows
+                )
+            )
+    assert not over_budget, "\n".join(over_budget)
+
+
+@pytest.mark.asyncio
+async def test_query_cost_growth(client: httpx.AsyncClient):
+    """Проверяет, что количество запросов эндпоинтов чтения не зависит
+    от размера таблиц (нет N+1), а у постраничных эндпоинтов не растёт
+    и количество строк
+
+    Args:
+        client (httpx.AsyncClient): клиент приложения
+    """
+    cases = [case for case in CASES if case.method == "GET"]
+    costs = {}
+    for size in (SMALL, LARGE):
+        ids = await seed_database(size)
+        for case in cases:
+            costs.setdefault(case.url, []).append(await measure(client, case, ids))
+    for case in cases:
+        (small_statements, small_rows), (large_statements, large_rows) = costs[case.url]
+        assert small_statements == large_statements, case.url
+        if case.paginated:
+            assert small_rows == large_rows, case.url
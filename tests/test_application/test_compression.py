@@ -0,0 +1,113 @@
+import os
+
+import httpx
+import pytest
+from starlette.applications import Starlette
+from starlette.responses import Response, StreamingResponse
+from starlette.routing import Route
+
+from app.application import compression
+from app.application.compression import CompressionMiddleware, choose_encoding
+
+BODY = b'{"likes": [{"user_id": 1, "name": "TestUser"}]}' * 100
+
+
+def test_choose_encoding():
+    """Проверяет выбор кодировки по Accept-Encoding и предпочтению сервера"""
+    encodings = ["zstd", "br", "gzip"]
+    assert choose_encoding("gzip, deflate, br", encodings) == "br"
+    assert choose_encoding("gzip;q=1.0, br;q=0.5", encodings) == "gzip"
+    assert choose_encoding("*", encodings) == "zstd"
+    assert choose_encoding("*, zstd;q=0", encodings) == "br"
+    assert choose_encoding("identity", encodings) is None
+    assert choose_encoding("", encodings) is None
+
+
+def _client(**kwargs) -> httpx.AsyncClient:
+    async def json(request):
+        return Response(BODY, media_type="application/json")
+
+    async def small(request):
+        return Response(b"{}", media_type="application/json")
+
+    async def image(request):
+        return Response(BODY, media_type="image/png")
+
+    async def random(request):
+        return Response(os.urandom(4096), media_type="application/json")
+
+    async def stream(request):
+        return StreamingResponse(iter([BODY, BODY]), media_type="text/plain")
+
+    app = Starlette(
+        routes=[
+            Route("/json", json),
+            Route("/small", small),
+            Route("/image", image),
+            Route("/images/1.png", json),
+            Route("/imagesfoo", json),
+            Route("/random", random),
+            Route("/stream", stream),
+        ]
+    )
+    app.add_middleware(
+        CompressionMiddleware,
+        levels={"zstd": 3, "br": 4, "gzip": 6},
+        exclude_paths=["/images"],
+        **kwargs,
+    )
+    return httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=app), base_url="http://test"
+    )
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("thread_min_size", [0, 1 << 30])
+async def test_compression_middleware(thread_min_size: int):
+    """Проверяет сжатие ответов в цикле событий и в пуле потоков
+    и пропуск маленьких, уже сжатых, исключённых и потоковых ответов
+
+    Args:
+        thread_min_size (int): размер ответа для сжатия в пуле потоков
+    """
+    headers = {"Accept-Encoding": "gzip"}
+    async with _client(thread_min_size=thread_min_size) as client:
+        response = await client.get("/json", headers=headers)
+        assert response.headers["content-encoding"] == "gzip"
+        assert response.headers["vary"] == "Accept-Encoding"
+        assert int(response.headers["content-length"]) < len(BODY) // 10
+        # httpx распаковывает ответ сам
+        assert response.content == BODY
+
+        response = await client.get("/json", headers={"Accept-Encoding": "identity"})
+        assert "content-encoding" not in response.headers
+        assert response.headers["content-length"] == str(len(BODY))
+
+        for path in ("/small", "/image", "/images/1.png", "/random", "/stream"):
+            response = await client.get(path, headers=headers)
+            assert "content-encoding" not in response.headers, path
+        assert response.content == BODY * 2
+        # Исключается путь и вложенные пути, но не пути с тем же началом
+        response = await client.get("/imagesfoo", headers=headers)
+        assert response.headers["content-encoding"] == "gzip"
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("encoding, module", [("br", "brotli"), ("zstd", "zstandard")])
+async def test_optional_encodings(encoding: str, module: str):
+    """Проверяет сжатие br и zstd при установленных библиотеках
+
+    Args:
+        encoding (str): кодировка
+        module (str): пакет библиотеки сжатия
+    """
+    library = pytest.importorskip(module)
+    assert encoding in compression.available_encoders()
+    async with _client() as client:
+        async with client.stream(
+            "GET", "/json", headers={"Accept-Encoding": encoding}
+        ) as response:
+            assert response.headers["content-encoding"] == encoding
+            raw = b"".join([chunk async for chunk in response.aiter_raw()])
+    assert len(raw) < len(BODY)
+    assert library.decompress(raw) == BODY
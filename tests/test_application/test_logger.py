@@ -0,0 +1,62 @@
+import json
+import logging
+import queue
+
+from app.application.settings import settings
+from app.logger.logger import (
+    JSONFormatter,
+    NonBlockingQueueHandler,
+    SamplingFilter,
+    configure_logging,
+)
+
+
+def _record(name: str = "DATABASE", level: int = logging.INFO) -> logging.LogRecord:
+    return logging.LogRecord(name, level, __file__, 1, "rows %d", (3,), None)
+
+
+def test_json_formatter_extra():
+    """Проверяет вывод записи в JSON вместе с полями extra"""
+    record = _record()
+    record.sql_statements = 4
+    data = json.loads(JSONFormatter().format(record))
+    assert data["message"] == "rows 3"
+    assert data["logger"] == "DATABASE"
+    assert data["level"] == "INFO"
+    assert data["sql_statements"] == 4
+
+
+def test_sampling_filter():
+    """Проверяет долю записей по имени логгера и его родителей"""
+    sampling = SamplingFilter({"DATABASE": 0.0, "DATABASE.pool": 1.0})
+    assert not sampling.filter(_record("DATABASE"))
+    assert not sampling.filter(_record("DATABASE.stats"))
+    assert sampling.filter(_record("DATABASE.pool"))
+    assert sampling.filter(_record("APP"))
+    # Предупреждения и ошибки не отбрасываются
+    assert sampling.filter(_record("DATABASE", logging.WARNING))
+
+
+def test_queue_handler_drops_when_full():
+    """Проверяет, что переполненная очередь не блокирует вызов"""
+    handler = NonBlockingQueueHandler(queue.Queue(maxsize=1))
+    handler.handle(_record())
+    handler.handle(_record())
+    assert handler.dropped == 1
+    record = handler.queue.get_nowait()
+    assert record.msg == "rows 3" and record.args is None
+
+
+def test_uvicorn_loggers_use_queue():
+    """Проверяет, что логгеры uvicorn передают записи корневому логгеру
+    с обработчиком очереди вместо собственных обработчиков uvicorn
+    """
+    access = logging.getLogger("uvicorn.access")
+    access.addHandler(logging.StreamHandler())
+    access.propagate = False
+    configure_logging(settings)
+    assert access.handlers == [] and access.propagate
+    assert any(
+        isinstance(handler, NonBlockingQueueHandler)
+        for handler in logging.getLogger().handlers
+    )
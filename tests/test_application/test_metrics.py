@@ -0,0 +1,79 @@
+import os
+
+import pytest
+
+from app.application.metrics import Registry, SharedMetrics
+
+
+def test_counter_render():
+    """Проверяет вывод счётчика с метками"""
+    registry = Registry()
+    counter = registry.counter("requests_total", "Requests", ("route",))
+    counter.inc(labels=("/api/tweets",))
+    counter.inc(2, labels=("/api/tweets",))
+    assert counter.value(("/api/tweets",)) == 3
+    assert 'requests_total{route="/api/tweets"} 3' in registry.render()
+
+
+def test_histogram_buckets():
+    """Проверяет накопительные корзины гистограммы"""
+    registry = Registry()
+    histogram = registry.histogram("latency_seconds", "Latency", buckets=(0.1, 1.0))
+    histogram.observe(0.05)
+    histogram.observe(0.1)
+    histogram.observe(0.5)
+    histogram.observe(3)
+    text = registry.render()
+    assert 'latency_seconds_bucket{le="0.1"} 2' in text
+    assert 'latency_seconds_bucket{le="1"} 3' in text
+    assert 'latency_seconds_bucket{le="+Inf"} 4' in text
+    assert "latency_seconds_count 4" in text
+    assert histogram.count() == 4
+
+
+def test_gauge_function():
+    """Проверяет вычисляемый в момент сбора gauge"""
+    registry = Registry()
+    gauge = registry.gauge("pool", "Pool", ("state",), lambda: {("size",): 5})
+    assert gauge.value(("size",)) == 5
+    assert 'pool{state="size"} 5' in registry.render()
+
+
+@pytest.mark.asyncio
+async def test_shared_metrics(tmp_path):
+    """Проверяет сумму метрик процессов через общий каталог: счётчики
+    и гистограммы остановленного процесса учитываются, gauge - нет
+
+    Args:
+        tmp_path (Path): временный каталог
+    """
+    registries = []
+    for _ in range(2):
+        registry = Registry()
+        registry.counter("requests_total", "Requests", ("status",))
+        registry.histogram("latency_seconds", "Latency", buckets=(0.1,))
+        registry.gauge("in_progress", "In progress")
+        registries.append(registry)
+    worker, other = registries
+    other.get("requests_total").inc(2, (200,))
+    other.get("latency_seconds").observe(0.05)
+    other.get("in_progress").set(3)
+    other_metrics = SharedMetrics(other, str(tmp_path), interval=60)
+    await other_metrics.start()
+    await other_metrics.stop()
+
+    worker.get("requests_total").inc(1, (200,))
+    worker.get("latency_seconds").observe(0.5)
+    worker.get("in_progress").set(1)
+    shared = SharedMetrics(worker, str(tmp_path), interval=60)
+    text = shared.render()
+    assert 'requests_total{status="200"} 3' in text
+    assert 'latency_seconds_bucket{le="0.1"} 1' in text
+    assert "latency_seconds_count 2" in text
+    assert "in_progress 4" in text
+
+    os.utime(other_metrics.path, (0, 0))
+    text = shared.render()
+    assert 'requests_total{status="200"} 3' in text
+    assert "in_progress 1" in text
+    assert "requests_total" in SharedMetrics(worker, "", interval=60).render()
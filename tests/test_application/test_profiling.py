@@ -0,0 +1,84 @@
+import asyncio
+import pstats
+import time
+
+import httpx
+import pytest
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+
+from app.application.profiling import LoopMonitor, ProfilingMiddleware
+
+
+def _client(directory: str, **kwargs) -> httpx.AsyncClient:
+    async def load_media(request):
+        await asyncio.sleep(0)
+        return JSONResponse({"result": True})
+
+    app = Starlette(routes=[Route("/api/medias", load_media)])
+    app.add_middleware(ProfilingMiddleware, directory=directory, **kwargs)
+    return httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=app), base_url="http://test"
+    )
+
+
+@pytest.mark.asyncio
+async def test_profile_by_header(tmp_path):
+    """Проверяет профилирование запроса с заголовком X-Profile
+
+    Args:
+        tmp_path (Path): временный каталог
+    """
+    async with _client(str(tmp_path / "profiles"), token="secret") as client:
+        response = await client.get("/api/medias")
+        assert "x-profile" not in response.headers
+        response = await client.get("/api/medias", headers={"X-Profile": "wrong"})
+        assert "x-profile" not in response.headers
+
+        response = await client.get("/api/medias", headers={"X-Profile": "secret"})
+        assert response.json() == {"result": True}
+        file_name = response.headers["x-profile"]
+        assert file_name.endswith("_GET_api_medias.prof")
+    stats = pstats.Stats(str(tmp_path / "profiles" / file_name))
+    functions = {function for _, _, function in stats.stats}
+    assert "load_media" in functions
+
+
+@pytest.mark.asyncio
+async def test_profile_sampling(tmp_path):
+    """Проверяет случайное профилирование только выбранных путей
+
+    Args:
+        tmp_path (Path): временный каталог
+    """
+    async with _client(str(tmp_path), sample_rate=1.0, paths=["/api/tweets"]) as c:
+        assert "x-profile" not in (await c.get("/api/medias")).headers
+    async with _client(str(tmp_path), sample_rate=1.0) as c:
+        assert "x-profile" in (await c.get("/api/medias")).headers
+    assert len(list(tmp_path.glob("*.prof"))) == 1
+
+
+@pytest.mark.asyncio
+async def test_loop_monitor():
+    """Проверяет измерение задержки цикла событий и поиск
+    блокирующего обратного вызова
+    """
+
+    async def blocking_io() -> None:
+        await asyncio.sleep(0)
+        time.sleep(0.1)
+
+    monitor = LoopMonitor(interval=0.01, slow_callback=0.05, top=2)
+    await monitor.start()
+    try:
+        await blocking_io()
+        await asyncio.sleep(0.05)
+    finally:
+        await monitor.stop()
+    stats = monitor.stats()
+    assert stats["max_lag_ms"] >= 50
+    assert stats["slow_callbacks"] >= 1
+    assert stats["slowest"][0]["duration_ms"] >= 100
+    assert asyncio.Handle._run.__name__ == "_run"
+    assert asyncio.Handle._run.__qualname__ == "Handle._run"
@@ -0,0 +1,79 @@
+import asyncio
+import time
+
+from app.application.invalidation import InvalidationBus, tweet_key
+from app.application.tweet_cache import TweetCache
+
+
+def _tweet(tweet_id: int, likes: int = 0) -> dict:
+    return {
+        "id": tweet_id,
+        "content": "tweet {}".format(tweet_id),
+        "author": {"id": 1, "name": "TestUser"},
+        "attachments": ["images/{}_image.png".format(tweet_id)],
+        "likes": [{"user_id": user_id, "name": "User"} for user_id in range(likes)],
+    }
+
+
+class Loader:
+    """Загрузчик твитов, запоминающий запрошенные id"""
+
+    def __init__(self) -> None:
+        self.calls: list[list[int]] = []
+
+    async def __call__(self, tweet_ids):
+        self.calls.append(list(tweet_ids))
+        return [_tweet(tweet_id) for tweet_id in tweet_ids if tweet_id > 0]
+
+
+def test_get_tweets_batches_misses():
+    """Проверяет загрузку только промахов одним вызовом и порядок ответа"""
+    cache = TweetCache(InvalidationBus(None, enabled=False), capacity=10)
+    loader = Loader()
+    tweets = asyncio.run(cache.get_tweets([3, 1, 0], loader))
+    assert [tweet["id"] for tweet in tweets] == [3, 1]
+    tweets = asyncio.run(cache.get_tweets([1, 2, 3], loader))
+    assert [tweet["id"] for tweet in tweets] == [1, 2, 3]
+    assert loader.calls == [[3, 1, 0], [2]]
+    assert tweets[0] == _tweet(1)
+    stats = cache.stats()
+    assert stats["hits"] == 2 and stats["misses"] == 4
+    assert stats["bytes_per_tweet"] > 0
+
+
+def test_invalidation_and_eviction():
+    """Проверяет инвалидацию через шину и вытеснение старых записей"""
+    bus = InvalidationBus(None, enabled=False)
+    cache = TweetCache(bus, capacity=2)
+    loader = Loader()
+    asyncio.run(cache.get_tweets([1, 2], loader))
+    asyncio.run(bus.publish(tweet_key(1)))
+    assert len(cache) == 1
+    asyncio.run(cache.get_tweets([3, 1], loader))
+    # Вытеснен самый давно использованный твит 2
+    assert cache.get_many([1, 2, 3])[1] == [2]
+    bus.reset_local()
+    assert len(cache) == 0 and cache.bytes == 0
+
+
+def test_put_skips_stale_version():
+    """Проверяет, что твит, изменённый во время чтения из базы, не кэшируется"""
+    bus = InvalidationBus(None, enabled=False)
+    cache = TweetCache(bus)
+    version = bus.version(tweet_key(1))
+    bus.invalidate_local(tweet_key(1))
+    cache.put(_tweet(1), version)
+    assert len(cache) == 0
+
+
+def test_ttl():
+    """Проверяет, что запись устаревает по времени жизни, даже если
+    уведомление об изменении твита не пришло
+    """
+    cache = TweetCache(InvalidationBus(None, enabled=False), ttl=0.05)
+    loader = Loader()
+    asyncio.run(cache.get_tweets([1], loader))
+    asyncio.run(cache.get_tweets([1], loader))
+    time.sleep(0.06)
+    asyncio.run(cache.get_tweets([1], loader))
+    assert loader.calls == [[1], [1]]
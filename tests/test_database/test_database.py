@@ -1,5 +1,5 @@
 import pytest
-from sqlalchemy import select
+from sqlalchemy import delete, select
 from sqlalchemy.orm import selectinload
 
 from app.application.models.core import SQLManager
@@ -73,8 +73,7 @@ async def test_likes(sql_manager: SQLManager):
     assert like_2.name == user_2.name
     # Check likes tweet
     stmt = (
-        select(Tweets).where(Tweets.id == tweet.id).options(
-            selectinload(Tweets.likes))
+        select(Tweets).where(Tweets.id == tweet.id).options(selectinload(Tweets.likes))
     )
     res_tweet: Tweets = await sql_manager.select_scalars_one_or_none(stmt)
     assert len(res_tweet.likes) == 2
@@ -167,3 +166,151 @@ async def test_attach(sql_manager: SQLManager):
     attach_1.tweet_id = tweet_1.id
     await sql_manager.add(attach_1)
     assert attach_1.id != None
+
+
+@pytest.mark.asyncio
+async def test_delete_tweet_cascade(sql_manager: SQLManager):
+    """Проверяет удаление лайков и вложений твита каскадом базы данных
+
+    Args:
+        sql_manager (SQLManager): менеджер SQL запросов
+    """
+    user_1 = Users(**FactoryUser().get_dict())
+    user_2 = Users(**FactoryUser().get_dict())
+    await sql_manager.add(user_1, user_2)
+    tweet = Tweets(**FactoryTweets().get_dict())
+    tweet.author = user_1
+    await sql_manager.add(tweet)
+    await sql_manager.add(
+        Likes(user_id=user_1.id, tweet_id=tweet.id, name=user_1.name),
+        Likes(user_id=user_2.id, tweet_id=tweet.id, name=user_2.name),
+        Attachments(tweet_id=tweet.id),
+    )
+    assert await sql_manager.execute(delete(Tweets).where(Tweets.id == tweet.id)) == 1
+    likes = await sql_manager.select_scalars_all(
+        select(Likes).where(Likes.tweet_id == tweet.id)
+    )
+    attachments = await sql_manager.select_scalars_all(
+        select(Attachments).where(Attachments.tweet_id == tweet.id)
+    )
+    assert likes == [] and attachments == []
+
+
+@pytest.mark.asyncio
+async def test_purge_user(sql_manager: SQLManager):
+    """Проверяет удаление пользователя со всей историей пачками
+
+    Args:
+        sql_manager (SQLManager): менеджер SQL запросов
+    """
+    user_1 = Users(**FactoryUser().get_dict())
+    user_2 = Users(**FactoryUser().get_dict())
+    await sql_manager.add(user_1, user_2)
+    tweets = [Tweets(**FactoryTweets().get_dict(), user_id=user_1.id) for _ in range(5)]
+    other_tweet = Tweets(**FactoryTweets().get_dict(), user_id=user_2.id)
+    await sql_manager.add(*tweets, other_tweet)
+    await sql_manager.add(
+        Attachments(tweet_id=tweets[0].id, file_name="1_image.png"),
+        Likes(user_id=user_2.id, tweet_id=tweets[0].id, name=user_2.name),
+        Likes(user_id=user_1.id, tweet_id=other_tweet.id, name=user_1.name),
+        Follower(user_id=user_1.id, name=user_1.name),
+        Follower(user_id=user_2.id, name=user_2.name),
+    )
+    await sql_manager.add(
+        Followers(user_id=user_1.id, follower_id=user_2.id),
+        Followers(user_id=user_2.id, follower_id=user_1.id),
+    )
+    file_names, tweet_ids = await sql_manager.purge_user(user_1.id, batch_size=2)
+    assert file_names == ["1_image.png"]
+    assert sorted(tweet_ids) == sorted(
+        [tweet.id for tweet in tweets] + [other_tweet.id]
+    )
+    assert (
+        await sql_manager.select_scalars_one_or_none(
+            select(Users).where(Users.id == user_1.id)
+        )
+        is None
+    )
+    assert (
+        await sql_manager.select_scalars_all(
+            select(Tweets).where(Tweets.user_id == user_1.id)
+        )
+        == []
+    )
+    assert (
+        await sql_manager.select_scalars_all(
+            select(Likes).where(Likes.user_id == user_1.id)
+        )
+        == []
+    )
+    assert await sql_manager.select_scalars_all(select(Followers)) == []
+    # Твит другого пользователя не затронут
+    assert (
+        await sql_manager.select_scalars_one_or_none(
+            select(Tweets).where(Tweets.id == other_tweet.id)
+        )
+        is not None
+    )
+
+
+@pytest.mark.asyncio
+async def test_user_tweets_page(sql_manager: SQLManager):
+    """Проверяет keyset пагинацию твитов пользователя и загрузку твитов по id
+
+    Args:
+        sql_manager (SQLManager): менеджер SQL запросов
+    """
+    user_1 = Users(**FactoryUser().get_dict())
+    user_2 = Users(**FactoryUser().get_dict())
+    await sql_manager.add(user_1, user_2)
+    tweets = [Tweets(**FactoryTweets().get_dict(), user_id=user_1.id) for _ in range(5)]
+    await sql_manager.add(*tweets)
+    await sql_manager.add(Tweets(**FactoryTweets().get_dict(), user_id=user_2.id))
+    await sql_manager.add(
+        Likes(user_id=user_2.id, tweet_id=tweets[4].id, name=user_2.name),
+        Attachments(tweet_id=tweets[4].id, link="images/1_image.png"),
+    )
+    expected_ids = sorted((tweet.id for tweet in tweets), reverse=True)
+    page_1 = await sql_manager.select_user_tweet_ids(user_1.id, limit=3)
+    page_2 = await sql_manager.select_user_tweet_ids(
+        user_1.id, limit=3, before_id=page_1[-1]
+    )
+    assert page_1 + page_2 == expected_ids
+
+    hydrated = await sql_manager.select_tweets_by_ids(page_1 + [0])
+    assert [tweet["id"] for tweet in hydrated] == page_1
+    first = hydrated[0]
+    assert first["author"] == {"id": user_1.id, "name": user_1.name}
+    assert first["attachments"] == ["images/1_image.png"]
+    assert first["likes"] == [{"user_id": user_2.id, "name": user_2.name}]
+    assert hydrated[1]["likes"] == [] and hydrated[1]["attachments"] == []
+
+
+@pytest.mark.asyncio
+async def test_select_users_by_ids(sql_manager: SQLManager):
+    """Проверяет пакетную загрузку пользователей с подписчиками и подписками
+
+    Args:
+        sql_manager (SQLManager): менеджер SQL запросов
+    """
+    users = [Users(**FactoryUser().get_dict()) for _ in range(3)]
+    await sql_manager.add(*users)
+    await sql_manager.add(
+        *[Follower(user_id=user.id, name=user.name) for user in users]
+    )
+    # users[1] и users[2] подписаны на users[0], users[0] подписан на users[2]
+    await sql_manager.add(
+        Followers(user_id=users[0].id, follower_id=users[1].id),
+        Followers(user_id=users[0].id, follower_id=users[2].id),
+        Followers(user_id=users[2].id, follower_id=users[0].id),
+    )
+    loaded = await sql_manager.select_users_by_ids([users[2].id, 0, users[0].id])
+    assert [user["id"] for user in loaded] == [users[2].id, users[0].id]
+    assert loaded[0]["followers"] == [{"id": users[0].id, "name": users[0].name}]
+    assert loaded[0]["following"] == [{"id": users[0].id, "name": users[0].name}]
+    assert loaded[1]["followers"] == [
+        {"id": users[1].id, "name": users[1].name},
+        {"id": users[2].id, "name": users[2].name},
+    ]
+    assert loaded[1]["following"] == [{"id": users[2].id, "name": users[2].name}]
+    assert await sql_manager.select_users_by_ids([]) == []
@@ -0,0 +1,63 @@
+import json
+
+import pytest
+from sqlalchemy import select
+
+from app.application.models.core import SQLManager
+from app.application.models.export import ndjson_chunks
+from app.application.models.models import (
+    Attachments,
+    Follower,
+    Followers,
+    Likes,
+    Tweets,
+    Users,
+)
+
+
+@pytest.mark.asyncio
+async def test_export_user(sql_manager: SQLManager):
+    """Проверяет потоковую выгрузку данных пользователя в NDJSON
+
+    Args:
+        sql_manager (SQLManager): менеджер SQL запросов
+    """
+    users = await sql_manager.select_scalars_all(select(Users).order_by(Users.id))
+    user, other = users
+    tweets = [Tweets(content="tweet {}".format(i), user_id=user.id) for i in range(5)]
+    other_tweet = Tweets(content="other", user_id=other.id)
+    await sql_manager.add(*tweets, other_tweet)
+    await sql_manager.add(
+        Attachments(tweet_id=tweets[0].id, link="images/1.png"),
+        Attachments(tweet_id=tweets[0].id, link="images/2.png"),
+        Likes(tweet_id=other_tweet.id, user_id=user.id, name=user.name),
+        Follower(user_id=user.id, name=user.name),
+        Follower(user_id=other.id, name=other.name),
+    )
+    await sql_manager.add(
+        Followers(user_id=other.id, follower_id=user.id),
+        Followers(user_id=user.id, follower_id=other.id),
+    )
+
+    # Маленькие пачки и буфер проверяют сборку твита из нескольких пачек
+    chunks = [
+        chunk
+        async for chunk in ndjson_chunks(
+            sql_manager, user.id, chunk_size=1, buffer_size=100
+        )
+    ]
+    assert len(chunks) > 2
+    assert all(chunk.endswith(b"\n") for chunk in chunks)
+    records = [json.loads(line) for line in b"".join(chunks).splitlines()]
+    assert records[0] == {"type": "user", "id": user.id, "name": user.name}
+    exported_tweets = [record for record in records if record["type"] == "tweet"]
+    assert [tweet["id"] for tweet in exported_tweets] == [t.id for t in tweets]
+    assert exported_tweets[0]["attachments"] == ["images/1.png", "images/2.png"]
+    assert exported_tweets[1]["attachments"] == []
+    assert records[-3:] == [
+        {"type": "like", "tweet_id": other_tweet.id},
+        {"type": "following", "user_id": other.id, "name": other.name},
+        {"type": "follower", "user_id": other.id, "name": other.name},
+    ]
+    # Несуществующий пользователь - пустая выгрузка
+    assert [chunk async for chunk in ndjson_chunks(sql_manager, 0)] == []
@@ -0,0 +1,119 @@
+import asyncio
+from datetime import timedelta
+
+import pytest
+from sqlalchemy import select
+
+from app.application.hashtags import extract_hashtags, extract_mentions, hour_bucket
+from app.application.models.core import SQLManager
+from app.application.models.models import HashtagCounts, Tweets, Users
+
+
+def test_extract():
+    """Проверяет извлечение хэштегов и упоминаний из текста"""
+    text = "#Python и #питон, снова #python; mail@example.com a#b @Test1 @test1 @Test1"
+    assert extract_hashtags(text) == ["python", "питон"]
+    assert extract_mentions(text) == ["Test1", "test1"]
+    assert extract_hashtags("#" + "a" * 101) == []
+
+
+@pytest.mark.asyncio
+async def test_hashtags_and_mentions(sql_manager: SQLManager):
+    """Проверяет ленты хэштега и упоминаний и счётчики популярных хэштегов
+    при добавлении и удалении твитов
+
+    Args:
+        sql_manager (SQLManager): менеджер SQL запросов
+    """
+    user, other = await sql_manager.select_scalars_all(select(Users).order_by(Users.id))
+    tweets = []
+    for content in (
+        "#News #python @TestUser2",
+        "#python again",
+        "no tags @Unknown",
+        "#PYTHON @TestUser2 @TestUser",
+    ):
+        tweet = Tweets(content=content, user_id=user.id)
+        await sql_manager.add_tweet(
+            tweet, extract_hashtags(content), extract_mentions(content)
+        )
+        tweets.append(tweet)
+
+    page_1 = await sql_manager.select_hashtag_tweet_ids("python", limit=2)
+    page_2 = await sql_manager.select_hashtag_tweet_ids(
+        "python", limit=2, before_id=page_1[-1]
+    )
+    assert page_1 + page_2 == [tweets[3].id, tweets[1].id, tweets[0].id]
+    assert await sql_manager.select_mention_tweet_ids(other.id, limit=10) == [
+        tweets[3].id,
+        tweets[0].id,
+    ]
+    assert await sql_manager.select_mention_tweet_ids(user.id, limit=10) == [
+        tweets[3].id
+    ]
+
+    since = hour_bucket()
+    assert await sql_manager.select_trending_hashtags(since, limit=10) == [
+        ("python", 3),
+        ("news", 1),
+    ]
+    assert await sql_manager.delete_tweets([tweets[0].id, tweets[3].id]) == 2
+    # Счётчик news обнулился и не попадает в популярные
+    assert await sql_manager.select_trending_hashtags(since, limit=10) == [
+        ("python", 1)
+    ]
+    assert await sql_manager.select_hashtag_tweet_ids("python", limit=10) == [
+        tweets[1].id
+    ]
+    assert await sql_manager.select_mention_tweet_ids(other.id, limit=10) == []
+    # Окно в будущем не содержит текущий час
+    later = since + timedelta(hours=1)
+    assert await sql_manager.select_trending_hashtags(later, limit=10) == []
+
+    assert await sql_manager.delete_hashtag_counts(later) == 2
+    assert await sql_manager.select_scalars_all(select(HashtagCounts)) == []
+
+
+@pytest.mark.asyncio
+async def test_concurrent_hashtag_counts(sql_manager: SQLManager):
+    """Проверяет, что одновременные твиты с хэштегами в разном порядке
+    не блокируют друг друга и все учитываются в счётчиках
+
+    Args:
+        sql_manager (SQLManager): менеджер SQL запросов
+    """
+    user = await sql_manager.select_scalars_one_or_none(
+        select(Users).where(Users.name == "TestUser")
+    )
+    contents = ["#a #b #c", "#c #b #a"] * 10
+    await asyncio.gather(
+        *(
+            sql_manager.add_tweet(
+                Tweets(content=content, user_id=user.id),
+                extract_hashtags(content),
+                [],
+            )
+            for content in contents
+        )
+    )
+    trending = await sql_manager.select_trending_hashtags(since=hour_bucket(), limit=10)
+    assert trending == [("a", 20), ("b", 20), ("c", 20)]
+
+
+@pytest.mark.asyncio
+async def test_ambiguous_mention(sql_manager: SQLManager):
+    """Проверяет, что упоминание имени нескольких пользователей пропускается
+
+    Args:
+        sql_manager (SQLManager): менеджер SQL запросов
+    """
+    user, other = await sql_manager.select_scalars_all(select(Users).order_by(Users.id))
+    first = Users(name="alice", api_key="alice1")
+    second = Users(name="alice", api_key="alice2")
+    await sql_manager.add(first, second)
+    content = "@alice @{}".format(other.name)
+    tweet = Tweets(content=content, user_id=user.id)
+    await sql_manager.add_tweet(tweet, [], extract_mentions(content))
+    assert await sql_manager.select_mention_tweet_ids(first.id, limit=10) == []
+    assert await sql_manager.select_mention_tweet_ids(second.id, limit=10) == []
+    assert await sql_manager.select_mention_tweet_ids(other.id, limit=10) == [tweet.id]
@@ -0,0 +1,81 @@
+import pytest
+from sqlalchemy import select
+
+from app.application.custom_exp import CustomException
+from app.application.idempotency import IdempotencyStore
+from app.application.models.core import SQLManager
+from app.application.models.models import Users
+
+
+async def _user_id(sql_manager: SQLManager) -> int:
+    return await sql_manager.select_scalars_one_or_none(
+        select(Users.id).where(Users.api_key == "test")
+    )
+
+
+@pytest.mark.asyncio
+async def test_repeat_returns_saved_response(sql_manager: SQLManager):
+    """Проверяет возврат сохранённого ответа при повторе запроса
+
+    Args:
+        sql_manager (SQLManager): менеджер SQL запросов
+    """
+    store = IdempotencyStore(sql_manager)
+    user_id = await _user_id(sql_manager)
+    first = await store.begin(user_id, "key-1", "/api/tweets")
+    assert first.response is None
+    # Пока первый запрос выполняется, повтор получает 409
+    with pytest.raises(CustomException) as exc:
+        await store.begin(user_id, "key-1", "/api/tweets")
+    assert exc.value.status_code == 409
+    assert await first.save({"result": True, "id": 7}) == {"result": True, "id": 7}
+
+    repeat = await store.begin(user_id, "key-1", "/api/tweets")
+    assert repeat.response == {"result": True, "id": 7}
+    with pytest.raises(CustomException) as exc:
+        await store.begin(user_id, "key-1", "/api/medias")
+    assert exc.value.status_code == 422
+    # Без ключа запрос выполняется как обычно
+    assert (await store.begin(user_id, None, "/api/tweets")).response is None
+
+
+@pytest.mark.asyncio
+async def test_release_and_expire(sql_manager: SQLManager):
+    """Проверяет освобождение ключа после ошибки и истечение срока хранения
+
+    Args:
+        sql_manager (SQLManager): менеджер SQL запросов
+    """
+    store = IdempotencyStore(sql_manager)
+    user_id = await _user_id(sql_manager)
+    failed = await store.begin(user_id, "key-2", "/api/tweets")
+    await failed.release()
+    retry = await store.begin(user_id, "key-2", "/api/tweets")
+    await retry.save({"result": True, "id": 1})
+
+    expired_store = IdempotencyStore(sql_manager, ttl=0)
+    again = await expired_store.begin(user_id, "key-2", "/api/tweets")
+    assert again.response is None
+    await again.save({"result": True, "id": 2})
+    assert await expired_store.delete_expired() == 1
+
+
+@pytest.mark.asyncio
+async def test_lease_and_request_hash(sql_manager: SQLManager):
+    """Проверяет повтор после брошенного запроса и ошибку при повторе
+    с другим телом запроса
+
+    Args:
+        sql_manager (SQLManager): менеджер SQL запросов
+    """
+    user_id = await _user_id(sql_manager)
+    await IdempotencyStore(sql_manager).begin(user_id, "key-3", "/api/tweets", "a")
+    # Процесс упал, не сохранив ответ: после lease ключ занимает повтор
+    store = IdempotencyStore(sql_manager, lease=0)
+    retry = await store.begin(user_id, "key-3", "/api/tweets", "a")
+    assert retry.response is None
+    await retry.save({"result": True, "id": 3})
+    assert (await store.begin(user_id, "key-3", "/api/tweets", "a")).response
+    with pytest.raises(CustomException) as exc:
+        await store.begin(user_id, "key-3", "/api/tweets", "b")
+    assert exc.value.status_code == 422
@@ -0,0 +1,175 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import select
+
+from app.application.jobs import JobQueue
+from app.application.models.core import SQLManager
+from app.application.models.models import Jobs, Tweets, Users
+from app.application.storage import remove_files
+
+
+@pytest.mark.asyncio
+async def test_async_and_blocking_jobs(sql_manager: SQLManager, tmp_path):
+    """Проверяет выполнение асинхронной задачи и задачи в пуле потоков
+
+    Args:
+        sql_manager (SQLManager): менеджер SQL запросов
+        tmp_path (Path): временный каталог
+    """
+    job_queue = JobQueue(sql_manager, workers=2, threads=2)
+    done = []
+
+    @job_queue.task()
+    async def collect(value: int, extra: int = 0) -> None:
+        done.append(value + extra)
+
+    job_queue.task("remove_files", blocking=True)(remove_files)
+    file = tmp_path / "image.png"
+    file.write_bytes(b"data")
+
+    await job_queue.start(recover=False)
+    await job_queue.enqueue("collect", 1, extra=2)
+    await job_queue.enqueue("remove_files", [str(file), str(tmp_path / "missing")])
+    await job_queue.drain(timeout=5)
+    await job_queue.stop()
+    assert done == [3]
+    assert not file.exists()
+    with pytest.raises(KeyError):
+        await job_queue.enqueue("unknown")
+
+
+@pytest.mark.asyncio
+async def test_retry_and_durable_job(sql_manager: SQLManager):
+    """Проверяет повтор неудачной задачи и удаление durable задачи
+    из базы данных после выполнения
+
+    Args:
+        sql_manager (SQLManager): менеджер SQL запросов
+    """
+    job_queue = JobQueue(sql_manager, max_retries=2, retry_delay=0.01)
+    attempts = []
+
+    @job_queue.task()
+    async def flaky(value: str) -> None:
+        attempts.append(value)
+        if len(attempts) < 3:
+            raise RuntimeError("temporary error")
+
+    @job_queue.task(retries=0)
+    async def broken() -> None:
+        raise RuntimeError("permanent error")
+
+    await job_queue.start(recover=False)
+    await job_queue.enqueue("flaky", "a", durable=True)
+    await job_queue.enqueue("broken", durable=True)
+    await job_queue.drain(timeout=5)
+    await job_queue.stop()
+    assert attempts == ["a", "a", "a"]
+    rows = await sql_manager.select_scalars_all(select(Jobs))
+    # Выполненная задача удалена, неудачная осталась со статусом failed
+    assert [(row.name, row.status, row.attempts) for row in rows] == [
+        ("broken", "failed", 1)
+    ]
+
+
+@pytest.mark.asyncio
+async def test_recover_stale_jobs(sql_manager: SQLManager):
+    """Проверяет, что брошенную durable задачу забирает другой процесс,
+    а задачу в работе не трогает
+
+    Args:
+        sql_manager (SQLManager): менеджер SQL запросов
+    """
+    now = datetime.now(timezone.utc)
+    for name, claimed_at in (
+        ("collect", now - timedelta(seconds=600)),
+        ("collect", now),
+    ):
+        await sql_manager.add(
+            Jobs(
+                name=name,
+                args={"args": [claimed_at.isoformat()], "kwargs": {}},
+                status="running",
+                claimed_at=claimed_at,
+            )
+        )
+    job_queue = JobQueue(sql_manager, stale_after=300)
+    done = []
+
+    @job_queue.task()
+    async def collect(value: str) -> None:
+        done.append(value)
+
+    await job_queue.start(recover=False)
+    assert await job_queue.recover() == 1
+    # Повторный вызов не забирает ту же задачу
+    assert await job_queue.recover() == 0
+    await job_queue.drain(timeout=5)
+    await job_queue.stop()
+    assert done == [(now - timedelta(seconds=600)).isoformat()]
+    rows = await sql_manager.select_scalars_all(select(Jobs))
+    assert len(rows) == 1 and rows[0].claimed_at == now
+
+
+@pytest.mark.asyncio
+async def test_durable_row_in_transaction(sql_manager: SQLManager):
+    """Проверяет запись задачи в транзакции удаления твита и её выполнение
+    после фиксации транзакции
+
+    Args:
+        sql_manager (SQLManager): менеджер SQL запросов
+    """
+    user = await sql_manager.select_scalars_one_or_none(
+        select(Users).where(Users.api_key == "test")
+    )
+    tweet = Tweets(content="tweet", user_id=user.id)
+    await sql_manager.add(tweet)
+    job_queue = JobQueue(sql_manager)
+    done = []
+
+    @job_queue.task()
+    async def collect(names: list[str]) -> None:
+        done.append(names)
+
+    row = job_queue.durable_row("collect", ["1_image.png"])
+    assert await sql_manager.delete_tweets([tweet.id], jobs=[row]) == 1
+    [stored] = await sql_manager.select_scalars_all(select(Jobs))
+    assert stored.id == row.id and stored.name == "collect"
+
+    await job_queue.start(recover=False)
+    job_queue.submit(row)
+    await job_queue.drain(timeout=5)
+    await job_queue.stop()
+    assert done == [["1_image.png"]]
+    assert await sql_manager.select_scalars_all(select(Jobs)) == []
+
+
+@pytest.mark.asyncio
+async def test_schedule(sql_manager: SQLManager):
+    """Проверяет периодическую постановку задачи в очередь
+    и остановку расписания вместе с очередью
+
+    Args:
+        sql_manager (SQLManager): менеджер SQL запросов
+    """
+    job_queue = JobQueue(sql_manager)
+    runs = []
+
+    @job_queue.task()
+    async def cleanup(value: int) -> None:
+        runs.append(value)
+
+    await job_queue.start(recover=False)
+    job_queue.schedule("cleanup", 0.01, 1)
+    job_queue.schedule("cleanup", 0, 2)
+    await asyncio.sleep(0.1)
+    await job_queue.stop()
+    assert runs.count(1) > 1
+    assert runs.count(2) == 1
+    count = len(runs)
+    await asyncio.sleep(0.05)
+    assert len(runs) == count
+    with pytest.raises(KeyError):
+        job_queue.schedule("unknown", 1)
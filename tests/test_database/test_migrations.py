@@ -0,0 +1,47 @@
+import pytest
+from sqlalchemy import inspect, text
+
+from app.application.models import migrations
+from app.application.models.core import SQLManager
+from app.application.models.models import Base
+
+
+def _schema(connection) -> dict[str, set]:
+    inspector = inspect(connection)
+    schema = {}
+    for table in Base.metadata.tables:
+        schema[table] = {index["name"] for index in inspector.get_indexes(table)}
+        schema[table] |= {
+            (
+                tuple(foreign_key["constrained_columns"]),
+                foreign_key["referred_table"],
+                foreign_key["options"].get("ondelete"),
+            )
+            for foreign_key in inspector.get_foreign_keys(table)
+        }
+    return schema
+
+
+@pytest.mark.asyncio
+async def test_upgrade_matches_models(sql_manager: SQLManager):
+    """Проверяет, что миграции создают те же таблицы и индексы, что и модели
+
+    Args:
+        sql_manager (SQLManager): менеджер SQL запросов
+    """
+    async with sql_manager.engine.connect() as connection:
+        expected = await connection.run_sync(_schema)
+    await sql_manager.drop_all_table()
+    async with sql_manager.engine.begin() as connection:
+        await connection.execute(text("DROP TABLE IF EXISTS schema_version"))
+    with pytest.raises(migrations.SchemaVersionError):
+        await sql_manager.check_database()
+
+    assert await sql_manager.upgrade_database() == migrations.HEAD_VERSION
+    assert await sql_manager.check_database() == migrations.HEAD_VERSION
+    # Повторный запуск ничего не меняет
+    assert await sql_manager.upgrade_database() == migrations.HEAD_VERSION
+    async with sql_manager.engine.connect() as connection:
+        assert await connection.run_sync(_schema) == expected
+    assert "ix_tweets_user_id_id" in expected["tweets"]
+    assert (("user_id",), "users", "CASCADE") in expected["tweets"]
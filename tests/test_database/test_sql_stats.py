@@ -0,0 +1,84 @@
+import pytest
+from sqlalchemy import select
+
+from app.application import sql_stats
+from app.application.models.core import SQLManager
+from app.application.models.models import Users
+
+
+@pytest.mark.asyncio
+async def test_request_stats(sql_manager: SQLManager):
+    """Проверяет подсчёт запросов и строк в рамках запроса
+
+    Args:
+        sql_manager (SQLManager): менеджер SQL запросов
+    """
+    sql_stats.instrument_engine(sql_manager.engine)
+    stats = sql_stats.RequestSQLStats()
+    token = sql_stats.activate(stats)
+    try:
+        users = await sql_manager.select_scalars_all(select(Users))
+    finally:
+        sql_stats.deactivate(token)
+    # BEGIN (implicit) не проходит через курсор, учитывается только SELECT
+    assert stats.statements == 1
+    assert stats.rows == len(users) == 2
+    assert stats.db_time > 0
+    assert stats.server_timing().startswith("db;dur=")
+
+
+@pytest.mark.asyncio
+async def test_repeated_shapes(sql_manager: SQLManager):
+    """Проверяет обнаружение повторяющихся запросов (N+1)
+
+    Args:
+        sql_manager (SQLManager): менеджер SQL запросов
+    """
+    sql_stats.instrument_engine(sql_manager.engine)
+    stats = sql_stats.RequestSQLStats()
+    token = sql_stats.activate(stats)
+    try:
+        for user_id in range(1, 6):
+            await sql_manager.select_scalars_one_or_none(
+                select(Users).where(Users.id == user_id)
+            )
+    finally:
+        sql_stats.deactivate(token)
+    repeated = stats.repeated_shapes(threshold=5)
+    assert len(repeated) == 1
+    assert list(repeated.values()) == [5]
+    assert stats.repeated_shapes(threshold=6) == {}
+    assert sql_stats.statement_shapes.slowest(1)[0]["calls"] >= 1
+
+
+@pytest.mark.asyncio
+async def test_statement_shapes(sql_manager: SQLManager):
+    """Проверяет, что списки IN разной длины дают одну форму запроса,
+    а при переполнении вытесняется самая редкая форма
+
+    Args:
+        sql_manager (SQLManager): менеджер SQL запросов
+    """
+    sql_stats.instrument_engine(sql_manager.engine)
+    sql_stats.statement_shapes.clear()
+    for count in range(1, 4):
+        await sql_manager.select_scalars_all(
+            select(Users).where(Users.id.in_(range(1, count + 1)))
+        )
+    [shape] = [
+        shape
+        for shape in sql_stats.statement_shapes.slowest()
+        if shape["statement"].startswith("SELECT users.id")
+    ]
+    assert shape["calls"] == 3
+    assert "IN ($n::INTEGER, ...)" in shape["statement"]
+
+    shapes = sql_stats.StatementShapes(limit=2)
+    shapes.record("SELECT 1", 1, 0.1)
+    shapes.record("SELECT 1", 1, 0.1)
+    shapes.record("SELECT 2", 1, 0.1)
+    shapes.record("SELECT 3", 1, 0.1)
+    assert sorted(shape["statement"] for shape in shapes.slowest()) == [
+        "SELECT 1",
+        "SELECT 3",
+    ]
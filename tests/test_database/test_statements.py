@@ -0,0 +1,77 @@
+import re
+
+import pytest
+from sqlalchemy import event, select
+
+from app.application.models import benchmark, statements
+from app.application.models.core import SQLManager
+from app.application.models.models import Follower, Tweets, Users
+
+
+@pytest.mark.asyncio
+async def test_prepared_statements(sql_manager: SQLManager):
+    """Проверяет выполнение готовых запросов с параметрами
+
+    Args:
+        sql_manager (SQLManager): менеджер SQL запросов
+    """
+    user, other = await sql_manager.select_scalars_all(select(Users).order_by(Users.id))
+    found = await sql_manager.select_scalars_one_or_none(
+        statements.USER_BY_API_KEY, {"api_key": "test"}
+    )
+    assert found.id == user.id and found.user_followers == []
+    tweet = Tweets(content="tweet", user_id=other.id)
+    await sql_manager.add(tweet)
+    assert (
+        await sql_manager.select_scalars_one_or_none(
+            statements.TWEET_BY_ID, {"tweet_id": tweet.id}
+        )
+    ).content == "tweet"
+
+    like = {"user_id": user.id, "tweet_id": tweet.id}
+    assert await sql_manager.execute(statements.LIKE_INSERT, like | {"name": "a"}) == 1
+    assert await sql_manager.execute(statements.LIKE_DELETE, like) == 1
+    assert await sql_manager.execute(statements.LIKE_DELETE, like) == 0
+
+    await sql_manager.add(Follower(user_id=user.id, name=user.name))
+    pair = {"user_id": other.id, "follower_id": user.id}
+    assert await sql_manager.execute(statements.FOLLOWERS_INSERT, pair) == 1
+    assert (
+        await sql_manager.select_scalars_one_or_none(statements.FOLLOWERS_PAIR, pair)
+        is not None
+    )
+
+
+def test_benchmark_cases():
+    """Проверяет, что бенчмарк сравнивает запросы с одинаковым SQL"""
+    for build, prepared in benchmark.CASES.values():
+        inline, cached = (
+            re.sub(r":\w+", ":param", str(stmt)) for stmt in (build(), prepared)
+        )
+        assert inline == cached
+    assert set(benchmark.run(number=10)) == set(benchmark.CASES)
+
+
+@pytest.mark.asyncio
+async def test_batch_statements_single_sql(sql_manager: SQLManager):
+    """Проверяет, что пакетная загрузка списков разной длины выполняет
+    один и тот же SQL, то есть один подготовленный запрос
+
+    Args:
+        sql_manager (SQLManager): менеджер SQL запросов
+    """
+    executed: list[str] = []
+
+    def collect(conn, cursor, statement, parameters, context, executemany):
+        executed.append(statement)
+
+    user, other = await sql_manager.select_scalars_all(select(Users).order_by(Users.id))
+    event.listen(sql_manager.engine.sync_engine, "before_cursor_execute", collect)
+    try:
+        short = await sql_manager.select_users_by_ids([user.id])
+        long = await sql_manager.select_users_by_ids([other.id, user.id, 0])
+    finally:
+        event.remove(sql_manager.engine.sync_engine, "before_cursor_execute", collect)
+    assert [found["id"] for found in short + long] == [user.id, other.id, user.id]
+    assert len(executed) == 6 and executed[:3] == executed[3:]
+    assert all("= ANY (" in statement for statement in executed)
@@ -0,0 +1,121 @@
+import pytest
+from sqlalchemy import select, text, update
+
+from app.application.models.core import (
+    RECONCILE_LOCK_ID,
+    SQLManager,
+    _user_stats_changes,
+)
+from app.application.models.models import Follower, Tweets, Users, UserStats
+
+
+def _stats(tweets=0, followers=0, following=0, likes_received=0) -> dict:
+    return {
+        "tweets": tweets,
+        "followers": followers,
+        "following": following,
+        "likes_received": likes_received,
+    }
+
+
+@pytest.mark.asyncio
+async def test_user_stats(sql_manager: SQLManager):
+    """Проверяет изменение счётчиков пользователей вместе с твитами,
+    лайками и подписками и их пересчёт
+
+    Args:
+        sql_manager (SQLManager): менеджер SQL запросов
+    """
+    user, other = await sql_manager.select_scalars_all(select(Users).order_by(Users.id))
+    assert await sql_manager.select_user_stats(user.id) == _stats()
+    assert await sql_manager.select_user_stats(0) is None
+
+    tweets = []
+    for _ in range(2):
+        tweet = Tweets(content="tweet", user_id=user.id)
+        await sql_manager.add_tweet(tweet, hashtags=[], mentions=[])
+        tweets.append(tweet)
+    for tweet in tweets:
+        await sql_manager.add_like(tweet.id, user.id, other.id, other.name)
+    await sql_manager.add(Follower(user_id=other.id, name=other.name))
+    await sql_manager.add_follow(user_id=user.id, follower_id=other.id)
+    assert await sql_manager.select_user_stats(user.id) == _stats(2, 1, 0, 2)
+    assert await sql_manager.select_user_stats(other.id) == _stats(following=1)
+
+    assert await sql_manager.delete_like(tweets[1].id, user.id, other.id) == 1
+    assert await sql_manager.delete_like(tweets[1].id, user.id, other.id) == 0
+    assert await sql_manager.delete_tweets([tweets[0].id]) == 1
+    assert await sql_manager.select_user_stats(user.id) == _stats(1, 1)
+    assert await sql_manager.delete_follow(user_id=user.id, follower_id=other.id)
+    assert not await sql_manager.delete_follow(user_id=user.id, follower_id=other.id)
+    assert await sql_manager.select_user_stats(user.id) == _stats(1)
+    assert await sql_manager.select_user_stats(other.id) == _stats()
+
+    [profile] = await sql_manager.select_users_by_ids([user.id])
+    assert profile["stats"] == _stats(1)
+
+    # Расхождение исправляет пересчёт, совпадающие строки не меняются
+    assert await sql_manager.reconcile_user_stats(batch_size=1) == 0
+    await sql_manager.execute(
+        update(UserStats).where(UserStats.user_id == user.id).values(tweets=10)
+    )
+    await sql_manager.execute(UserStats.__table__.delete())
+    assert await sql_manager.reconcile_user_stats(batch_size=1) == 2
+    assert await sql_manager.select_user_stats(user.id) == _stats(1)
+    assert await sql_manager.reconcile_user_stats() == 0
+
+
+@pytest.mark.asyncio
+async def test_purge_user_stats(sql_manager: SQLManager):
+    """Проверяет уменьшение счётчиков других пользователей при удалении
+    пользователя с лайками и подписками
+
+    Args:
+        sql_manager (SQLManager): менеджер SQL запросов
+    """
+    user, other = await sql_manager.select_scalars_all(select(Users).order_by(Users.id))
+    await sql_manager.add(
+        Follower(user_id=user.id, name=user.name),
+        Follower(user_id=other.id, name=other.name),
+    )
+    for _ in range(3):
+        tweet = Tweets(content="tweet", user_id=user.id)
+        await sql_manager.add_tweet(tweet, hashtags=[], mentions=[])
+        await sql_manager.add_like(tweet.id, user.id, other.id, other.name)
+    await sql_manager.add_follow(user_id=user.id, follower_id=other.id)
+    await sql_manager.add_follow(user_id=other.id, follower_id=user.id)
+    assert await sql_manager.select_user_stats(user.id) == _stats(3, 1, 1, 3)
+
+    await sql_manager.purge_user(other.id, batch_size=2)
+    assert await sql_manager.select_user_stats(user.id) == _stats(3)
+    assert await sql_manager.reconcile_user_stats() == 0
+
+
+def test_user_stats_changes_sorted():
+    """Проверяет сложение изменений одного пользователя и порядок строк
+    параметров по user_id
+    """
+    rows = _user_stats_changes(
+        (5, "followers", 1), (2, "following", 1), (5, "tweets", 1)
+    )
+    assert [row["user_id"] for row in rows] == [2, 5]
+    assert rows[1] == {"user_id": 5, **_stats(tweets=1, followers=1)}
+
+
+@pytest.mark.asyncio
+async def test_reconcile_user_stats_lock(sql_manager: SQLManager):
+    """Проверяет, что пересчёт пропускается, пока его выполняет другой процесс
+
+    Args:
+        sql_manager (SQLManager): менеджер SQL запросов
+    """
+    await sql_manager.execute(UserStats.__table__.delete())
+    async with sql_manager.engine.connect() as connection:
+        await connection.execute(
+            text("SELECT pg_advisory_lock(:lock_id)"), {"lock_id": RECONCILE_LOCK_ID}
+        )
+        assert await sql_manager.reconcile_user_stats() == 0
+        await connection.execute(
+            text("SELECT pg_advisory_unlock(:lock_id)"), {"lock_id": RECONCILE_LOCK_ID}
+        )
+    assert await sql_manager.reconcile_user_stats() == 2